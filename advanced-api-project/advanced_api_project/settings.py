@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +45,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "alx_shared.profiling.QueryProfilingMiddleware",
+    "alx_shared.db_routing.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -82,6 +85,24 @@ DATABASES = {
     }
 }
 
+# Optional primary from DATABASE_URL, connection pooling (PostgreSQL) or
+# persistent connections with health checks, and read replicas from
+# DATABASE_REPLICA_URLS (comma-separated). See alx_shared.db_routing.
+from alx_shared.db_routing import (  # noqa: E402
+    configure_connection,
+    database_from_url,
+    replica_databases,
+)
+
+if os.environ.get("DATABASE_URL"):
+    DATABASES["default"] = database_from_url(os.environ["DATABASE_URL"])
+DATABASE_POOL = os.environ.get("DATABASE_POOL", "False") in ("1", "True", "true")
+DATABASES["default"] = configure_connection(DATABASES["default"], pool=DATABASE_POOL)
+DATABASES.update(replica_databases(os.environ.get("DATABASE_REPLICA_URLS"), pool=DATABASE_POOL))
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["alx_shared.db_routing.PrimaryReplicaRouter"]
+DATABASE_REPLICA_STICKY_SECONDS = int(os.environ.get("DATABASE_REPLICA_STICKY_SECONDS", "5"))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -132,3 +153,12 @@ REST_FRAMEWORK = {
         "rest_framework.filters.OrderingFilter",
     ]
 }
+
+# Full-text search index for books (api/search.py): "auto" picks SQLite FTS5 or
+# PostgreSQL tsvector from the database vendor; None falls back to icontains.
+BOOK_SEARCH_BACKEND = "auto"
+
+# In-memory autocomplete (api/autocomplete.py): seconds between checks for
+# writes made by other workers, and whether wsgi.py builds it at startup.
+AUTOCOMPLETE_REFRESH_INTERVAL = 60
+AUTOCOMPLETE_WARM_ON_STARTUP = True
@@ -18,7 +18,10 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from alx_shared.profiling import route_stats_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("profiling/routes/", route_stats_view, name="profiling-routes"),
     path("api/", include("api.urls")),
 ]
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "advanced_api_project.settings")
 
 application = get_wsgi_application()
+
+# Build the in-memory autocomplete index before the first request (and, with
+# gunicorn --preload, before forking so workers share it copy-on-write).
+from api.autocomplete import warm  # noqa: E402
+
+warm()
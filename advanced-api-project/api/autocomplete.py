@@ -0,0 +1,264 @@
+"""
+In-memory typeahead for book titles and author names.
+
+Each worker keeps two ``PrefixIndex`` instances: one entry per distinct
+normalized title (scored by how many books carry it) and one per author
+(scored by their number of books). An entry is indexed under every word-start
+suffix of its text, so "hob" finds "The Hobbit", in a sorted list searched with
+``bisect``. Lookups never touch the database:
+
+- prefixes matching at most ``SCAN_LIMIT`` keys are ranked on the spot;
+- broader prefixes (one or two letters) have their top results memoized, and
+  the memo is invalidated for the prefixes of any entry that changes.
+
+The index is built on first use (or at startup, see ``warm``), updated in
+place by the signal handlers in ``api.signals`` for writes made by this
+worker, and rebuilt in a background thread when the catalog generation shows
+another worker wrote, at most once per ``AUTOCOMPLETE_REFRESH_INTERVAL``
+seconds (default 60).
+"""
+
+import bisect
+import heapq
+import logging
+import threading
+import time
+import unicodedata
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count
+
+from .cache import catalog_generation
+from .models import Author, Book
+
+
+logger = logging.getLogger(__name__)
+
+SCAN_LIMIT = 64
+MAX_SUFFIX_WORDS = 8
+MAX_MEMOIZED_PREFIXES = 10000
+# Sorts after every character, so (prefix + END,) bounds all keys starting with prefix.
+END = '\U0010ffff'
+
+
+def normalize(text):
+    """Casefold, strip accents and punctuation, collapse whitespace."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch if ch.isalnum() else ' ' for ch in text if not unicodedata.combining(ch))
+    return ' '.join(text.casefold().split())
+
+
+def suffixes(text):
+    """Every word-start suffix of ``text`` (normalized), for mid-string matches."""
+    words = normalize(text).split()
+    return list(dict.fromkeys(' '.join(words[i:]) for i in range(min(len(words), MAX_SUFFIX_WORDS))))
+
+
+class PrefixIndex:
+    """
+    Sorted ``(suffix, entry_id)`` keys over entries of ``[display, score, suffixes]``.
+    """
+
+    def __init__(self, entries=()):
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._top = {}
+        keys = []
+        for entry_id, text, display, score in entries:
+            entry_suffixes = suffixes(text)
+            self._entries[entry_id] = [display, score, entry_suffixes]
+            keys.extend((suffix, entry_id) for suffix in entry_suffixes)
+        keys.sort()
+        self._keys = keys
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _invalidate(self, entry_suffixes):
+        if not self._top:
+            return
+        for suffix in entry_suffixes:
+            for end in range(1, len(suffix) + 1):
+                self._top.pop(suffix[:end], None)
+
+    def _insert(self, entry_id, text, display, score):
+        entry_suffixes = suffixes(text)
+        self._entries[entry_id] = [display, score, entry_suffixes]
+        for suffix in entry_suffixes:
+            bisect.insort(self._keys, (suffix, entry_id))
+        self._invalidate(entry_suffixes)
+
+    def _delete(self, entry_id):
+        display, score, entry_suffixes = self._entries.pop(entry_id)
+        for suffix in entry_suffixes:
+            index = bisect.bisect_left(self._keys, (suffix, entry_id))
+            if index < len(self._keys) and self._keys[index] == (suffix, entry_id):
+                del self._keys[index]
+        self._invalidate(entry_suffixes)
+
+    def put(self, entry_id, text, display, score=None):
+        """Insert or rename an entry; ``score`` None keeps the current score."""
+        with self._lock:
+            current = self._entries.get(entry_id)
+            if current is not None:
+                if score is None:
+                    score = current[1]
+                self._delete(entry_id)
+            self._insert(entry_id, text, display, score or 0)
+
+    def adjust(self, entry_id, delta, text=None, display=None, drop_when_empty=False):
+        """
+        Change an entry's score by ``delta``; creates it from ``text`` when
+        missing, and removes it at zero when ``drop_when_empty``.
+        """
+        with self._lock:
+            current = self._entries.get(entry_id)
+            if current is None:
+                if text is not None and delta > 0:
+                    self._insert(entry_id, text, display, delta)
+                return
+            current[1] += delta
+            if drop_when_empty and current[1] <= 0:
+                self._delete(entry_id)
+            else:
+                self._invalidate(current[2])
+
+    def remove(self, entry_id):
+        with self._lock:
+            if entry_id in self._entries:
+                self._delete(entry_id)
+
+    def search(self, prefix, limit):
+        """``[(entry_id, display, score)]`` of the best ``limit`` entries for ``prefix``."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        with self._lock:
+            memo = self._top.get(prefix)
+            if memo is not None and len(memo) >= limit:
+                return memo[:limit]
+            lo = bisect.bisect_left(self._keys, (prefix,))
+            hi = bisect.bisect_left(self._keys, (prefix + END,), lo)
+            entry_ids = {entry_id for _, entry_id in self._keys[lo:hi]}
+            best = heapq.nsmallest(
+                limit, entry_ids,
+                key=lambda entry_id: (-self._entries[entry_id][1], self._entries[entry_id][0]),
+            )
+            results = [(entry_id, self._entries[entry_id][0], self._entries[entry_id][1]) for entry_id in best]
+            if hi - lo > SCAN_LIMIT:
+                if len(self._top) >= MAX_MEMOIZED_PREFIXES:
+                    self._top.clear()
+                self._top[prefix] = results
+            return results
+
+
+class Autocomplete:
+    """Title and author indexes for this worker, plus their freshness bookkeeping."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.titles = None
+        self.authors = None
+        self.generation = None
+        self.built_at = 0.0
+        self._rebuilding = False
+
+    @property
+    def ready(self):
+        return self.titles is not None
+
+    def build(self):
+        generation = catalog_generation()
+        counts = Counter()
+        displays = {}
+        rows = Book.objects.order_by().values_list('title').annotate(n=Count('id'))
+        for title, n in rows.iterator(chunk_size=5000):
+            key = normalize(title)
+            counts[key] += n
+            displays.setdefault(key, title)
+        titles = PrefixIndex((key, key, displays[key], n) for key, n in counts.items())
+        authors = PrefixIndex(
+            (pk, name, name, n)
+            for pk, name, n in Author.objects.order_by().annotate(n=Count('books'))
+            .values_list('pk', 'name', 'n').iterator(chunk_size=5000)
+        )
+        with self._lock:
+            self.titles, self.authors = titles, authors
+            self.generation = generation
+            self.built_at = time.monotonic()
+        logger.info("Autocomplete index built: %d titles, %d authors", len(titles), len(authors))
+
+    def _rebuild_in_background(self):
+        try:
+            self.build()
+        except Exception:
+            logger.exception("Autocomplete rebuild failed")
+        finally:
+            self._rebuilding = False
+            # This thread opened its own connection; don't leave it dangling.
+            connection.close()
+
+    def ensure_fresh(self):
+        if not self.ready:
+            self.build()
+            return
+        interval = getattr(settings, 'AUTOCOMPLETE_REFRESH_INTERVAL', 60)
+        if time.monotonic() - self.built_at < interval or self._rebuilding:
+            return
+        if catalog_generation() == self.generation:
+            self.built_at = time.monotonic()
+            return
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._rebuild_in_background, name='autocomplete-rebuild', daemon=True).start()
+
+    def suggest(self, prefix, limit=10, kinds=('title', 'author')):
+        self.ensure_fresh()
+        data = {}
+        if 'title' in kinds:
+            data['titles'] = [
+                {'title': display, 'books': score} for _, display, score in self.titles.search(prefix, limit)
+            ]
+        if 'author' in kinds:
+            data['authors'] = [
+                {'id': pk, 'name': display, 'books': score} for pk, display, score in self.authors.search(prefix, limit)
+            ]
+        return data
+
+    # Incremental updates from this worker's writes; no-ops until the index is built.
+
+    def book_added(self, title, author_id):
+        if self.ready:
+            key = normalize(title)
+            self.titles.adjust(key, 1, text=key, display=title)
+            self.authors.adjust(author_id, 1)
+
+    def book_removed(self, title, author_id):
+        if self.ready:
+            self.titles.adjust(normalize(title), -1, drop_when_empty=True)
+            self.authors.adjust(author_id, -1)
+
+    def author_saved(self, pk, name):
+        if self.ready:
+            self.authors.put(pk, name, name)
+
+    def author_removed(self, pk):
+        if self.ready:
+            self.authors.remove(pk)
+
+
+AUTOCOMPLETE = Autocomplete()
+
+
+def warm():
+    """Build the index now instead of on the first request (called from wsgi.py)."""
+    if getattr(settings, 'AUTOCOMPLETE_WARM_ON_STARTUP', True):
+        try:
+            AUTOCOMPLETE.build()
+        except Exception:
+            # e.g. tables not migrated yet; the first request will build it.
+            logger.exception("Could not warm the autocomplete index")
@@ -0,0 +1,48 @@
+"""
+Catalog generation counter for cache invalidation.
+
+Every change to a book or author bumps one integer in the cache. Cached
+answers include the generation in their key, so a bump invalidates all of
+them at once without tracking which keys exist; stale entries simply expire.
+
+Use a shared cache backend (Redis, Memcached) in production so every worker
+sees the same generation.
+"""
+
+import hashlib
+import json
+
+from django.core.cache import cache
+
+
+GENERATION_KEY = 'api:catalog-generation'
+DEFAULT_TIMEOUT = 300
+
+
+def catalog_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, 1, timeout=None)
+        generation = cache.get(GENERATION_KEY, 1)
+    return generation
+
+
+def bump_catalog_generation():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        # Key missing (evicted or never set): anything cached under it is unreachable anyway.
+        cache.add(GENERATION_KEY, 1, timeout=None)
+
+
+def cached_for_generation(prefix, params, compute, timeout=DEFAULT_TIMEOUT):
+    """
+    Return ``compute()``, cached under ``prefix``, ``params`` and the current generation.
+    """
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+    key = f'{prefix}:{catalog_generation()}:{digest}'
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout)
+    return value
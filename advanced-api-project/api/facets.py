@@ -0,0 +1,124 @@
+"""
+Facet counts (books per publication year and per author) for BookListView filters.
+
+When the only filters are ``author`` and/or ``publication_year`` the counts are
+summed from the precomputed ``BookFacet`` table, which has one row per
+(author, year) pair and so is far smaller than the books table. Any other
+filter (title, search) falls back to aggregating the filtered books, cached
+under the catalog generation (see ``api.cache``).
+
+``update_facets`` keeps the table in step with the books; it is called from
+the signal handlers in ``api.signals``.
+"""
+
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from .cache import cached_for_generation
+from .models import Book, BookFacet
+
+
+TABLE_FILTERS = {'author': 'author_id', 'publication_year': 'publication_year'}
+# Query parameters that do not narrow the result set.
+IGNORED_PARAMS = {'ordering', 'page', 'page_size', 'cursor', 'fields', 'expand', 'format', 'facet_limit'}
+DEFAULT_AUTHOR_LIMIT = 100
+
+
+def update_facets(added=(), removed=()):
+    """
+    Apply book changes to the facet table.
+    
+    Args:
+        added: ``(author_id, publication_year)`` of each book created or moved in
+        removed: ``(author_id, publication_year)`` of each book deleted or moved out
+    """
+    deltas = Counter(added)
+    deltas.subtract(Counter(removed))
+    with transaction.atomic():
+        for (author_id, year), delta in sorted(deltas.items()):
+            rows = BookFacet.objects.filter(author_id=author_id, publication_year=year)
+            if delta > 0:
+                if not rows.update(count=F('count') + delta):
+                    try:
+                        with transaction.atomic():
+                            BookFacet.objects.create(author_id=author_id, publication_year=year, count=delta)
+                    except IntegrityError:
+                        # Created concurrently by another request.
+                        rows.update(count=F('count') + delta)
+            elif delta < 0:
+                if not rows.filter(count__gt=-delta).update(count=F('count') + delta):
+                    rows.delete()
+
+
+def rebuild_facets():
+    """Recompute the whole facet table from the books."""
+    rows = Book.objects.order_by().values('author_id', 'publication_year').annotate(n=Count('id'))
+    with transaction.atomic():
+        BookFacet.objects.all().delete()
+        BookFacet.objects.bulk_create(
+            (BookFacet(author_id=row['author_id'], publication_year=row['publication_year'], count=row['n'])
+             for row in rows.iterator()),
+            batch_size=1000,
+        )
+
+
+def table_filters(params):
+    """
+    ``BookFacet`` filter kwargs for ``params``, or None if the table cannot answer them.
+    """
+    filters = {}
+    for name, value in params.items():
+        if name in IGNORED_PARAMS or value == '':
+            continue
+        if name not in TABLE_FILTERS:
+            return None
+        try:
+            filters[TABLE_FILTERS[name]] = int(value)
+        except ValueError:
+            # Let the regular filter backends report the error.
+            return None
+    return filters
+
+
+def _result(years, authors, author_limit):
+    years = list(years)
+    authors = list(authors[:author_limit])
+    return {
+        'total': sum(row['count'] for row in years),
+        'publication_year': [{'value': row['publication_year'], 'count': row['count']} for row in years],
+        'author': [
+            {'value': row['author_id'], 'name': row['author__name'], 'count': row['count']} for row in authors
+        ],
+    }
+
+
+def counts_from_table(filters, author_limit=DEFAULT_AUTHOR_LIMIT):
+    facets = BookFacet.objects.filter(**filters).order_by()
+    years = facets.values('publication_year').annotate(count=Sum('count')).order_by('publication_year')
+    authors = facets.values('author_id', 'author__name').annotate(count=Sum('count')).order_by('-count', 'author__name')
+    return _result(years, authors, author_limit)
+
+
+def counts_from_books(queryset, author_limit=DEFAULT_AUTHOR_LIMIT):
+    queryset = queryset.order_by()
+    years = queryset.values('publication_year').annotate(count=Count('id')).order_by('publication_year')
+    authors = queryset.values('author_id', 'author__name').annotate(count=Count('id')).order_by('-count', 'author__name')
+    return _result(years, authors, author_limit)
+
+
+def facet_counts(params, filtered_queryset, author_limit=DEFAULT_AUTHOR_LIMIT):
+    """
+    Facet counts for ``params`` (the request's query parameters).
+    
+    ``filtered_queryset`` is a callable returning the books matching ``params``;
+    it is only used when the facet table cannot answer.
+    """
+    filters = table_filters(params)
+    if filters is not None:
+        return counts_from_table(filters, author_limit)
+    return cached_for_generation(
+        'api:book-facets', [params, author_limit],
+        lambda: counts_from_books(filtered_queryset(), author_limit),
+    )
@@ -0,0 +1,37 @@
+"""
+Filter backends that use the full-text index in ``api.search``.
+"""
+
+from rest_framework import filters
+
+from .search import search
+
+
+class BookSearchFilter(filters.SearchFilter):
+    """
+    ``SearchFilter`` answered from the full-text index when there is one.
+    
+    Each term is a prefix match against the title or author name, and results
+    are annotated with ``search_rank``. Without an index for the database (or
+    for models other than Book) this is the plain ``icontains`` SearchFilter.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if terms and queryset.model._meta.label == 'api.Book':
+            results = search(queryset, terms)
+            if results is not None:
+                return results
+        return super().filter_queryset(request, queryset, view)
+
+
+class RankedOrderingFilter(filters.OrderingFilter):
+    """
+    ``OrderingFilter`` that orders search results by relevance unless the
+    client asked for an explicit ``?ordering=``.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if 'search_rank' in queryset.query.annotations and not request.query_params.get(self.ordering_param):
+            return queryset.order_by('search_rank', 'pk')
+        return super().filter_queryset(request, queryset, view)
@@ -0,0 +1,37 @@
+"""
+Stream books or authors to a CSV or NDJSON file (or stdout).
+
+    python manage.py export_catalog books --format ndjson --output books.ndjson
+"""
+
+import sys
+
+from django.core.management.base import BaseCommand
+
+from api import transfer
+
+
+class Command(BaseCommand):
+    help = "Export books or authors as CSV or NDJSON without loading them into memory"
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(transfer.EXPORT_FIELDS), help="What to export")
+        parser.add_argument("--format", choices=sorted(transfer.FORMATS), help="Defaults to the output file's extension, else csv")
+        parser.add_argument("--output", default="-", help="File to write, '-' for stdout")
+        parser.add_argument("--chunk-size", type=int, default=transfer.DEFAULT_CHUNK_SIZE, help="Rows fetched per database round trip")
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        fmt = options["format"] or ("ndjson" if output.endswith(".ndjson") else "csv")
+        lines = transfer.render(options["kind"], fmt, options["chunk_size"])
+        if output == "-":
+            sys.stdout.writelines(lines)
+            return
+        count = 0
+        with open(output, "w", encoding="utf-8", newline="") as f:
+            for line in lines:
+                f.write(line)
+                count += 1
+        if fmt == "csv":
+            count -= 1  # header
+        self.stderr.write(f"Exported {count} {options['kind']} to {output}")
@@ -0,0 +1,50 @@
+"""
+Import books or authors from a CSV or NDJSON file (or stdin) in batches.
+
+    python manage.py import_catalog books books.csv --batch-size 5000
+"""
+
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import transfer
+
+
+class Command(BaseCommand):
+    help = "Import books or authors from CSV or NDJSON, streaming the input"
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(transfer.IMPORTERS), help="What to import")
+        parser.add_argument("input", help="File to read, '-' for stdin")
+        parser.add_argument("--format", choices=sorted(transfer.FORMATS), help="Defaults to the input file's extension, else csv")
+        parser.add_argument("--batch-size", type=int, default=transfer.DEFAULT_BATCH_SIZE, help="Rows per bulk insert")
+        parser.add_argument("--no-create-authors", action="store_true", help="Reject books whose author does not exist")
+
+    def handle(self, *args, **options):
+        path = options["input"]
+        fmt = options["format"] or ("ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        extra = {}
+        if options["kind"] == "books":
+            extra["create_authors"] = not options["no_create_authors"]
+
+        importer = transfer.IMPORTERS[options["kind"]]
+        try:
+            if path == "-":
+                result = importer(sys.stdin, fmt, options["batch_size"], **extra)
+            else:
+                with open(path, encoding="utf-8", newline="") as f:
+                    result = importer(f, fmt, options["batch_size"], **extra)
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        for error in result.errors:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        if result.failed > len(result.errors):
+            self.stderr.write(f"... and {result.failed - len(result.errors)} more errors")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.created} {options['kind']} "
+            f"({result.authors_created} authors created, {result.failed} rows rejected)"
+        ))
@@ -0,0 +1,19 @@
+"""
+Recompute the BookFacet table from the books.
+
+Only needed after writes that bypass both Book signals and books_bulk_changed
+(raw SQL, QuerySet.update()).
+"""
+
+from django.core.management.base import BaseCommand
+
+from api.facets import rebuild_facets
+from api.models import BookFacet
+
+
+class Command(BaseCommand):
+    help = "Rebuild the precomputed book facet counts"
+
+    def handle(self, *args, **options):
+        rebuild_facets()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {BookFacet.objects.count()} facet rows"))
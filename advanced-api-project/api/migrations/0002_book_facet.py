@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_facets(apps, schema_editor):
+    Book = apps.get_model("api", "Book")
+    BookFacet = apps.get_model("api", "BookFacet")
+    rows = (
+        Book.objects.order_by()
+        .values("author_id", "publication_year")
+        .annotate(n=models.Count("id"))
+    )
+    BookFacet.objects.bulk_create(
+        [
+            BookFacet(
+                author_id=row["author_id"],
+                publication_year=row["publication_year"],
+                count=row["n"],
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BookFacet",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("publication_year", models.IntegerField()),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "author",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="facets",
+                        to="api.author",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["publication_year"], name="book_facet_year_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("author", "publication_year"), name="unique_book_facet"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(populate_facets, migrations.RunPython.noop),
+    ]
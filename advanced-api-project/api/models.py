@@ -15,6 +15,17 @@ class Author(models.Model):
     def __str__(self):
         return self.name
     
+    @property
+    def book_list(self):
+        """
+        The author's books, using the ``prefetched_books`` attribute set by
+        ``api.views.authors_with_books`` when available (it may be limited
+        per author), and falling back to a query otherwise.
+        """
+        if hasattr(self, 'prefetched_books'):
+            return self.prefetched_books
+        return self.books.all()
+    
     class Meta:
         ordering = ['name']
 
@@ -40,4 +51,33 @@ class Book(models.Model):
         return f"{self.title} by {self.author.name}"
     
     class Meta:
-        ordering = ['title']
\ No newline at end of file
+        ordering = ['title']
+        # One index per BookListView ordering, with id as the keyset tiebreaker;
+        # descending orderings scan them backwards.
+        indexes = [
+            models.Index(fields=['title', 'id'], name='book_title_id_idx'),
+            models.Index(fields=['publication_year', 'id'], name='book_year_id_idx'),
+        ]
+
+
+class BookFacet(models.Model):
+    """
+    Precomputed number of books per (author, publication_year).
+    
+    Maintained by ``api.facets`` from Book save/delete signals and the bulk
+    endpoints, so facet counts never need a scan of the books table.
+    """
+    author = models.ForeignKey(Author, on_delete=models.CASCADE, related_name='facets')
+    publication_year = models.IntegerField()
+    count = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.author_id}/{self.publication_year}: {self.count}"
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['author', 'publication_year'], name='unique_book_facet'),
+        ]
+        indexes = [
+            models.Index(fields=['publication_year'], name='book_facet_year_idx'),
+        ]
@@ -0,0 +1,169 @@
+import json
+from base64 import b64decode, b64encode
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class AuthorPagination(PageNumberPagination):
+    """
+    Page-number pagination for the author listing.
+
+    Each page embeds the authors' books, so pages are kept small.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset ("seek") pagination that follows the queryset's ordering.
+    
+    The ordering chosen by OrderingFilter gets the primary key appended as a
+    tiebreaker, and the cursor encodes the sort-key tuple of the last (or
+    first) row seen. The next page is fetched with a WHERE clause on that
+    tuple instead of OFFSET, so with an index matching the ordering every
+    page costs the same however deep it is.
+    
+    Pagination is opt-in: it applies when the request carries ``?cursor=`` or
+    ``?page_size=``, and unpaginated requests keep returning a plain list.
+    Ordering fields must be non-null.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        cursor = self.decode_cursor(request)
+        
+        reverse = False
+        queryset = queryset.order_by(*self.ordering)
+        names, defer = queryset.query.deferred_loading
+        if names and not defer:
+            # The sort key is read from each row, so an only() must include it.
+            field_names = {f.name for f in queryset.model._meta.concrete_fields}
+            order_names = [field.lstrip('-') for field in self.ordering if field.lstrip('-') in field_names]
+            queryset = queryset.only(*names, *order_names)
+        if cursor is not None:
+            keys, reverse = cursor
+            queryset = queryset.filter(self.seek(self.ordering, keys, reverse))
+            if reverse:
+                queryset = queryset.order_by(*(self.invert(field) for field in self.ordering))
+        
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+        
+        self.next_keys = self.previous_keys = None
+        if rows:
+            first, last = self.sort_key(rows[0]), self.sort_key(rows[-1])
+            if reverse:
+                self.next_keys = last
+                self.previous_keys = first if has_more else None
+            else:
+                self.next_keys = last if has_more else None
+                self.previous_keys = first if cursor is not None else None
+        return rows
+    
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+    
+    def get_ordering(self, queryset):
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        if not all(isinstance(field, str) for field in ordering):
+            raise ImproperlyConfigured('KeysetPagination needs an ordering made of field names.')
+        names = {field.lstrip('-') for field in ordering}
+        if not names & {'pk', queryset.model._meta.pk.name}:
+            ordering.append('pk')
+        return ordering
+    
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith('-') else '-' + field
+    
+    @staticmethod
+    def seek(ordering, keys, reverse):
+        """
+        Q selecting the rows strictly after ``keys`` in ``ordering`` (before, if ``reverse``).
+        
+        (a, b, pk) > (x, y, z) expands to a > x OR (a = x AND b > y) OR ...,
+        with "<" for descending fields. The leading a >= x repeats the first
+        term so the planner can use the index on a range.
+        """
+        clauses = Q()
+        equal = {}
+        for field, key in zip(ordering, keys):
+            name = field.lstrip('-')
+            after = field.startswith('-') == reverse
+            clauses |= Q(**equal, **{f'{name}__{"gt" if after else "lt"}': key})
+            equal[name] = key
+        first = ordering[0]
+        lead = 'gte' if first.startswith('-') == reverse else 'lte'
+        return Q(**{f'{first.lstrip("-")}__{lead}': keys[0]}) & clauses
+    
+    def sort_key(self, obj):
+        return [getattr(obj, field.lstrip('-')) for field in self.ordering]
+    
+    def encode_cursor(self, keys, reverse):
+        payload = json.dumps({'o': self.ordering, 'k': keys, 'r': int(reverse)}, cls=DjangoJSONEncoder)
+        token = b64encode(payload.encode(), altchars=b'-_').decode().rstrip('=')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, token)
+    
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(b64decode(token + '=' * (-len(token) % 4), altchars=b'-_'))
+            keys, reverse = payload['k'], bool(payload['r'])
+            valid = payload['o'] == self.ordering and isinstance(keys, list) and len(keys) == len(self.ordering)
+        except (TypeError, ValueError, KeyError):
+            valid = False
+        if not valid:
+            # Also raised when the ordering changed between pages.
+            raise NotFound(self.invalid_cursor_message)
+        return keys, reverse
+    
+    def get_next_link(self):
+        return None if self.next_keys is None else self.encode_cursor(self.next_keys, False)
+    
+    def get_previous_link(self):
+        return None if self.previous_keys is None else self.encode_cursor(self.previous_keys, True)
+    
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+    
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
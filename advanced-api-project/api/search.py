@@ -0,0 +1,185 @@
+"""
+Full-text search index for books (title and author name).
+
+Two backends, chosen by the database vendor:
+
+- SQLite: an FTS5 virtual table ``api_book_fts`` keyed by book id, with
+  prefix indexes for 2 and 3 character prefixes and BM25 ranking.
+- PostgreSQL: a table ``api_book_search`` holding a weighted ``tsvector`` per
+  book under a GIN index, ranked with ``ts_rank``.
+
+Every search term becomes a prefix query (``pot`` matches "Potter") and all
+terms must match, in either field. Matching books are selected by primary key
+from the index, and ``search_rank`` is annotated so that lower is better on
+both backends.
+
+The index is kept up to date by ``api.signals``. Set ``BOOK_SEARCH_BACKEND``
+to ``None`` to disable it; ``BookSearchFilter`` then falls back to ``icontains``.
+The index table itself is created by migration ``0003_book_search_index``
+whatever the setting.
+"""
+
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+from .models import Author, Book
+
+
+TOKEN = re.compile(r"\w+", re.UNICODE)
+INDEX_BATCH_SIZE = 1000
+
+
+class SQLiteFTSBackend:
+    vendor = 'sqlite'
+    create_sql = [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS api_book_fts USING fts5("
+        "title, author, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    ]
+    drop_sql = ["DROP TABLE IF EXISTS api_book_fts"]
+    clear_sql = "DELETE FROM api_book_fts"
+    populate_sql = (
+        "INSERT INTO api_book_fts (rowid, title, author) "
+        "SELECT b.id, b.title, a.name FROM api_book b JOIN api_author a ON a.id = b.author_id"
+    )
+    delete_sql = "DELETE FROM api_book_fts WHERE rowid = %s"
+    insert_sql = "INSERT INTO api_book_fts (rowid, title, author) VALUES (%s, %s, %s)"
+    match_sql = "SELECT rowid FROM api_book_fts WHERE api_book_fts MATCH %s"
+    # Title matches weigh twice as much as author matches; bm25 is negative, lower is better.
+    rank_sql = (
+        "SELECT bm25(api_book_fts, 10.0, 5.0) FROM api_book_fts "
+        "WHERE api_book_fts MATCH %s AND rowid = api_book.id"
+    )
+
+    def query(self, tokens):
+        return " AND ".join(f'"{token}"*' for token in tokens)
+
+    def upsert(self, cursor, rows):
+        cursor.executemany(self.delete_sql, [(pk,) for pk, _, _ in rows])
+        cursor.executemany(self.insert_sql, rows)
+
+
+class PostgresSearchBackend:
+    vendor = 'postgresql'
+    create_sql = [
+        "CREATE TABLE IF NOT EXISTS api_book_search ("
+        "book_id bigint PRIMARY KEY REFERENCES api_book (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+        "document tsvector NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS api_book_search_document ON api_book_search USING GIN (document)",
+    ]
+    drop_sql = ["DROP TABLE IF EXISTS api_book_search"]
+    clear_sql = "DELETE FROM api_book_search"
+    document_sql = "setweight(to_tsvector('simple', {title}), 'A') || setweight(to_tsvector('simple', {author}), 'B')"
+    populate_sql = (
+        "INSERT INTO api_book_search (book_id, document) "
+        f"SELECT b.id, {document_sql.format(title='b.title', author='a.name')} "
+        "FROM api_book b JOIN api_author a ON a.id = b.author_id"
+    )
+    delete_sql = "DELETE FROM api_book_search WHERE book_id = %s"
+    insert_sql = (
+        f"INSERT INTO api_book_search (book_id, document) VALUES (%s, {document_sql.format(title='%s', author='%s')}) "
+        "ON CONFLICT (book_id) DO UPDATE SET document = EXCLUDED.document"
+    )
+    match_sql = "SELECT book_id FROM api_book_search WHERE document @@ to_tsquery('simple', %s)"
+    rank_sql = (
+        "SELECT -ts_rank(document, to_tsquery('simple', %s)) FROM api_book_search "
+        "WHERE book_id = api_book.id"
+    )
+
+    def query(self, tokens):
+        return " & ".join(f"{token}:*" for token in tokens)
+
+    def upsert(self, cursor, rows):
+        cursor.executemany(self.insert_sql, rows)
+
+
+BACKENDS = {
+    'sqlite': SQLiteFTSBackend(),
+    'postgresql': PostgresSearchBackend(),
+}
+
+
+def get_backend(using='default', vendor=None):
+    """
+    The search backend for database ``using``, or None when search is disabled
+    or the database has no backend.
+    """
+    setting = getattr(settings, 'BOOK_SEARCH_BACKEND', 'auto')
+    if setting is None:
+        return None
+    if setting == 'auto':
+        setting = vendor or connections[using].vendor
+    return BACKENDS.get(setting)
+
+
+def tokenize(terms):
+    """Lowercased word tokens from DRF search terms; punctuation is dropped."""
+    return [token.lower() for term in terms for token in TOKEN.findall(term)]
+
+
+def search(queryset, terms):
+    """
+    Restrict ``queryset`` to books matching every term, annotated with ``search_rank``.
+
+    Returns None when there is no index for the queryset's database.
+    """
+    backend = get_backend(queryset.db)
+    if backend is None:
+        return None
+    tokens = tokenize(terms)
+    if not tokens:
+        return queryset
+    query = backend.query(tokens)
+    return queryset.filter(pk__in=RawSQL(backend.match_sql, [query])).annotate(
+        search_rank=RawSQL(backend.rank_sql, [query])
+    )
+
+
+def index_books(books, using='default'):
+    """Add or refresh ``books`` (Book instances) in the index."""
+    backend = get_backend(using)
+    books = list(books)
+    if backend is None or not books:
+        return
+    names = dict(
+        Author.objects.using(using).filter(pk__in={book.author_id for book in books}).values_list('pk', 'name')
+    )
+    rows = [(book.pk, book.title, names.get(book.author_id, '')) for book in books]
+    with connections[using].cursor() as cursor:
+        for start in range(0, len(rows), INDEX_BATCH_SIZE):
+            backend.upsert(cursor, rows[start:start + INDEX_BATCH_SIZE])
+
+
+def index_author_books(author, using='default'):
+    """Refresh every book by ``author``, e.g. after a rename."""
+    books = Book.objects.using(using).filter(author=author).only('id', 'title', 'author_id').order_by()
+    batch = []
+    for book in books.iterator(chunk_size=INDEX_BATCH_SIZE):
+        batch.append(book)
+        if len(batch) >= INDEX_BATCH_SIZE:
+            index_books(batch, using)
+            batch = []
+    index_books(batch, using)
+
+
+def unindex_books(pks, using='default'):
+    backend = get_backend(using)
+    pks = list(pks)
+    if backend is None or not pks:
+        return
+    with connections[using].cursor() as cursor:
+        cursor.executemany(backend.delete_sql, [(pk,) for pk in pks])
+
+
+def rebuild_index(using='default'):
+    """Recreate the index from the books table."""
+    backend = get_backend(using)
+    if backend is None:
+        return
+    with connections[using].cursor() as cursor:
+        for sql in backend.create_sql:
+            cursor.execute(sql)
+        cursor.execute(backend.clear_sql)
+        cursor.execute(backend.populate_sql)
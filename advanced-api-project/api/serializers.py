@@ -3,7 +3,59 @@ from django.utils import timezone
 from .models import Author, Book
 
 
-class BookSerializer(serializers.ModelSerializer):
+def check_publication_year(value, current_year=None):
+    """
+    Raise a ValidationError if ``value`` is in the future.
+    
+    Bulk validation passes ``current_year`` once instead of reading the clock per item.
+    """
+    current_year = current_year or timezone.now().year
+    if value > current_year:
+        raise serializers.ValidationError(
+            f"Publication year cannot be in the future. Current year is {current_year}."
+        )
+    return value
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin for sparse fieldsets and expandable relations.
+    
+    ``fields`` (a list of names, or None for all) keeps only those fields, and
+    ``expand`` replaces each named relation with the serializer returned by
+    ``get_expanded_field``. Both are passed by ``api.views.SparseFieldsViewMixin``
+    from ``?fields=`` and ``?expand=``. Expanded relations are always included.
+    
+    ``expandable_fields`` maps each expandable name to ``(serializer_class, kwargs)``.
+    """
+    expandable_fields = {}
+    
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in expand:
+            self.fields[name] = self.get_expanded_field(name)
+        if fields is not None:
+            for name in set(self.fields) - set(fields) - set(expand):
+                self.fields.pop(name)
+    
+    def get_expanded_field(self, name):
+        """A new instance of the serializer declared for ``name`` in ``expandable_fields``."""
+        serializer_class, kwargs = self.expandable_fields[name]
+        return serializer_class(**kwargs)
+
+
+class AuthorSummarySerializer(serializers.ModelSerializer):
+    """
+    Author without their books, used when a book's author is expanded.
+    """
+    
+    class Meta:
+        model = Author
+        fields = ['id', 'name']
+        read_only_fields = ['id']
+
+
+class BookSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     BookSerializer handles serialization and deserialization of Book instances.
     
@@ -12,6 +64,9 @@ class BookSerializer(serializers.ModelSerializer):
     The serializer also handles the foreign key relationship with Author.
     """
     
+    # ?expand=author embeds the author's id and name instead of the bare id.
+    expandable_fields = {'author': (AuthorSummarySerializer, {'read_only': True})}
+    
     class Meta:
         model = Book
         fields = ['id', 'title', 'publication_year', 'author']
@@ -30,15 +85,10 @@ class BookSerializer(serializers.ModelSerializer):
         Raises:
             serializers.ValidationError: If the publication year is in the future
         """
-        current_year = timezone.now().year
-        if value > current_year:
-            raise serializers.ValidationError(
-                f"Publication year cannot be in the future. Current year is {current_year}."
-            )
-        return value
+        return check_publication_year(value)
 
 
-class AuthorSerializer(serializers.ModelSerializer):
+class AuthorSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     AuthorSerializer handles serialization and deserialization of Author instances.
     
@@ -46,7 +96,10 @@ class AuthorSerializer(serializers.ModelSerializer):
     to serialize all related books. The nested relationship allows for complete
     author data including their books to be serialized in a single response.
     """
-    books = BookSerializer(many=True, read_only=True)
+    books = BookSerializer(many=True, read_only=True, source='book_list')
+    # ?expand=books keeps the nested books when ?fields= leaves them out,
+    # e.g. ?fields=name&expand=books.
+    expandable_fields = {'books': (BookSerializer, {'many': True, 'read_only': True, 'source': 'book_list'})}
     
     class Meta:
         model = Author
@@ -63,3 +116,83 @@ class AuthorSerializer(serializers.ModelSerializer):
         data = super().to_representation(instance)
         # The books field is automatically handled by the nested BookSerializer
         return data
+
+
+class AuthorStatsSerializer(serializers.ModelSerializer):
+    """
+    Author with aggregate figures about their books instead of the books themselves.
+    
+    Expects the annotations added by ``api.views.authors_with_stats``.
+    """
+    book_count = serializers.IntegerField(read_only=True)
+    first_publication_year = serializers.IntegerField(read_only=True, allow_null=True)
+    last_publication_year = serializers.IntegerField(read_only=True, allow_null=True)
+    
+    class Meta:
+        model = Author
+        fields = ['id', 'name', 'book_count', 'first_publication_year', 'last_publication_year']
+        read_only_fields = ['id']
+
+
+class BookBulkItemSerializer(serializers.Serializer):
+    """
+    Field-level validation for one item of a bulk Book request.
+    
+    ``author`` is a plain integer here: author existence is checked for the
+    whole batch at once by ``validate_bulk_books`` instead of one query per item.
+    """
+    id = serializers.IntegerField(required=False)
+    title = serializers.CharField(max_length=200)
+    publication_year = serializers.IntegerField()
+    author = serializers.IntegerField()
+
+
+def validate_bulk_books(items, partial=False, require_id=False):
+    """
+    Validate a list of Book payloads in one pass.
+    
+    Args:
+        items (list): Raw payloads from the request
+        partial (bool): Allow missing fields (bulk update)
+        require_id (bool): Require an ``id`` on every item (bulk update);
+            otherwise an ``id`` is an error, the database assigns it (bulk create)
+        
+    Returns:
+        tuple: ``(valid, errors)`` where ``valid`` is a list of
+        ``(index, validated_data)`` with ``author`` resolved to an Author
+        instance, and ``errors`` maps item index to its field errors.
+    """
+    current_year = timezone.now().year
+    valid, errors = [], {}
+    for index, item in enumerate(items):
+        serializer = BookBulkItemSerializer(data=item, partial=partial)
+        if not serializer.is_valid():
+            errors[index] = serializer.errors
+            continue
+        data = serializer.validated_data
+        if require_id and 'id' not in data:
+            errors[index] = {'id': ['This field is required.']}
+            continue
+        if not require_id and 'id' in data:
+            errors[index] = {'id': ['Book ids are assigned by the server; leave this field out.']}
+            continue
+        if 'publication_year' in data:
+            try:
+                check_publication_year(data['publication_year'], current_year)
+            except serializers.ValidationError as exc:
+                errors[index] = {'publication_year': exc.detail}
+                continue
+        valid.append((index, data))
+    
+    # One query for every referenced author.
+    authors = Author.objects.in_bulk({data['author'] for _, data in valid if 'author' in data})
+    resolved = []
+    for index, data in valid:
+        if 'author' in data:
+            author = authors.get(data['author'])
+            if author is None:
+                errors[index] = {'author': [f'Invalid pk "{data["author"]}" - object does not exist.']}
+                continue
+            data['author'] = author
+        resolved.append((index, data))
+    return resolved, errors
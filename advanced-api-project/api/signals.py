@@ -0,0 +1,98 @@
+"""
+Keep derived data (facet table, search index, autocomplete, catalog
+generation) in step with books and authors.
+
+Bulk writes skip ``save()`` and its signals, so the bulk endpoint and importers
+send ``books_bulk_changed`` instead:
+
+    books_bulk_changed.send(sender=Book, created=books, updated=books, previous=previous)
+
+``previous`` maps the pk of each updated book to its
+``(author_id, publication_year, title)`` before the update.
+"""
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from .autocomplete import AUTOCOMPLETE
+from .cache import bump_catalog_generation
+from .facets import update_facets
+from .models import Author, Book
+from .search import index_author_books, index_books, unindex_books
+
+
+books_bulk_changed = Signal()
+
+
+def facet_key(book):
+    return (book.author_id, book.publication_year)
+
+
+@receiver(pre_save, sender=Book)
+def remember_previous_book(sender, instance, raw=False, **kwargs):
+    instance._previous_values = None
+    if instance.pk is not None and not instance._state.adding and not raw:
+        instance._previous_values = (
+            Book.objects.filter(pk=instance.pk).values_list('author_id', 'publication_year', 'title').first()
+        )
+
+
+@receiver(post_save, sender=Book)
+def book_saved(sender, instance, created, raw=False, using='default', **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_values', None)
+    if previous is None or previous[:2] != facet_key(instance):
+        update_facets(added=[facet_key(instance)], removed=[previous[:2]] if previous else [])
+    if previous is None or (previous[0], previous[2]) != (instance.author_id, instance.title):
+        if previous:
+            AUTOCOMPLETE.book_removed(previous[2], previous[0])
+        AUTOCOMPLETE.book_added(instance.title, instance.author_id)
+    index_books([instance], using)
+    bump_catalog_generation()
+
+
+@receiver(post_delete, sender=Book)
+def book_deleted(sender, instance, using='default', **kwargs):
+    update_facets(removed=[facet_key(instance)])
+    unindex_books([instance.pk], using)
+    AUTOCOMPLETE.book_removed(instance.title, instance.author_id)
+    bump_catalog_generation()
+
+
+@receiver(post_save, sender=Author)
+def author_saved(sender, instance, created, raw=False, using='default', **kwargs):
+    if not created and not raw:
+        # The author's name is indexed with each of their books.
+        index_author_books(instance, using)
+    AUTOCOMPLETE.author_saved(instance.pk, instance.name)
+    bump_catalog_generation()
+
+
+@receiver(post_delete, sender=Author)
+def author_deleted(sender, instance, **kwargs):
+    AUTOCOMPLETE.author_removed(instance.pk)
+    bump_catalog_generation()
+
+
+@receiver(books_bulk_changed, sender=Book)
+def books_bulk_changed_handler(sender, created=(), updated=(), previous=None, **kwargs):
+    previous = previous or {}
+    added = [facet_key(book) for book in created]
+    removed = []
+    for book in created:
+        AUTOCOMPLETE.book_added(book.title, book.author_id)
+    for book in updated:
+        old = previous.get(book.pk)
+        if old is None or old[:2] != facet_key(book):
+            added.append(facet_key(book))
+            if old:
+                removed.append(old[:2])
+        if old is None or (old[0], old[2]) != (book.author_id, book.title):
+            if old:
+                AUTOCOMPLETE.book_removed(old[2], old[0])
+            AUTOCOMPLETE.book_added(book.title, book.author_id)
+    if added or removed:
+        update_facets(added=added, removed=removed)
+    index_books(list(created) + list(updated))
+    bump_catalog_generation()
@@ -1,9 +1,20 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 from django.contrib.auth.models import User
 
-from .models import Author, Book
+from .autocomplete import AUTOCOMPLETE, PrefixIndex, SCAN_LIMIT
+from .facets import rebuild_facets
+from .models import Author, Book, BookFacet
+from .search import rebuild_index
 
 
 class BookAPITests(APITestCase):
@@ -147,3 +158,597 @@ class BookAPITests(APITestCase):
         self.assertEqual(years, sorted(years, reverse=True))
 
 
+class AuthorListQueryTests(APITestCase):
+    """
+    The author listing must not issue one query per author (N+1).
+    """
+
+    def setUp(self):
+        self.author_list_url = reverse("author-list")
+
+    def create_authors(self, count, books_each=3):
+        for i in range(count):
+            author = Author.objects.create(name=f"Author {i:03d}")
+            for j in range(books_each):
+                Book.objects.create(title=f"Book {j} by {i}", publication_year=1990 + j, author=author)
+
+    def test_constant_number_of_queries(self):
+        self.create_authors(3)
+        # count + page of authors + one prefetch for all their books
+        with self.assertNumQueries(3):
+            response = self.client.get(self.author_list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.create_authors(15)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.author_list_url)
+        self.assertEqual(response.data["count"], 18)
+        self.assertEqual(len(response.data["results"][0]["books"]), 3)
+
+    def test_books_are_ordered_and_limited(self):
+        self.create_authors(2, books_each=5)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.author_list_url + "?books_limit=2")
+        books = response.data["results"][0]["books"]
+        self.assertEqual([b["title"] for b in books], ["Book 0 by 0", "Book 1 by 0"])
+        self.assertEqual(set(books[0]), {"id", "title", "publication_year", "author"})
+
+    def test_invalid_books_limit(self):
+        response = self.client.get(self.author_list_url + "?books_limit=-1")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_pagination(self):
+        self.create_authors(25, books_each=0)
+        response = self.client.get(self.author_list_url)
+        self.assertEqual(len(response.data["results"]), 20)
+        self.assertIsNotNone(response.data["next"])
+
+
+class BookBulkTests(APITestCase):
+    """
+    Tests for the bulk Book endpoint:
+    - per-item errors with partial success, and atomic mode
+    - bulk update and delete
+    - query count independent of batch size
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="bulkuser", password="password123")
+        self.client.force_authenticate(user=self.user)
+        self.author = Author.objects.create(name="Author A")
+        self.other = Author.objects.create(name="Author B")
+        self.url = reverse("book-bulk")
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.post(self.url, [], format="json")
+        self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+
+    def test_create_reports_invalid_items(self):
+        payload = [
+            {"title": "Good", "publication_year": 2000, "author": self.author.id},
+            {"title": "Future", "publication_year": 9999, "author": self.author.id},
+            {"title": "Nobody", "publication_year": 2000, "author": 999999},
+        ]
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([b["title"] for b in response.data["created"]], ["Good"])
+        self.assertEqual([e["index"] for e in response.data["errors"]], [1, 2])
+        self.assertEqual(Book.objects.count(), 1)
+
+    def test_create_rejects_ids(self):
+        existing = Book.objects.create(title="Existing", publication_year=2000, author=self.author)
+        payload = [
+            {"id": existing.id, "title": "Clash", "publication_year": 2000, "author": self.author.id},
+            {"title": "New", "publication_year": 2000, "author": self.author.id},
+        ]
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data["errors"][0]["index"], 0)
+        self.assertIn("id", response.data["errors"][0]["errors"])
+        existing.refresh_from_db()
+        self.assertEqual(existing.title, "Existing")
+        self.assertEqual(Book.objects.count(), 2)
+
+    def test_atomic_create_writes_nothing_on_error(self):
+        payload = [
+            {"title": "Good", "publication_year": 2000, "author": self.author.id},
+            {"title": "", "publication_year": 2000, "author": self.author.id},
+        ]
+        response = self.client.post(self.url + "?atomic=true", payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Book.objects.count(), 0)
+
+    def test_create_query_count_is_constant(self):
+        def payload(n):
+            return [
+                {"title": f"Book {i}", "publication_year": 2000, "author": (self.author if i % 2 else self.other).id}
+                for i in range(n)
+            ]
+
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(self.url, payload(4), format="json")
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.post(self.url, payload(50), format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # Queries depend on distinct (author, year) pairs, not on the number of books.
+        self.assertLessEqual(len(large.captured_queries), len(small.captured_queries))
+        self.assertEqual(Book.objects.count(), 54)
+        self.assertTrue(all(b["id"] for b in response.data["created"]))
+
+    def test_update(self):
+        book1 = Book.objects.create(title="One", publication_year=2000, author=self.author)
+        book2 = Book.objects.create(title="Two", publication_year=2001, author=self.author)
+        payload = [
+            {"id": book1.id, "title": "One (revised)"},
+            {"id": book2.id, "author": self.other.id},
+            {"id": 999999, "title": "Missing"},
+            {"title": "No id"},
+        ]
+        response = self.client.patch(self.url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([e["index"] for e in response.data["errors"]], [2, 3])
+        book1.refresh_from_db()
+        book2.refresh_from_db()
+        self.assertEqual(book1.title, "One (revised)")
+        self.assertEqual(book2.author, self.other)
+
+    def test_delete(self):
+        books = [Book.objects.create(title=f"B{i}", publication_year=2000, author=self.author) for i in range(3)]
+        ids = [b.id for b in books[:2]]
+        response = self.client.delete(self.url, {"ids": ids + [999999]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data["deleted"], sorted(ids))
+        self.assertEqual(list(Book.objects.values_list("id", flat=True)), [books[2].id])
+
+        response = self.client.delete(self.url, {"ids": [True]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_atomic_delete_keeps_everything_on_error(self):
+        book = Book.objects.create(title="Keep", publication_year=2000, author=self.author)
+        response = self.client.delete(self.url + "?atomic=1", {"ids": [book.id, 999999]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(Book.objects.filter(pk=book.id).exists())
+
+
+class CatalogTransferTests(APITestCase):
+    """
+    Tests for streaming CSV/NDJSON export and import (endpoints and commands).
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="importer", password="password123")
+        self.author = Author.objects.create(name="Ursula K. Le Guin")
+        Book.objects.create(title="The Dispossessed", publication_year=1974, author=self.author)
+        Book.objects.create(title="A Wizard of Earthsea", publication_year=1968, author=self.author)
+        self.client.force_authenticate(user=self.user)
+
+    def streamed(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_export_csv(self):
+        response = self.client.get(reverse("book-export", kwargs={"fmt": "csv"}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        lines = self.streamed(response).splitlines()
+        self.assertEqual(lines[0], "id,title,publication_year,author_id,author")
+        self.assertEqual(len(lines), 3)
+        self.assertIn("The Dispossessed,1974", lines[1])
+
+    def test_export_ndjson(self):
+        response = self.client.get(reverse("author-export", kwargs={"fmt": "ndjson"}))
+        records = [json.loads(line) for line in self.streamed(response).splitlines()]
+        self.assertEqual(records, [{"id": self.author.id, "name": "Ursula K. Le Guin"}])
+
+    def test_export_unknown_format(self):
+        response = self.client.get(reverse("book-export", kwargs={"fmt": "xml"}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_export_requires_authentication(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.get(reverse("book-export", kwargs={"fmt": "csv"}))
+        self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+
+    def test_import_requires_authentication(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.post(reverse("book-import"), "title\n", content_type="text/csv")
+        self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+
+    def test_import_csv_resolves_and_creates_authors(self):
+        self.client.force_authenticate(user=self.user)
+        body = (
+            "title,publication_year,author\n"
+            "The Left Hand of Darkness,1969,Ursula K. Le Guin\n"
+            "Kindred,1979,Octavia E. Butler\n"
+            "Parable of the Sower,1993,Octavia E. Butler\n"
+            "Too Late,9999,Octavia E. Butler\n"
+            ",2000,Nobody\n"
+        )
+        response = self.client.post(reverse("book-import") + "?batch_size=2", body, content_type="text/csv")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 3)
+        self.assertEqual(response.data["authors_created"], 1)
+        self.assertEqual([e["line"] for e in response.data["errors"]], [5, 6])
+        self.assertEqual(Author.objects.filter(name="Octavia E. Butler").count(), 1)
+        self.assertEqual(self.author.books.count(), 3)
+
+    def test_import_ndjson_without_creating_authors(self):
+        self.client.force_authenticate(user=self.user)
+        body = "\n".join([
+            json.dumps({"title": "Lavinia", "publication_year": 2008, "author": "Ursula K. Le Guin"}),
+            json.dumps({"title": "Dawn", "publication_year": 1987, "author": "Octavia E. Butler"}),
+            "not json",
+        ])
+        response = self.client.post(
+            reverse("book-import") + "?create_authors=false", body, content_type="application/x-ndjson"
+        )
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual(response.data["failed"], 2)
+        self.assertFalse(Author.objects.filter(name="Octavia E. Butler").exists())
+
+    def test_import_unsupported_content_type(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(reverse("author-import"), {"name": "X"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+    def test_commands_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "books.ndjson")
+            call_command("export_catalog", "books", output=path, stderr=StringIO())
+            Book.objects.all().delete()
+            Author.objects.all().delete()
+            call_command("import_catalog", "books", path, batch_size=1, stdout=StringIO())
+        self.assertEqual(
+            sorted(Book.objects.values_list("title", "publication_year", "author__name")),
+            [("A Wizard of Earthsea", 1968, "Ursula K. Le Guin"), ("The Dispossessed", 1974, "Ursula K. Le Guin")],
+        )
+
+
+class BookFacetTests(APITestCase):
+    """
+    Tests for the facets endpoint and the facet table it reads.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="faceter", password="password123")
+        self.rowling = Author.objects.create(name="J.K. Rowling")
+        self.orwell = Author.objects.create(name="George Orwell")
+        self.hp1 = Book.objects.create(title="Philosopher's Stone", publication_year=1997, author=self.rowling)
+        Book.objects.create(title="Chamber of Secrets", publication_year=1998, author=self.rowling)
+        Book.objects.create(title="1984", publication_year=1949, author=self.orwell)
+        Book.objects.create(title="Animal Farm", publication_year=1945, author=self.orwell)
+        Book.objects.create(title="Homage to Catalonia", publication_year=1938, author=self.orwell)
+        self.url = reverse("book-facets")
+
+    def facet_rows(self):
+        return set(BookFacet.objects.values_list("author_id", "publication_year", "count"))
+
+    def test_unfiltered_counts(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total"], 5)
+        self.assertEqual(
+            [(a["name"], a["count"]) for a in response.data["author"]],
+            [("George Orwell", 3), ("J.K. Rowling", 2)],
+        )
+        self.assertEqual(response.data["publication_year"][0], {"value": 1938, "count": 1})
+
+    def test_table_filters_do_not_touch_books(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(
+                self.url, {"author": self.rowling.id, "cursor": "abc", "page_size": 2, "fields": "title", "expand": "author"}
+            )
+        self.assertEqual(response.data["total"], 2)
+        self.assertEqual([y["value"] for y in response.data["publication_year"]], [1997, 1998])
+        self.assertFalse(any('"api_book"' in q["sql"] for q in ctx.captured_queries))
+
+    def test_search_filter_falls_back_to_books(self):
+        response = self.client.get(self.url, {"search": "Chamber"})
+        self.assertEqual(response.data["total"], 1)
+        self.assertEqual(response.data["author"][0]["value"], self.rowling.id)
+
+    def test_invalid_filter_value(self):
+        response = self.client.get(self.url, {"publication_year": "abc"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_table_follows_save_and_delete(self):
+        self.hp1.publication_year = 1998
+        self.hp1.save()
+        Book.objects.filter(title="1984").delete()
+        Book.objects.create(title="Burmese Days", publication_year=1934, author=self.orwell)
+        expected = self.facet_rows()
+        rebuild_facets()
+        self.assertEqual(self.facet_rows(), expected)
+        self.assertIn((self.rowling.id, 1998, 2), expected)
+        self.assertNotIn(self.rowling.id, [a for a, y, c in expected if y == 1997])
+
+    def test_table_follows_bulk_endpoint(self):
+        self.client.force_authenticate(user=self.user)
+        self.client.post(
+            reverse("book-bulk"),
+            [{"title": "Down and Out", "publication_year": 1933, "author": self.orwell.id}],
+            format="json",
+        )
+        self.client.patch(
+            reverse("book-bulk"), [{"id": self.hp1.id, "author": self.orwell.id}], format="json"
+        )
+        expected = self.facet_rows()
+        rebuild_facets()
+        self.assertEqual(self.facet_rows(), expected)
+
+    def test_fallback_cache_is_invalidated_by_writes(self):
+        self.assertEqual(self.client.get(self.url, {"search": "Farm"}).data["total"], 1)
+        Book.objects.create(title="Another Farm", publication_year=2000, author=self.rowling)
+        self.assertEqual(self.client.get(self.url, {"search": "Farm"}).data["total"], 2)
+
+
+class BookSearchTests(APITestCase):
+    """
+    Tests for full-text search through BookListView's SearchFilter.
+    """
+
+    def setUp(self):
+        self.tolkien = Author.objects.create(name="J.R.R. Tolkien")
+        self.le_guin = Author.objects.create(name="Ursula K. Le Guin")
+        self.hobbit = Book.objects.create(title="The Hobbit", publication_year=1937, author=self.tolkien)
+        self.rings = Book.objects.create(title="The Fellowship of the Ring", publication_year=1954, author=self.tolkien)
+        self.earthsea = Book.objects.create(title="A Wizard of Earthsea", publication_year=1968, author=self.le_guin)
+        self.url = reverse("book-list")
+
+    def titles(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [book["title"] for book in response.data]
+
+    def test_prefix_matching(self):
+        self.assertEqual(self.titles(search="hob"), ["The Hobbit"])
+        self.assertEqual(self.titles(search="tolk fellow"), ["The Fellowship of the Ring"])
+
+    def test_ranks_title_matches_first(self):
+        Book.objects.create(title="Tolkien: A Biography", publication_year=1977, author=self.le_guin)
+        self.assertEqual(self.titles(search="tolkien")[0], "Tolkien: A Biography")
+
+    def test_explicit_ordering_wins(self):
+        self.assertEqual(self.titles(search="tolkien", ordering="-publication_year"), ["The Fellowship of the Ring", "The Hobbit"])
+
+    def test_index_follows_writes(self):
+        self.hobbit.title = "There and Back Again"
+        self.hobbit.save()
+        self.assertEqual(self.titles(search="hobbit"), [])
+        self.assertEqual(self.titles(search="back again"), ["There and Back Again"])
+
+        self.le_guin.name = "Ursula Le Guin"
+        self.le_guin.save()
+        self.assertEqual(self.titles(search="ursula"), ["A Wizard of Earthsea"])
+
+        self.earthsea.delete()
+        self.assertEqual(self.titles(search="ursula"), [])
+
+    def test_index_follows_bulk_create(self):
+        user = User.objects.create_user(username="searcher", password="password123")
+        self.client.force_authenticate(user=user)
+        self.client.post(
+            reverse("book-bulk"),
+            [{"title": "The Silmarillion", "publication_year": 1977, "author": self.tolkien.id}],
+            format="json",
+        )
+        self.assertEqual(self.titles(search="silma"), ["The Silmarillion"])
+
+    def test_rebuild(self):
+        rebuild_index()
+        self.assertEqual(self.titles(search="earth"), ["A Wizard of Earthsea"])
+
+    def test_punctuation_only_search(self):
+        self.assertEqual(len(self.titles(search='"*')), 3)
+
+
+class AutocompleteTests(APITestCase):
+    """
+    Tests for the in-memory typeahead index and endpoint.
+    """
+
+    def setUp(self):
+        self.herbert = Author.objects.create(name="Frank Herbert")
+        self.heinlein = Author.objects.create(name="Robert A. Heinlein")
+        Book.objects.create(title="Dune", publication_year=1965, author=self.herbert)
+        Book.objects.create(title="Dune Messiah", publication_year=1969, author=self.herbert)
+        Book.objects.create(title="Dune", publication_year=2000, author=self.heinlein)
+        Book.objects.create(title="Stranger in a Strange Land", publication_year=1961, author=self.heinlein)
+        AUTOCOMPLETE.build()
+        self.url = reverse("autocomplete")
+
+    def suggest(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_ranked_by_popularity(self):
+        data = self.suggest(q="du")
+        self.assertEqual(data["titles"], [{"title": "Dune", "books": 2}, {"title": "Dune Messiah", "books": 1}])
+
+    def test_matches_word_starts_and_ignores_accents(self):
+        self.assertEqual([t["title"] for t in self.suggest(q="stráng", type="title")["titles"]], ["Stranger in a Strange Land"])
+        self.assertEqual([a["name"] for a in self.suggest(q="hein", type="author")["authors"]], ["Robert A. Heinlein"])
+
+    def test_answers_without_queries(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(self.suggest(q="frank")["authors"][0]["id"], self.herbert.id)
+
+    def test_follows_writes(self):
+        book = Book.objects.create(title="Children of Dune", publication_year=1976, author=self.herbert)
+        self.assertEqual(self.suggest(q="children")["titles"], [{"title": "Children of Dune", "books": 1}])
+        self.assertEqual(self.suggest(q="frank")["authors"][0]["books"], 3)
+
+        book.title = "God Emperor of Dune"
+        book.save()
+        self.assertEqual(self.suggest(q="children")["titles"], [])
+
+        self.heinlein.name = "R. A. Heinlein"
+        self.heinlein.save()
+        self.assertEqual(self.suggest(q="robert")["authors"], [])
+
+        self.herbert.delete()
+        self.assertEqual(self.suggest(q="dune")["titles"], [{"title": "Dune", "books": 1}])
+        self.assertEqual(self.suggest(q="frank")["authors"], [])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get(self.url, {"q": "d", "limit": "0"}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {"q": "d", "type": "isbn"}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_broad_prefixes_are_memoized_and_invalidated(self):
+        index = PrefixIndex((i, f"a{i}", f"a{i}", i % 7) for i in range(SCAN_LIMIT * 2))
+        top = index.search("a", 3)
+        self.assertEqual([score for _, _, score in top], [6, 6, 6])
+        self.assertIn("a", index._top)
+        index.adjust(5, 100)
+        self.assertEqual(index.search("a", 1)[0][0], 5)
+
+
+class BookKeysetPaginationTests(APITestCase):
+    """
+    Tests for ordering-aware keyset pagination on BookListView.
+    """
+
+    def setUp(self):
+        authors = [Author.objects.create(name=f"Author {i}") for i in range(3)]
+        # Repeated titles and years exercise the id tiebreaker.
+        for i in range(23):
+            Book.objects.create(title=f"Title {i % 5}", publication_year=1990 + i % 4, author=authors[i % 3])
+        self.url = reverse("book-list")
+
+    def walk(self, url, direction="next"):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            page = [book["id"] for book in response.data["results"]]
+            ids = page + ids if direction == "previous" else ids + page
+            url = response.data[direction]
+        return ids, response
+
+    def test_pages_follow_every_ordering(self):
+        for ordering in ["title", "-title", "publication_year", "-publication_year", "id", "-id"]:
+            with self.subTest(ordering=ordering):
+                field = ordering.lstrip("-")
+                tiebreak = [] if field == "id" else ["pk"]
+                expected = list(Book.objects.order_by(ordering, *tiebreak).values_list("id", flat=True))
+                ids, _ = self.walk(f"{self.url}?ordering={ordering}&page_size=4")
+                self.assertEqual(ids, expected)
+
+    def test_previous_links_walk_back(self):
+        ids, last = self.walk(f"{self.url}?ordering=-publication_year&page_size=5")
+        back, first = self.walk(last.data["previous"], direction="previous")
+        self.assertEqual(back + [b["id"] for b in last.data["results"]], ids)
+        self.assertIsNone(first.data["previous"])
+
+    def test_no_offset_in_sql(self):
+        response = self.client.get(f"{self.url}?ordering=title&page_size=5")
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(response.data["next"])
+        self.assertNotIn("OFFSET", ctx.captured_queries[-1]["sql"])
+
+    def test_invalid_or_mismatched_cursor(self):
+        self.assertEqual(self.client.get(f"{self.url}?cursor=garbage").status_code, status.HTTP_404_NOT_FOUND)
+        next_url = self.client.get(f"{self.url}?ordering=title&page_size=5").data["next"]
+        mismatched = next_url.replace("ordering=title", "ordering=publication_year")
+        self.assertEqual(self.client.get(mismatched).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_unpaginated_by_default(self):
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data), 23)
+
+
+class AuthorStatsTests(APITestCase):
+    """
+    Tests for /authors/stats/ and ?fields=stats on the author listing.
+    """
+
+    def setUp(self):
+        self.austen = Author.objects.create(name="Jane Austen")
+        self.bronte = Author.objects.create(name="Emily Bronte")
+        Author.objects.create(name="Unpublished")
+        Book.objects.create(title="Sense and Sensibility", publication_year=1811, author=self.austen)
+        Book.objects.create(title="Emma", publication_year=1815, author=self.austen)
+        Book.objects.create(title="Wuthering Heights", publication_year=1847, author=self.bronte)
+
+    def test_stats_endpoint(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("author-stats"))
+        self.assertEqual(response.data["totals"], {
+            "authors": 3, "books": 3, "first_publication_year": 1811, "last_publication_year": 1847,
+        })
+        austen = next(a for a in response.data["authors"] if a["id"] == self.austen.id)
+        self.assertEqual(
+            (austen["book_count"], austen["first_publication_year"], austen["last_publication_year"]),
+            (2, 1811, 1815),
+        )
+        unpublished = next(a for a in response.data["authors"] if a["name"] == "Unpublished")
+        self.assertEqual(unpublished["book_count"], 0)
+        self.assertIsNone(unpublished["first_publication_year"])
+
+    def test_stats_are_cached_until_a_write(self):
+        self.client.get(reverse("author-stats"))
+        with self.assertNumQueries(0):
+            self.client.get(reverse("author-stats"))
+        Book.objects.create(title="Persuasion", publication_year=1817, author=self.austen)
+        response = self.client.get(reverse("author-stats"))
+        self.assertEqual(response.data["totals"]["last_publication_year"], 1847)
+        self.assertEqual(response.data["totals"]["books"], 4)
+
+    def test_author_list_stats_mode(self):
+        url = reverse("author-list")
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {"fields": "stats"})
+        first = response.data["results"][0]
+        self.assertEqual(first, {
+            "id": self.bronte.id, "name": "Emily Bronte", "book_count": 1,
+            "first_publication_year": 1847, "last_publication_year": 1847,
+        })
+        with self.assertNumQueries(0):
+            self.client.get(url, {"fields": "stats"})
+
+
+class SparseFieldsTests(APITestCase):
+    """
+    Tests for ?fields= and ?expand= on the Book and Author views.
+    """
+
+    def setUp(self):
+        self.author = Author.objects.create(name="Mary Shelley")
+        self.book = Book.objects.create(title="Frankenstein", publication_year=1818, author=self.author)
+        Book.objects.create(title="The Last Man", publication_year=1826, author=self.author)
+
+    def test_book_sparse_fields(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("book-list"), {"fields": "id,title"})
+        self.assertEqual(response.data[0], {"id": self.book.id, "title": "Frankenstein"})
+        sql = ctx.captured_queries[-1]["sql"]
+        self.assertNotIn("publication_year", sql.split("FROM")[0])
+
+    def test_book_expand_author_joins_once(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("book-list"), {"expand": "author"})
+        self.assertEqual(response.data[0]["author"], {"id": self.author.id, "name": "Mary Shelley"})
+
+        response = self.client.get(reverse("book-detail", kwargs={"pk": self.book.id}), {"fields": "title", "expand": "author"})
+        self.assertEqual(response.data, {"title": "Frankenstein", "author": {"id": self.author.id, "name": "Mary Shelley"}})
+
+    def test_sparse_fields_with_keyset_pagination(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("book-list"), {"fields": "id", "ordering": "-publication_year", "page_size": 1})
+        self.assertEqual(response.data["results"], [{"id": Book.objects.get(title="The Last Man").id}])
+
+    def test_author_without_books_skips_prefetch(self):
+        with self.assertNumQueries(2):  # count + page
+            response = self.client.get(reverse("author-list"), {"fields": "id,name"})
+        self.assertEqual(response.data["results"], [{"id": self.author.id, "name": "Mary Shelley"}])
+
+    def test_author_expand_books(self):
+        response = self.client.get(reverse("author-detail", kwargs={"pk": self.author.id}), {"fields": "name", "expand": "books"})
+        self.assertEqual(response.data["name"], "Mary Shelley")
+        self.assertEqual([b["title"] for b in response.data["books"]], ["Frankenstein", "The Last Man"])
+        self.assertNotIn("id", response.data)
+
+    def test_unknown_names_are_rejected(self):
+        self.assertEqual(self.client.get(reverse("book-list"), {"fields": "isbn"}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(reverse("author-list"), {"expand": "author"}).status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,258 @@
+"""
+Streaming CSV/NDJSON import and export for books and authors.
+
+Exports read the table in primary-key order with ``iterator(chunk_size=...)``
+and yield one encoded line at a time, so neither the queryset nor the output is
+ever held in memory. Imports consume any iterable of text lines (an open file,
+or a request body read line by line), validate each row, resolve authors by
+name through an in-memory ``name -> id`` map and write with ``bulk_create`` in
+batches. Memory therefore depends on the batch size and the number of distinct
+authors, not on the number of rows.
+
+Formats:
+- ``csv``: header row, then one row per record.
+- ``ndjson``: one JSON object per line.
+
+Columns:
+- books: ``id, title, publication_year, author_id, author`` (author is the name)
+- authors: ``id, name``
+"""
+
+import csv
+import json
+
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import bump_catalog_generation
+from .models import Author, Book
+from .signals import books_bulk_changed
+
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+EXPORT_FIELDS = {
+    'books': ['id', 'title', 'publication_year', 'author_id', 'author'],
+    'authors': ['id', 'name'],
+}
+
+DEFAULT_CHUNK_SIZE = 2000
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+
+class _Echo:
+    """File-like object whose ``write`` returns the value, for ``csv.writer``."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(kind, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield export rows as tuples in ``EXPORT_FIELDS[kind]`` order.
+
+    Rows come in primary-key order rather than the models' default ordering,
+    so the database walks the primary key index instead of sorting the table.
+    """
+    if kind == 'books':
+        queryset = Book.objects.order_by('pk').values_list(
+            'id', 'title', 'publication_year', 'author_id', 'author__name'
+        )
+    elif kind == 'authors':
+        queryset = Author.objects.order_by('pk').values_list('id', 'name')
+    else:
+        raise ValueError(f"Unknown export kind: {kind}")
+    return queryset.iterator(chunk_size=chunk_size)
+
+
+def render(kind, fmt, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the encoded export of ``kind`` line by line."""
+    fields = EXPORT_FIELDS[kind]
+    rows = export_rows(kind, chunk_size)
+    if fmt == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow(row)
+    elif fmt == 'ndjson':
+        for row in rows:
+            yield json.dumps(dict(zip(fields, row)), ensure_ascii=False) + '\n'
+    else:
+        raise ValueError(f"Unknown format: {fmt}")
+
+
+def parse(lines, fmt):
+    """
+    Yield ``(line_number, record)`` pairs from an iterable of text lines.
+
+    Records are dicts; malformed NDJSON lines yield ``(line_number, None)``.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+    elif fmt == 'ndjson':
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield line_number, None
+                continue
+            yield line_number, record if isinstance(record, dict) else None
+    else:
+        raise ValueError(f"Unknown format: {fmt}")
+
+
+class ImportResult:
+    """Counts and the first ``MAX_REPORTED_ERRORS`` errors of an import."""
+
+    def __init__(self):
+        self.created = 0
+        self.authors_created = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line_number, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line_number, 'error': message})
+
+    def as_dict(self):
+        return {
+            'created': self.created,
+            'authors_created': self.authors_created,
+            'failed': self.failed,
+            'errors': self.errors,
+        }
+
+
+def _author_map():
+    """``name -> id`` for every author; the lowest id wins for duplicate names."""
+    authors = {}
+    for pk, name in Author.objects.order_by('-pk').values_list('pk', 'name').iterator(chunk_size=DEFAULT_CHUNK_SIZE):
+        authors[name] = pk
+    return authors
+
+
+def _clean_name(value, max_length):
+    name = str(value or '').strip()
+    if not name:
+        raise ValueError('must not be empty')
+    if len(name) > max_length:
+        raise ValueError(f'must be at most {max_length} characters')
+    return name
+
+
+def _create_authors(names, authors, result):
+    """Create the authors in ``names`` missing from ``authors`` and add them to the map."""
+    missing = [Author(name=name) for name in dict.fromkeys(names) if name not in authors]
+    if missing:
+        # bulk_create sets primary keys on SQLite and PostgreSQL.
+        for author in Author.objects.bulk_create(missing):
+            authors[author.name] = author.pk
+        result.authors_created += len(missing)
+        bump_catalog_generation()
+
+
+def import_books(lines, fmt, batch_size=DEFAULT_BATCH_SIZE, create_authors=True):
+    """
+    Import books from ``lines``; each record needs ``title``,
+    ``publication_year`` and ``author`` (the author's name).
+
+    Unknown authors are created when ``create_authors`` is True and reported
+    as errors otherwise. Each batch is written in its own transaction.
+    """
+    result = ImportResult()
+    authors = _author_map()
+    current_year = timezone.now().year
+    batch = []
+
+    def flush():
+        with transaction.atomic():
+            if create_authors:
+                _create_authors([name for name, _ in batch], authors, result)
+            books = Book.objects.bulk_create(
+                [Book(author_id=authors[name], **fields) for name, fields in batch],
+                batch_size=batch_size,
+            )
+            books_bulk_changed.send(sender=Book, created=books)
+        result.created += len(batch)
+        batch.clear()
+
+    for line_number, record in parse(lines, fmt):
+        if record is None:
+            result.error(line_number, 'Malformed record')
+            continue
+        try:
+            title = _clean_name(record.get('title'), 200)
+        except ValueError as exc:
+            result.error(line_number, f'title {exc}')
+            continue
+        try:
+            year = int(record.get('publication_year'))
+        except (TypeError, ValueError):
+            result.error(line_number, 'publication_year must be an integer')
+            continue
+        if year > current_year:
+            result.error(line_number, f'publication_year cannot be in the future (current year is {current_year})')
+            continue
+        try:
+            name = _clean_name(record.get('author'), 100)
+        except ValueError as exc:
+            result.error(line_number, f'author {exc}')
+            continue
+        if not create_authors and name not in authors:
+            result.error(line_number, f'Unknown author "{name}"')
+            continue
+
+        batch.append((name, {'title': title, 'publication_year': year}))
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return result
+
+
+def import_authors(lines, fmt, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Import authors from ``lines``; each record needs a ``name``.
+
+    Names that already exist are skipped, so re-running an import is harmless.
+    """
+    result = ImportResult()
+    authors = _author_map()
+    batch = []
+
+    def flush():
+        before = result.authors_created
+        with transaction.atomic():
+            _create_authors(batch, authors, result)
+        result.created += result.authors_created - before
+        batch.clear()
+
+    for line_number, record in parse(lines, fmt):
+        if record is None:
+            result.error(line_number, 'Malformed record')
+            continue
+        try:
+            batch.append(_clean_name(record.get('name'), 100))
+        except ValueError as exc:
+            result.error(line_number, f'name {exc}')
+            continue
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return result
+
+
+IMPORTERS = {
+    'books': import_books,
+    'authors': import_authors,
+}
@@ -10,13 +10,23 @@ urlpatterns = [
     path('books/', views.BookListView.as_view(), name='book-list'),
     path('books/<int:pk>/', views.BookDetailView.as_view(), name='book-detail'),
     path('books/create/', views.BookCreateView.as_view(), name='book-create'),
+    path('books/bulk/', views.BookBulkView.as_view(), name='book-bulk'),
+    path('books/facets/', views.BookFacetView.as_view(), name='book-facets'),
+    path('books/export.<str:fmt>', views.CatalogExportView.as_view(), {'kind': 'books'}, name='book-export'),
+    path('books/import/', views.CatalogImportView.as_view(), {'kind': 'books'}, name='book-import'),
     path('books/<int:pk>/update/', views.BookUpdateView.as_view(), name='book-update'),
     path('books/<int:pk>/delete/', views.BookDeleteView.as_view(), name='book-delete'),
     # Alternate paths to satisfy checks looking for these specific substrings
     path('books/update/<int:pk>/', views.BookUpdateView.as_view(), name='book-update-alt'),
     path('books/delete/<int:pk>/', views.BookDeleteView.as_view(), name='book-delete-alt'),
     
+    # Typeahead
+    path('autocomplete/', views.AutocompleteView.as_view(), name='autocomplete'),
+    
     # Author endpoints
     path('authors/', views.AuthorListView.as_view(), name='author-list'),
+    path('authors/stats/', views.AuthorStatsView.as_view(), name='author-stats'),
     path('authors/<int:pk>/', views.AuthorDetailView.as_view(), name='author-detail'),
+    path('authors/export.<str:fmt>', views.CatalogExportView.as_view(), {'kind': 'authors'}, name='author-export'),
+    path('authors/import/', views.CatalogImportView.as_view(), {'kind': 'authors'}, name='author-import'),
 ]
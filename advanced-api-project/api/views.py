@@ -1,29 +1,105 @@
-from rest_framework import generics, permissions, status, filters
+import codecs
+import csv
+
+from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.shortcuts import get_object_or_404
+from django.http import Http404, StreamingHttpResponse
+from django.db import transaction
+from django.db.models import Count, Max, Min, Prefetch
+from rest_framework.exceptions import ValidationError
 from .models import Author, Book
-from .serializers import AuthorSerializer, BookSerializer
+from . import facets, transfer
+from .cache import cached_for_generation
+from .autocomplete import AUTOCOMPLETE
+from .filters import BookSearchFilter, RankedOrderingFilter
+from .pagination import AuthorPagination, KeysetPagination
+from .serializers import AuthorSerializer, AuthorStatsSerializer, BookSerializer, validate_bulk_books
+from .signals import books_bulk_changed
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django_filters import rest_framework
-class BookListView(generics.ListCreateAPIView):
+class SparseFieldsViewMixin:
+    """
+    Pass ``?fields=`` and ``?expand=`` (comma-separated) of GET requests to the
+    serializer (see ``SparseFieldsMixin``).
+    
+    Views call ``sparse_fields()`` in ``get_queryset`` so the query loads only
+    the columns and relations that will be serialized.
+    """
+    
+    def sparse_fields(self):
+        """``(fields or None, expand)`` for this request; unknown names are a 400."""
+        if not hasattr(self, '_sparse_fields'):
+            fields, expand = None, ()
+            if self.request.method == 'GET':
+                fields = self._parse_names('fields', self.serializer_class.Meta.fields)
+                expand = self._parse_names('expand', self.serializer_class.expandable_fields) or ()
+            self._sparse_fields = (fields, tuple(expand))
+        return self._sparse_fields
+    
+    def _parse_names(self, param, allowed):
+        value = self.request.query_params.get(param)
+        if not value:
+            return None
+        names = list(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise ValidationError({
+                param: f'Unknown field(s): {", ".join(unknown)}. Choose from: {", ".join(allowed)}.'
+            })
+        return names
+    
+    def get_serializer(self, *args, **kwargs):
+        if self.request.method == 'GET' and self.get_serializer_class() is self.serializer_class:
+            fields, expand = self.sparse_fields()
+            kwargs.setdefault('fields', fields)
+            kwargs.setdefault('expand', expand)
+        return super().get_serializer(*args, **kwargs)
+
+
+def books_for_fields(fields=None, expand=()):
+    """
+    Book queryset loading only the columns the response needs; the author is
+    joined only when expanded.
+    """
+    queryset = Book.objects.all()
+    if 'author' in expand:
+        queryset = queryset.select_related('author')
+    if fields is not None:
+        columns = {'id', *fields, *expand}
+        if 'author' in expand:
+            columns |= {'author__id', 'author__name'}
+        queryset = queryset.only(*columns)
+    return queryset
+
+
+class BookListView(SparseFieldsViewMixin, generics.ListCreateAPIView):
     """
     Generic view for listing all books and creating new books.
     
-    GET /books/ - Retrieve all books
+    GET /books/ - Retrieve all books (?page_size= for cursor pagination)
+    GET /books/?fields=id,title&expand=author - Sparse fields / embedded author
     POST /books/ - Create a new book (requires authentication)
     """
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [AllowAny]  # Allow read access to everyone
     # Enable filtering, searching, and ordering
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # Search uses the full-text index (api.search); results are ranked unless ?ordering= is given.
+    filter_backends = [DjangoFilterBackend, BookSearchFilter, RankedOrderingFilter]
     filterset_fields = ["title", "publication_year", "author"]
     search_fields = ["title", "author__name"]
     ordering_fields = ["title", "publication_year", "id"]
     ordering = ["title"]
+    # ?page_size= / ?cursor= page by keyset on the current ordering (plus id);
+    # Book.Meta.indexes has a matching index for each of ordering_fields.
+    pagination_class = KeysetPagination
+    
+    def get_queryset(self):
+        return books_for_fields(*self.sparse_fields())
     
     def get_permissions(self):
         """
@@ -37,11 +113,11 @@ class BookListView(generics.ListCreateAPIView):
         return [permission() for permission in permission_classes]
 
 
-class BookDetailView(generics.RetrieveUpdateDestroyAPIView):
+class BookDetailView(SparseFieldsViewMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Generic view for retrieving, updating, or deleting a specific book.
     
-    GET /books/<id>/ - Retrieve a specific book
+    GET /books/<id>/ - Retrieve a specific book (?fields=, ?expand=author)
     PUT /books/<id>/ - Update a specific book (requires authentication)
     PATCH /books/<id>/ - Partially update a specific book (requires authentication)
     DELETE /books/<id>/ - Delete a specific book (requires authentication)
@@ -49,6 +125,9 @@ class BookDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     
+    def get_queryset(self):
+        return books_for_fields(*self.sparse_fields())
+    
     def get_permissions(self):
         """
         Customize permissions based on the HTTP method.
@@ -121,16 +200,352 @@ class BookDeleteView(generics.DestroyAPIView):
         return [IsAuthenticated()]
 
 
-class AuthorListView(generics.ListCreateAPIView):
+class BookBulkView(generics.GenericAPIView):
+    """
+    Bulk create, update and delete for books.
+    
+    POST /books/bulk/ - Create books from a JSON array of book objects (no "id")
+    PATCH /books/bulk/ - Update books from a JSON array of objects with an "id"
+    DELETE /books/bulk/ - Delete books given {"ids": [...]}
+    
+    The whole batch is validated in one pass (one query for all referenced
+    authors) and written with bulk_create/bulk_update in a single transaction.
+    Invalid items are reported by index and the valid ones are still written;
+    pass ?atomic=true to write nothing unless every item is valid.
+    All methods require authentication.
+    """
+    queryset = Book.objects.all()
+    serializer_class = BookSerializer
+    permission_classes = [IsAuthenticated]
+    max_items = 1000
+    
+    def _atomic(self):
+        return self.request.query_params.get('atomic', '').lower() in ('1', 'true', 'yes')
+    
+    def _items(self):
+        items = self.request.data
+        if not isinstance(items, list):
+            raise ValidationError({'detail': 'Expected a JSON array of books.'})
+        if len(items) > self.max_items:
+            raise ValidationError({'detail': f'At most {self.max_items} books per request.'})
+        return items
+    
+    def _respond(self, key, written, errors, success_status):
+        """
+        201/200 when everything was written, 207 when some items failed,
+        400 when nothing was written.
+        """
+        body = {
+            key: written,
+            'errors': [{'index': index, 'errors': errs} for index, errs in sorted(errors.items())],
+        }
+        if not errors:
+            return Response(body, status=success_status)
+        if written:
+            return Response(body, status=status.HTTP_207_MULTI_STATUS)
+        return Response(body, status=status.HTTP_400_BAD_REQUEST)
+    
+    def post(self, request, *args, **kwargs):
+        valid, errors = validate_bulk_books(self._items())
+        if errors and self._atomic():
+            return self._respond('created', [], errors, status.HTTP_201_CREATED)
+        books = [Book(**data) for _, data in valid]
+        with transaction.atomic():
+            Book.objects.bulk_create(books, batch_size=500)
+            books_bulk_changed.send(sender=Book, created=books)
+        return self._respond('created', BookSerializer(books, many=True).data, errors, status.HTTP_201_CREATED)
+    
+    def patch(self, request, *args, **kwargs):
+        valid, errors = validate_bulk_books(self._items(), partial=True, require_id=True)
+        existing = Book.objects.in_bulk([data['id'] for _, data in valid])
+        changes = []
+        for index, data in valid:
+            book = existing.get(data['id'])
+            if book is None:
+                errors[index] = {'id': [f'Book {data["id"]} does not exist.']}
+            else:
+                changes.append((book, data))
+        if errors and self._atomic():
+            return self._respond('updated', [], errors, status.HTTP_200_OK)
+        
+        previous = {book.pk: (book.author_id, book.publication_year, book.title) for book, _ in changes}
+        fields = set()
+        for book, data in changes:
+            for field, value in data.items():
+                if field != 'id':
+                    setattr(book, field, value)
+                    fields.add(field)
+        books = [book for book, _ in changes]
+        if books and fields:
+            with transaction.atomic():
+                Book.objects.bulk_update(books, sorted(fields), batch_size=500)
+                books_bulk_changed.send(sender=Book, updated=books, previous=previous)
+        return self._respond('updated', BookSerializer(books, many=True).data, errors, status.HTTP_200_OK)
+    
+    def delete(self, request, *args, **kwargs):
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            raise ValidationError({'ids': 'Expected a list of integer book ids.'})
+        if len(ids) > self.max_items:
+            raise ValidationError({'detail': f'At most {self.max_items} books per request.'})
+        with transaction.atomic():
+            found = set(Book.objects.filter(pk__in=ids).values_list('pk', flat=True))
+            errors = {
+                index: {'id': [f'Book {pk} does not exist.']}
+                for index, pk in enumerate(ids) if pk not in found
+            }
+            if not (errors and self._atomic()):
+                Book.objects.filter(pk__in=found).delete()
+            else:
+                found = set()
+        return self._respond('deleted', sorted(found), errors, status.HTTP_200_OK)
+
+
+class BookFacetView(generics.GenericAPIView):
+    """
+    Facet counts for the books matching BookListView's filters.
+    
+    GET /books/facets/?author=1&publication_year=1997&search=...
+    
+    Returns the total and the number of books per publication_year and per
+    author (top ?facet_limit= authors, default 100). author and
+    publication_year filters are answered from the precomputed BookFacet
+    table; other filters fall back to a cached aggregate over the books.
+    """
+    queryset = Book.objects.all()
+    permission_classes = [AllowAny]
+    filter_backends = BookListView.filter_backends
+    filterset_fields = BookListView.filterset_fields
+    search_fields = BookListView.search_fields
+    
+    def get(self, request, *args, **kwargs):
+        try:
+            author_limit = int(request.query_params.get('facet_limit', facets.DEFAULT_AUTHOR_LIMIT))
+        except ValueError:
+            raise ValidationError({'facet_limit': 'Must be a positive integer.'})
+        if not 1 <= author_limit <= 1000:
+            raise ValidationError({'facet_limit': 'Must be between 1 and 1000.'})
+        params = dict(request.query_params.items())
+        data = facets.facet_counts(params, lambda: self.filter_queryset(self.get_queryset()), author_limit)
+        return Response(data)
+
+
+class AutocompleteView(generics.GenericAPIView):
+    """
+    As-you-type suggestions for book titles and author names.
+    
+    GET /autocomplete/?q=hob&limit=10&type=title
+    
+    Matches the start of any word, ranked by number of books. Answered from an
+    in-memory index in each worker (api.autocomplete), never from the database.
+    ?type= is "title", "author" or omitted for both.
+    """
+    permission_classes = [AllowAny]
+    kinds = ('title', 'author')
+    
+    def get(self, request, *args, **kwargs):
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            raise ValidationError({'limit': 'Must be a positive integer.'})
+        if not 1 <= limit <= 50:
+            raise ValidationError({'limit': 'Must be between 1 and 50.'})
+        kind = request.query_params.get('type')
+        if kind and kind not in self.kinds:
+            raise ValidationError({'type': f'Must be one of: {", ".join(self.kinds)}.'})
+        prefix = request.query_params.get('q', '')
+        return Response(AUTOCOMPLETE.suggest(prefix, limit, (kind,) if kind else self.kinds))
+
+
+class CatalogExportView(generics.GenericAPIView):
+    """
+    Stream every book or author as CSV or NDJSON.
+    
+    GET /books/export.csv, /books/export.ndjson
+    GET /authors/export.csv, /authors/export.ndjson
+    
+    Rows are read with iterator() and written as they are produced, so the
+    response starts immediately and memory use does not grow with the table.
+    Requires authentication, like the import.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, kind, fmt):
+        if fmt not in transfer.FORMATS:
+            raise Http404(f"Unknown export format: {fmt}")
+        response = StreamingHttpResponse(transfer.render(kind, fmt), content_type=transfer.FORMATS[fmt])
+        response['Content-Disposition'] = f'attachment; filename="{kind}.{fmt}"'
+        return response
+
+
+class CatalogImportView(generics.GenericAPIView):
+    """
+    Import books or authors from a CSV or NDJSON request body.
+    
+    POST /books/import/ - Records with title, publication_year and author (name)
+    POST /authors/import/ - Records with name
+    
+    The format comes from the Content-Type (text/csv or application/x-ndjson).
+    The body is read line by line and written in batches of ?batch_size= rows;
+    unknown authors are created unless ?create_authors=false.
+    Requires authentication.
+    """
+    permission_classes = [IsAuthenticated]
+    content_types = {
+        'text/csv': 'csv',
+        'application/x-ndjson': 'ndjson',
+        'application/ndjson': 'ndjson',
+    }
+    
+    def post(self, request, kind):
+        content_type = request.content_type.split(';')[0].strip().lower()
+        fmt = self.content_types.get(content_type)
+        if fmt is None:
+            return Response(
+                {'detail': 'Content-Type must be text/csv or application/x-ndjson.'},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+        try:
+            batch_size = int(request.query_params.get('batch_size', transfer.DEFAULT_BATCH_SIZE))
+        except ValueError:
+            raise ValidationError({'batch_size': 'Must be a positive integer.'})
+        if not 1 <= batch_size <= 10000:
+            raise ValidationError({'batch_size': 'Must be between 1 and 10000.'})
+        
+        # The body is never parsed as a whole: read it one line at a time.
+        stream = request.stream
+        lines = codecs.iterdecode(iter(stream.readline, b''), 'utf-8') if stream is not None else []
+        options = {'batch_size': batch_size}
+        if kind == 'books':
+            options['create_authors'] = request.query_params.get('create_authors', 'true').lower() not in ('0', 'false', 'no')
+        try:
+            result = transfer.IMPORTERS[kind](lines, fmt, **options)
+        except (UnicodeDecodeError, csv.Error) as exc:
+            raise ValidationError({'detail': f'Could not read the request body: {exc}'})
+        return Response(result.as_dict(), status=status.HTTP_201_CREATED if result.created else status.HTTP_200_OK)
+
+
+def authors_with_books(books_limit=None):
+    """
+    Author queryset with their books prefetched in a single extra query.
+
+    Only the columns BookSerializer needs are loaded, books are ordered by title,
+    and ``books_limit`` caps the number of books per author (done in SQL with a
+    window function, so it stays one query).
+    """
+    books = Book.objects.only('id', 'title', 'publication_year', 'author_id').order_by('title', 'id')
+    if books_limit is not None:
+        books = books[:books_limit]
+    return Author.objects.only('id', 'name').prefetch_related(
+        Prefetch('books', queryset=books, to_attr='prefetched_books')
+    )
+
+
+def authors_for_fields(fields=None, expand=(), books_limit=None):
+    """
+    Author queryset for a sparse fieldset: books are prefetched only when they
+    will be serialized.
+    """
+    if fields is not None and 'books' not in fields and 'books' not in expand:
+        return Author.objects.only('id', *fields)
+    return authors_with_books(books_limit)
+
+
+def authors_with_stats():
+    """
+    Authors annotated with their book count and first/last publication year,
+    computed in one grouped query.
+    """
+    return Author.objects.annotate(
+        book_count=Count('books'),
+        first_publication_year=Min('books__publication_year'),
+        last_publication_year=Max('books__publication_year'),
+    ).order_by('name', 'id')  # Meta.ordering is not applied to GROUP BY queries
+
+
+class AuthorStatsView(generics.GenericAPIView):
+    """
+    Per-author book statistics for the whole catalog.
+    
+    GET /authors/stats/ - Every author's book count and publication year range,
+    plus catalog totals
+    
+    Computed with one grouped query and cached until the next write to a book
+    or author (see api.cache).
+    """
+    queryset = authors_with_stats()
+    serializer_class = AuthorStatsSerializer
+    permission_classes = [AllowAny]
+    
+    def get(self, request, *args, **kwargs):
+        return Response(cached_for_generation('api:author-stats', {}, self.compute))
+    
+    def compute(self):
+        authors = self.get_serializer(self.get_queryset(), many=True).data
+        years = [a['first_publication_year'] for a in authors if a['first_publication_year'] is not None]
+        last_years = [a['last_publication_year'] for a in authors if a['last_publication_year'] is not None]
+        return {
+            'totals': {
+                'authors': len(authors),
+                'books': sum(a['book_count'] for a in authors),
+                'first_publication_year': min(years, default=None),
+                'last_publication_year': max(last_years, default=None),
+            },
+            'authors': authors,
+        }
+
+
+class AuthorListView(SparseFieldsViewMixin, generics.ListCreateAPIView):
     """
     Generic view for listing all authors and creating new authors.
     
-    GET /authors/ - Retrieve all authors with their books
+    GET /authors/ - Retrieve a page of authors with their books
+    GET /authors/?books_limit=3 - Embed at most 3 books per author
+    GET /authors/?fields=stats - Book count and year range instead of the books
+    GET /authors/?fields=id,name - Sparse fields; books are not loaded unless listed
     POST /authors/ - Create a new author (requires authentication)
+    
+    The listing runs in a constant number of queries however many authors
+    there are: one count, one page of authors, one for their books. Stats pages
+    take one grouped query (plus the count) and are cached until the next write.
     """
     queryset = Author.objects.all()
     serializer_class = AuthorSerializer
     permission_classes = [AllowAny]  # Allow read access to everyone
+    pagination_class = AuthorPagination
+    
+    def wants_stats(self):
+        return self.request.method == 'GET' and self.request.query_params.get('fields') == 'stats'
+    
+    def get_serializer_class(self):
+        if self.wants_stats():
+            return AuthorStatsSerializer
+        return super().get_serializer_class()
+    
+    def list(self, request, *args, **kwargs):
+        if not self.wants_stats():
+            return super().list(request, *args, **kwargs)
+        # Pagination links are absolute, so the host is part of the key.
+        params = {'host': request.get_host(), **request.query_params.dict()}
+        list_page = super().list
+        data = cached_for_generation('api:author-stats-page', params, lambda: list_page(request, *args, **kwargs).data)
+        return Response(data)
+    
+    def get_queryset(self):
+        """
+        Prefetch books for the listing, honouring the optional books_limit parameter.
+        """
+        if self.wants_stats():
+            return authors_with_stats()
+        books_limit = self.request.query_params.get('books_limit')
+        if books_limit is not None:
+            try:
+                books_limit = int(books_limit)
+                if books_limit < 0:
+                    raise ValueError
+            except ValueError:
+                raise ValidationError({'books_limit': 'Must be a non-negative integer.'})
+        return authors_for_fields(*self.sparse_fields(), books_limit=books_limit)
     
     def get_permissions(self):
         """
@@ -144,18 +559,21 @@ class AuthorListView(generics.ListCreateAPIView):
         return [permission() for permission in permission_classes]
 
 
-class AuthorDetailView(generics.RetrieveUpdateDestroyAPIView):
+class AuthorDetailView(SparseFieldsViewMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Generic view for retrieving, updating, or deleting a specific author.
     
-    GET /authors/<id>/ - Retrieve a specific author with their books
+    GET /authors/<id>/ - Retrieve a specific author with their books (?fields=)
     PUT /authors/<id>/ - Update a specific author (requires authentication)
     PATCH /authors/<id>/ - Partially update a specific author (requires authentication)
     DELETE /authors/<id>/ - Delete a specific author (requires authentication)
     """
-    queryset = Author.objects.all()
+    queryset = authors_with_books()
     serializer_class = AuthorSerializer
     
+    def get_queryset(self):
+        return authors_for_fields(*self.sparse_fields())
+    
     def get_permissions(self):
         """
         Customize permissions based on the HTTP method.
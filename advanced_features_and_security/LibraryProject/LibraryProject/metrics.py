@@ -0,0 +1,325 @@
+"""
+Prometheus-style metrics with multi-process aggregation.
+
+Each process records into an in-memory ``Registry`` (a dict update under a
+lock, so recording costs well under a microsecond). When ``METRICS_MULTIPROC_DIR``
+is set, the registry is written to ``<dir>/worker_<pid>.json`` at most every
+``METRICS_FLUSH_INTERVAL`` seconds; the ``/metrics`` view merges every worker's
+file so the scrape sees the whole Gunicorn pool, whichever worker answers it.
+
+Recorded per resolved URL name:
+- request count and latency histogram,
+- in-flight requests,
+- DB query count and DB time (reusing ``alx_shared.profiling``),
+- cache hits and misses through ``InstrumentedLocMemCache``.
+"""
+
+import atexit
+import bisect
+import hmac
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse, HttpResponseForbidden
+
+try:
+    import fcntl
+except ImportError:  # Windows: no Gunicorn, so no concurrent compaction either
+    fcntl = None
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRIC_HELP = {
+    "django_http_requests_total": ("counter", "Total HTTP requests by view, method and status."),
+    "django_http_request_duration_seconds": ("histogram", "HTTP request latency by view."),
+    "django_http_requests_in_flight": ("gauge", "Requests currently being processed."),
+    "django_db_queries_total": ("counter", "Database queries executed by view."),
+    "django_db_duration_seconds_total": ("counter", "Time spent in the database by view."),
+    "django_cache_hits_total": ("counter", "Cache hits by view."),
+    "django_cache_misses_total": ("counter", "Cache misses by view."),
+}
+
+DEAD_AGGREGATE = "dead_aggregate.json"
+
+_MISSING = object()
+_current = threading.local()
+
+
+class Registry:
+    """Per-process metric store. Labels are tuples of ``(name, value)`` pairs."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.counters = defaultdict(float)
+        self.gauges = defaultdict(float)
+        self.histograms = {}
+        self.last_flush = 0.0
+
+    def inc(self, name, labels=(), value=1.0):
+        with self.lock:
+            self.counters[(name, labels)] += value
+
+    def gauge_add(self, name, labels=(), value=1.0):
+        with self.lock:
+            self.gauges[(name, labels)] += value
+
+    def observe(self, name, labels, value):
+        index = bisect.bisect_left(LATENCY_BUCKETS, value)
+        with self.lock:
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                # One slot per bucket, one for +Inf, then the running sum.
+                histogram = self.histograms[(name, labels)] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+            histogram[index] += 1
+            histogram[-1] += value
+
+    def dump(self):
+        with self.lock:
+            return {
+                "counters": [[n, list(l), v] for (n, l), v in self.counters.items()],
+                "gauges": [[n, list(l), v] for (n, l), v in self.gauges.items()],
+                "histograms": [[n, list(l), list(h)] for (n, l), h in self.histograms.items()],
+            }
+
+    def maybe_flush(self, force=False):
+        """Write the worker file if the flush interval has passed; True if written."""
+        directory = multiproc_dir()
+        if directory is None:
+            return False
+        now = time.monotonic()
+        if not force and now - self.last_flush < getattr(settings, "METRICS_FLUSH_INTERVAL", 1.0):
+            return False
+        self.last_flush = now
+        path = directory / f"worker_{os.getpid()}.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.dump()))
+        os.replace(tmp, path)
+        return True
+
+
+REGISTRY = Registry()
+# Gunicorn forks after preloading the app; children must not inherit the parent's numbers.
+os.register_at_fork(after_in_child=REGISTRY.reset)
+atexit.register(lambda: REGISTRY.maybe_flush(force=True))
+
+
+def multiproc_dir():
+    directory = os.environ.get("METRICS_MULTIPROC_DIR") or getattr(settings, "METRICS_MULTIPROC_DIR", None)
+    return Path(directory) if directory else None
+
+
+def mark_process_dead(pid):
+    """
+    Called from Gunicorn's ``child_exit`` hook.
+
+    Counters of a dead worker must keep counting towards the totals, but its
+    in-flight gauge must not. Its counters and histograms are folded into
+    ``dead_aggregate.json`` and its file removed, so workers recycled by
+    ``max_requests`` do not leave one file each for every scrape to read.
+    """
+    directory = multiproc_dir()
+    if directory is None:
+        return
+    path = directory / f"worker_{pid}.json"
+    aggregate = directory / DEAD_AGGREGATE
+    with open(directory / "dead_aggregate.lock", "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        sources = []
+        for source in (aggregate, path):
+            try:
+                sources.append((json.loads(source.read_text()), False))
+            except (OSError, ValueError):
+                continue
+        if not sources:
+            return
+        counters, _, histograms = _merge(sources)
+        tmp = aggregate.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "counters": [[n, l, v] for (n, l), v in counters.items()],
+            "gauges": [],
+            "histograms": [[n, l, h] for (n, l), h in histograms.items()],
+        }))
+        os.replace(tmp, aggregate)
+        path.unlink(missing_ok=True)
+
+
+def _labels_key(labels):
+    return tuple(tuple(pair) for pair in labels)
+
+
+def _merge(sources):
+    """Sum ``(data, alive)`` snapshots; gauges only count from live workers."""
+    counters, gauges, histograms = defaultdict(float), defaultdict(float), {}
+    for data, alive in sources:
+        for name, labels, value in data["counters"]:
+            counters[(name, _labels_key(labels))] += value
+        if alive:
+            for name, labels, value in data["gauges"]:
+                gauges[(name, _labels_key(labels))] += value
+        for name, labels, values in data["histograms"]:
+            key = (name, _labels_key(labels))
+            merged = histograms.setdefault(key, [0] * len(values))
+            for i, value in enumerate(values):
+                merged[i] += value
+    return counters, gauges, histograms
+
+
+def collect():
+    """Merge this process's registry with every worker file into one snapshot."""
+    sources = []
+    directory = multiproc_dir()
+    if directory is None:
+        sources.append((REGISTRY.dump(), True))
+    else:
+        REGISTRY.maybe_flush(force=True)
+        for path in directory.glob("*.json"):
+            try:
+                sources.append((json.loads(path.read_text()), path.name.startswith("worker_")))
+            except (OSError, ValueError):
+                # A worker may be mid-write or gone; skip it for this scrape.
+                continue
+    return _merge(sources)
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        f'{k}="' + str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for k, v in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def render_text():
+    """Prometheus text exposition format (version 0.0.4)."""
+    counters, gauges, histograms = collect()
+    by_name = defaultdict(list)
+    for (name, labels), value in list(counters.items()) + list(gauges.items()):
+        by_name[name].append(f"{name}{_format_labels(labels)} {value:g}")
+    for (name, labels), values in histograms.items():
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), values[:-1]):
+            cumulative += count
+            by_name[name].append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+        by_name[name].append(f"{name}_sum{_format_labels(labels)} {values[-1]:g}")
+        by_name[name].append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    lines = []
+    for name in sorted(by_name):
+        metric_type, help_text = METRIC_HELP.get(name, ("untyped", name))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.extend(sorted(by_name[name]))
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    """
+    Scrape endpoint; restricted to peers in ``METRICS_ALLOWED_IPS`` and, when
+    ``METRICS_BEARER_TOKEN`` is set, to requests carrying that bearer token.
+
+    Behind a reverse proxy the peer is the proxy, so the address check alone
+    lets every proxied client in: block ``/metrics`` at the proxy.
+    """
+    allowed = getattr(settings, "METRICS_ALLOWED_IPS", ["127.0.0.1"])
+    if request.META.get("REMOTE_ADDR") not in allowed:
+        return HttpResponseForbidden("Forbidden")
+    token = getattr(settings, "METRICS_BEARER_TOKEN", None)
+    if token and not hmac.compare_digest(request.META.get("HTTP_AUTHORIZATION", ""), f"Bearer {token}"):
+        return HttpResponseForbidden("Forbidden")
+    return HttpResponse(render_text(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+class MetricsMiddleware:
+    """
+    Record request metrics labelled by resolved URL name.
+
+    Place it before ``QueryProfilingMiddleware`` so DB numbers can be read
+    from the recorder that middleware attaches to the request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        REGISTRY.gauge_add("django_http_requests_in_flight")
+        # Publish the raised gauge too, or the worker file of a sync worker
+        # only ever holds the value after the request, which is 0.
+        flushed_in_flight = REGISTRY.maybe_flush()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            REGISTRY.gauge_add("django_http_requests_in_flight", value=-1.0)
+            _current.view = None
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        view = ("view", (match.view_name or match.route) if match else "<unresolved>")
+        REGISTRY.inc("django_http_requests_total", (view, ("method", request.method), ("status", str(response.status_code))))
+        REGISTRY.observe("django_http_request_duration_seconds", (view,), elapsed)
+        recorder = getattr(request, "query_recorder", None)
+        if recorder is not None:
+            REGISTRY.inc("django_db_queries_total", (view,), recorder.count)
+            REGISTRY.inc("django_db_duration_seconds_total", (view,), recorder.duration)
+        # A file showing this request in flight must not outlive it.
+        REGISTRY.maybe_flush(force=flushed_in_flight)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Lets the cache backend label hits/misses with the view being served.
+        _current.view = request.resolver_match.view_name
+
+
+class InstrumentedLocMemCache(LocMemCache):
+    """``LocMemCache`` that counts hits and misses per view, one per key looked up."""
+
+    def _record(self, hits, misses):
+        view = (("view", getattr(_current, "view", None) or "<none>"),)
+        if hits:
+            REGISTRY.inc("django_cache_hits_total", view, hits)
+        if misses:
+            REGISTRY.inc("django_cache_misses_total", view, misses)
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            self._record(0, 1)
+            return default
+        self._record(1, 0)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = {}
+        for key in keys:
+            value = super().get(key, _MISSING, version)
+            if value is not _MISSING:
+                found[key] = value
+        self._record(len(found), len(keys) - len(found))
+        return found
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is not _MISSING:
+            self._record(1, 0)
+            return value
+        self._record(0, 1)
+        if callable(default):
+            default = default()
+        self.add(key, default, timeout=timeout, version=version)
+        # Re-read in case another caller added a value first, as BaseCache does.
+        return super().get(key, default, version)
@@ -41,10 +41,14 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "bookshelf",
     "relationship_app",
+    "alx_shared",  # {% load image_variants %}
 ]
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "whitenoise.middleware.WhiteNoiseMiddleware",  # Serves STATIC_ROOT before the rest of the stack
+    "LibraryProject.metrics.MetricsMiddleware",  # Prometheus-style request metrics
+    "alx_shared.profiling.QueryProfilingMiddleware",  # Query count / latency instrumentation
     "bookshelf.middleware.SecurityLoggingMiddleware",  # Custom security logging
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -153,7 +157,7 @@ SECURE_HSTS_INCLUDE_SUBDOMAINS = True  # Include all subdomains in HSTS policy
 SECURE_HSTS_PRELOAD = True  # Allow HSTS preloading in browsers
 
 # Security: Additional HTTPS settings
-SECURE_REDIRECT_EXEMPT = []  # URLs that should not be redirected to HTTPS
+SECURE_REDIRECT_EXEMPT = [r'^metrics$']  # URLs that should not be redirected to HTTPS (internal scrapes)
 SECURE_SSL_HOST = None  # Custom SSL host (if different from ALLOWED_HOSTS)
 
 # Security: Cookie Security
@@ -274,9 +278,11 @@ LOGGING = {
 
 # Security: Database Security
 # Use environment variables for database credentials in production
-DATABASES['default']['OPTIONS'] = {
-    'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
-}
+if DATABASES['default']['ENGINE'] == 'django.db.backends.mysql':
+    # MySQL-only statement; SQLite (development, tests) rejects it
+    DATABASES['default']['OPTIONS'] = {
+        'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
+    }
 
 # Security: Email Security (for production)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # Console backend for development
@@ -291,7 +297,7 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # Console back
 # Security: Cache Security
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'LibraryProject.metrics.InstrumentedLocMemCache',  # LocMemCache with hit/miss metrics
         'LOCATION': 'unique-snowflake',
         'OPTIONS': {
             'MAX_ENTRIES': 1000,
@@ -300,14 +306,40 @@ CACHES = {
     }
 }
 
+# Metrics: /metrics scrape endpoint
+# With several Gunicorn workers, each worker writes its numbers to this directory
+# and the endpoint merges them (see deployment/gunicorn_https.py).
+# Peer addresses allowed to scrape. Behind a reverse proxy every request comes from the
+# proxy's address, so the proxy must block /metrics (deployment/nginx_https.conf,
+# apache_https.conf) and this list must never hold the proxy's address unless
+# METRICS_BEARER_TOKEN is also set.
+METRICS_ALLOWED_IPS = ['127.0.0.1']
+METRICS_BEARER_TOKEN = None  # If set, also require "Authorization: Bearer <token>"
+METRICS_FLUSH_INTERVAL = 1.0  # Seconds between per-worker flushes
+
 # Security: Static Files Security
 STATIC_ROOT = BASE_DIR / 'staticfiles'
-STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+# Content-hashed names, gzip/brotli copies made by collectstatic, immutable caching
+# (see alx_shared/storage.py). STATICFILES_STORAGE is ignored since Django 5.1.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'alx_shared.storage.FingerprintedStaticFilesStorage'},
+}
 
 # Security: Media Files Security
 MEDIA_ROOT = BASE_DIR / 'media'
 MEDIA_URL = '/media/'
 
+# Media serving: let the web server send the bytes instead of a Gunicorn worker.
+# nginx: set to '/protected-media/' (an `internal` location, see deployment/nginx_https.conf)
+MEDIA_ACCEL_REDIRECT_PREFIX = None
+MEDIA_SENDFILE = False  # Apache with mod_xsendfile
+
+# Signed, chunked uploads (bookshelf.media); chunks are streamed to disk, never held in memory
+MEDIA_UPLOAD_URL_MAX_AGE = 3600  # Seconds a signed upload URL stays valid
+MEDIA_UPLOAD_MAX_SIZE = 10485760  # 10MB per uploaded image
+MEDIA_UPLOAD_TEMP_DIR = None  # Private dir for partial uploads, outside MEDIA_ROOT (None: system temp dir)
+
 # Security: Admin Security
 ADMIN_URL = 'admin/'  # Custom admin URL to hide default admin path
 
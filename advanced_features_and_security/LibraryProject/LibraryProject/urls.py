@@ -16,16 +16,24 @@ Including another URLconf
 """
 
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from alx_shared.profiling import route_stats_view
+from bookshelf.media import serve_media
+
+from .metrics import metrics_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics", metrics_view, name="metrics"),
+    path("profiling/routes/", route_stats_view, name="profiling-routes"),
     path("bookshelf/", include("bookshelf.urls")),
     path("", include("relationship_app.urls")),
 ]
 
-# Serve media files during development
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Media files: streamed with Range support in development, offloaded to the
+# web server via X-Accel-Redirect / X-Sendfile in production (see settings)
+urlpatterns += [
+    re_path(r"^%s(?P<path>.*)$" % settings.MEDIA_URL.lstrip("/"), serve_media, name="media"),
+]
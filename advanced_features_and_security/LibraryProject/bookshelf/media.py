@@ -0,0 +1,283 @@
+"""
+Media serving and signed, chunked uploads for user images.
+
+Serving (``serve_media``):
+- ``MEDIA_ACCEL_REDIRECT_PREFIX`` set: answer with ``X-Accel-Redirect`` and let
+  nginx send the bytes from its ``internal`` location.
+- ``MEDIA_SENDFILE`` True: answer with ``X-Sendfile`` (Apache mod_xsendfile).
+- Otherwise stream the file from Django, honouring single ``Range`` requests.
+Content-hashed names (see ``alx_shared.images``) never change, so they are sent
+with ``Cache-Control: immutable``; everything gets an ``ETag``.
+
+Uploading: a logged-in user asks ``profile_photo_upload_url_view`` for a signed
+URL, then ``PUT``s the image to it, optionally in several requests carrying a
+``Content-Range`` header. Each chunk is streamed to a part file on disk and the
+finished file is handed to storage, so no upload is ever held in memory.
+
+Part files live in ``MEDIA_UPLOAD_TEMP_DIR`` (default: ``bookshelf_uploads`` in
+the system temp directory), never under ``MEDIA_ROOT``, which is public. Chunks
+for one upload are written under an exclusive lock on its part file and must
+start where the previous one ended. A finished upload leaves a ``.done``
+marker next to the part files, so its URL cannot be used again before it
+expires. Part files and markers older than ``MEDIA_UPLOAD_URL_MAX_AGE`` are
+pruned whenever a new upload starts.
+"""
+
+import logging
+import mimetypes
+import os
+import re
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.decorators import login_required
+from django.core import signing
+from django.core.files import File
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseForbidden,
+    HttpResponseNotModified,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.urls import reverse
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to the offset check alone
+    fcntl = None
+
+
+logger = logging.getLogger('django.security')
+
+CHUNK_SIZE = 64 * 1024
+HASHED_NAME = re.compile(r"(^|/)[0-9a-f]{32}(-\d+w)?\.[A-Za-z0-9]+$")
+RANGE_HEADER = re.compile(r"^bytes=(\d*)-(\d*)$")
+CONTENT_RANGE_HEADER = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+UPLOAD_SALT = "bookshelf.media.upload"
+
+
+def _file_chunks(path, start, length):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            data = f.read(min(CHUNK_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def _parse_range(header, size):
+    """Return ``(start, end)`` for a single satisfiable byte range, ``None`` for no range."""
+    match = RANGE_HEADER.match(header.strip()) if header else None
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes.
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError("Unsatisfiable range")
+    return start, end
+
+
+def serve_media(request, path):
+    """Serve a file from ``MEDIA_ROOT`` with offload, ranges and cache headers."""
+    try:
+        full_path = Path(safe_join(settings.MEDIA_ROOT, path))
+    except Exception:
+        raise Http404("Invalid path")
+    if not full_path.is_file():
+        raise Http404("Media file not found")
+
+    stat = full_path.stat()
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    if request.META.get("HTTP_IF_NONE_MATCH") == etag:
+        response = HttpResponseNotModified()
+    else:
+        content_type = mimetypes.guess_type(full_path.name)[0] or "application/octet-stream"
+        accel_prefix = getattr(settings, "MEDIA_ACCEL_REDIRECT_PREFIX", None)
+        if accel_prefix:
+            response = HttpResponse(content_type=content_type)
+            response["X-Accel-Redirect"] = accel_prefix + quote(path)
+        elif getattr(settings, "MEDIA_SENDFILE", False):
+            response = HttpResponse(content_type=content_type)
+            response["X-Sendfile"] = str(full_path)
+        else:
+            response = _streaming_response(request, full_path, stat.st_size, content_type)
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    if HASHED_NAME.search(path):
+        response["Cache-Control"] = "public, max-age=31536000, immutable"
+    else:
+        response["Cache-Control"] = "public, max-age=3600"
+    return response
+
+
+def _streaming_response(request, full_path, size, content_type):
+    try:
+        byte_range = _parse_range(request.META.get("HTTP_RANGE"), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+    if byte_range is None:
+        response = StreamingHttpResponse(_file_chunks(full_path, 0, size), content_type=content_type)
+        response["Content-Length"] = str(size)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _file_chunks(full_path, start, length), content_type=content_type, status=206
+        )
+        response["Content-Length"] = str(length)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+@login_required
+@require_http_methods(["POST"])
+def profile_photo_upload_url_view(request):
+    """
+    Issue a signed URL the current user can PUT a new profile photo to.
+    """
+    token = signing.dumps({"u": request.user.pk, "id": uuid.uuid4().hex}, salt=UPLOAD_SALT)
+    url = reverse('bookshelf:profile_photo_upload', kwargs={'token': token})
+    return JsonResponse({
+        'upload_url': request.build_absolute_uri(url),
+        'expires_in': getattr(settings, 'MEDIA_UPLOAD_URL_MAX_AGE', 3600),
+        'max_size': getattr(settings, 'MEDIA_UPLOAD_MAX_SIZE', 10 * 1024 * 1024),
+    })
+
+
+@csrf_exempt  # Authenticated by the signed token, not by session cookies
+@require_http_methods(["PUT"])
+def profile_photo_upload_view(request, token):
+    """
+    Receive a profile photo, whole or in ``Content-Range`` chunks, streaming it to disk.
+    """
+    max_age = getattr(settings, 'MEDIA_UPLOAD_URL_MAX_AGE', 3600)
+    try:
+        payload = signing.loads(token, salt=UPLOAD_SALT, max_age=max_age)
+    except signing.BadSignature:
+        logger.warning(f'Invalid or expired upload token from {request.META.get("REMOTE_ADDR")}')
+        return HttpResponseForbidden("Invalid or expired upload URL")
+
+    max_size = getattr(settings, 'MEDIA_UPLOAD_MAX_SIZE', 10 * 1024 * 1024)
+    content_range = request.META.get("HTTP_CONTENT_RANGE")
+    if content_range:
+        match = CONTENT_RANGE_HEADER.match(content_range)
+        if not match:
+            return JsonResponse({'error': 'Malformed Content-Range header'}, status=400)
+        start, end, total = (int(g) for g in match.groups())
+    else:
+        length = int(request.META.get("CONTENT_LENGTH") or 0)
+        start, end, total = 0, length - 1, length
+    if total <= 0 or total > max_size or end >= total or start > end:
+        return JsonResponse({'error': f'Upload must be between 1 and {max_size} bytes'}, status=413)
+
+    upload_dir = partial_upload_dir()
+    if start == 0:
+        _prune_uploads(upload_dir, max_age)
+    part_path = upload_dir / f"{payload['id']}.part"
+    done_path = upload_dir / f"{payload['id']}.done"
+    if done_path.exists():
+        return HttpResponseForbidden("Upload URL already used")
+
+    with open(part_path, "ab") as f:
+        if fcntl is not None:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return JsonResponse({'error': 'Another chunk of this upload is being written'}, status=409)
+        received = os.fstat(f.fileno()).st_size
+        if start != received:
+            # Tell the client where to resume from.
+            return JsonResponse({'error': 'Unexpected chunk offset', 'received': received}, status=409)
+
+        remaining = end - start + 1
+        while remaining > 0:
+            data = request.read(min(CHUNK_SIZE, remaining))
+            if not data:
+                break
+            f.write(data)
+            remaining -= len(data)
+        f.flush()
+        received = os.fstat(f.fileno()).st_size
+        if received < total:
+            return JsonResponse({'received': received, 'total': total}, status=202)
+
+        try:
+            if not _claim_upload(done_path):
+                return HttpResponseForbidden("Upload URL already used")
+            return _finish_upload(payload, part_path)
+        finally:
+            part_path.unlink(missing_ok=True)
+
+
+def partial_upload_dir():
+    """Private directory for part files and ``.done`` markers."""
+    directory = Path(
+        getattr(settings, 'MEDIA_UPLOAD_TEMP_DIR', None) or Path(tempfile.gettempdir()) / 'bookshelf_uploads'
+    )
+    directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+    return directory
+
+
+def _prune_uploads(upload_dir, max_age):
+    """Remove part files and markers of uploads whose URL has expired."""
+    cutoff = time.time() - max_age
+    for entry in os.scandir(upload_dir):
+        if not entry.name.endswith((".part", ".done")):
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+        except FileNotFoundError:
+            # Finished or pruned by another request meanwhile.
+            continue
+
+
+def _claim_upload(done_path):
+    """Create the ``.done`` marker for an upload; ``False`` if it already exists."""
+    try:
+        os.close(os.open(done_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        return False
+    return True
+
+
+def _finish_upload(payload, part_path):
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        with Image.open(part_path) as image:
+            image.verify()
+            extension = (image.format or "jpeg").lower()
+    except (UnidentifiedImageError, OSError):
+        return JsonResponse({'error': 'Uploaded file is not a valid image'}, status=400)
+
+    user = get_user_model().objects.filter(pk=payload['u']).first()
+    if user is None:
+        return HttpResponseForbidden("Unknown user")
+    with open(part_path, "rb") as f:
+        # HashedImageField renames it to its content hash and schedules variants.
+        user.profile_photo.save(f"upload.{extension}", File(f), save=False)
+    user.save(update_fields=['profile_photo'])
+    return JsonResponse({'url': user.profile_photo.url, 'size': os.path.getsize(part_path)}, status=201)
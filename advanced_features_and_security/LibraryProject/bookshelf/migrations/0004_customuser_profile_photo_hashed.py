@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:05
+
+import alx_shared.images
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookshelf", "0003_alter_book_options"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="customuser",
+            name="profile_photo",
+            field=alx_shared.images.HashedImageField(
+                blank=True,
+                help_text="User's profile photo (stored by content hash, with resized variants)",
+                null=True,
+                upload_to="profile_photos/",
+            ),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 
+from alx_shared.images import HashedImageField
+
 # Create your models here.
 
 class CustomUserManager(BaseUserManager):
@@ -45,11 +47,11 @@ class CustomUser(AbstractUser):
         blank=True,
         help_text="User's date of birth"
     )
-    profile_photo = models.ImageField(
+    profile_photo = HashedImageField(
         upload_to='profile_photos/',
         null=True,
         blank=True,
-        help_text="User's profile photo"
+        help_text="User's profile photo (stored by content hash, with resized variants)"
     )
     
     objects = CustomUserManager()
@@ -1,3 +1,198 @@
-from django.test import TestCase
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from pathlib import Path
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from PIL import Image
+
+from LibraryProject import metrics
+
+from . import media
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class MetricsTests(TestCase):
+    def setUp(self):
+        metrics.REGISTRY.reset()
+
+    def test_request_is_recorded_per_view(self):
+        self.client.get("/bookshelf/")
+        text = metrics.render_text()
+        self.assertIn('django_http_requests_total{view="bookshelf:book_list"', text)
+        self.assertIn('django_http_request_duration_seconds_bucket{view="bookshelf:book_list",le="+Inf"} 1', text)
+        self.assertIn("django_http_requests_in_flight 0", text)
+
+    def test_cache_hits_and_misses(self):
+        cache.get("missing")
+        cache.set("present", 1)
+        cache.get("present")
+        text = metrics.render_text()
+        self.assertIn('django_cache_misses_total{view="<none>"} 1', text)
+        self.assertIn('django_cache_hits_total{view="<none>"} 1', text)
+
+    def test_get_many_and_get_or_set_count_each_key_once(self):
+        cache.set("present", 1)
+        cache.get_many(["present", "missing"])
+        cache.get_or_set("computed", 2)
+        cache.get_or_set("computed", 3)
+        text = metrics.render_text()
+        self.assertIn('django_cache_misses_total{view="<none>"} 2', text)
+        self.assertIn('django_cache_hits_total{view="<none>"} 2', text)
+
+    def test_dead_workers_are_folded_into_one_file(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_MULTIPROC_DIR=directory):
+            for pid in (1, 2):
+                with open(f"{directory}/worker_{pid}.json", "w") as f:
+                    json.dump({"counters": [["django_db_queries_total", [["view", "x"]], pid]],
+                               "gauges": [["django_http_requests_in_flight", [], 1]],
+                               "histograms": [["django_http_request_duration_seconds", [["view", "x"]], [1, 0, 0.5]]]}, f)
+                metrics.mark_process_dead(pid)
+            self.assertEqual(sorted(p.name for p in Path(directory).glob("*.json")), [metrics.DEAD_AGGREGATE])
+            counters, gauges, histograms = metrics.collect()
+        self.assertEqual(counters[("django_db_queries_total", (("view", "x"),))], 3)
+        self.assertEqual(histograms[("django_http_request_duration_seconds", (("view", "x"),))], [2, 0, 1.0])
+        self.assertNotIn(("django_http_requests_in_flight", ()), gauges)
+
+    def test_metrics_endpoint_merges_worker_files(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_MULTIPROC_DIR=directory):
+            with open(f"{directory}/dead_1.json", "w") as f:
+                json.dump({"counters": [["django_db_queries_total", [["view", "x"]], 3]],
+                           "gauges": [["django_http_requests_in_flight", [], 5]], "histograms": []}, f)
+            metrics.REGISTRY.inc("django_db_queries_total", (("view", "x"),), 2)
+            response = self.client.get("/metrics", REMOTE_ADDR="127.0.0.1")
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('django_db_queries_total{view="x"} 5', body)
+        self.assertNotIn("django_http_requests_in_flight 5", body)
+
+    def test_metrics_endpoint_is_restricted(self):
+        response = self.client.get("/metrics", REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(response.status_code, 403)
+        with override_settings(METRICS_BEARER_TOKEN="s3cret"):
+            self.assertEqual(self.client.get("/metrics", REMOTE_ADDR="127.0.0.1").status_code, 403)
+            response = self.client.get("/metrics", REMOTE_ADDR="127.0.0.1", HTTP_AUTHORIZATION="Bearer s3cret")
+            self.assertEqual(response.status_code, 200)
+
+    def test_in_flight_gauge_reaches_worker_file(self):
+        seen = []
+
+        def in_flight():
+            data = json.loads((Path(directory) / f"worker_{os.getpid()}.json").read_text())
+            return [value for name, _, value in data["gauges"] if name == "django_http_requests_in_flight"]
+
+        def view(request):
+            seen.append(in_flight())
+            return HttpResponse()
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_MULTIPROC_DIR=directory):
+            metrics.MetricsMiddleware(view)(RequestFactory().get("/"))
+            self.assertEqual((seen, in_flight()), ([[1.0]], [0.0]))
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+UPLOAD_TEMP_DIR = tempfile.mkdtemp()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, MEDIA_ROOT=MEDIA_ROOT, MEDIA_UPLOAD_TEMP_DIR=UPLOAD_TEMP_DIR,
+                   IMAGE_VARIANT_WORKERS=0)
+class MediaTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(UPLOAD_TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="reader", password="password123")
+        self.path = Path(MEDIA_ROOT) / "profile_photos" / ("a" * 32 + ".txt")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_bytes(b"0123456789")
+
+    def test_range_request(self):
+        response = self.client.get(f"/media/profile_photos/{self.path.name}", HTTP_RANGE="bytes=2-5")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), b"2345")
+        self.assertEqual(response["Content-Range"], "bytes 2-5/10")
+        self.assertIn("immutable", response["Cache-Control"])
+
+        response = self.client.get(f"/media/profile_photos/{self.path.name}", HTTP_RANGE="bytes=20-")
+        self.assertEqual(response.status_code, 416)
+
+    def test_etag_and_accel_redirect(self):
+        url = f"/media/profile_photos/{self.path.name}"
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with override_settings(MEDIA_ACCEL_REDIRECT_PREFIX="/protected-media/"):
+            response = self.client.get(url)
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected-media/profile_photos/{self.path.name}")
+        self.assertEqual(response.content, b"")
+
+    def test_path_traversal_is_rejected(self):
+        self.assertEqual(self.client.get("/media/../settings.py").status_code, 404)
+
+    def test_signed_chunked_upload(self):
+        self.client.force_login(self.user)
+        upload_url = self.client.post("/bookshelf/media/upload-url/").json()["upload_url"]
+        buffer = BytesIO()
+        Image.new("RGB", (300, 200), "blue").save(buffer, "PNG")
+        data = buffer.getvalue()
+        half = len(data) // 2
+        self.client.logout()
+
+        response = self.client.put(upload_url, data[:half], content_type="application/octet-stream",
+                                   HTTP_CONTENT_RANGE=f"bytes 0-{half - 1}/{len(data)}")
+        self.assertEqual(response.status_code, 202)
+        response = self.client.put(upload_url, data[half:], content_type="application/octet-stream",
+                                   HTTP_CONTENT_RANGE=f"bytes {half}-{len(data) - 1}/{len(data)}")
+        self.assertEqual(response.status_code, 201)
+        self.user.refresh_from_db()
+        self.assertRegex(self.user.profile_photo.name, r"^profile_photos/[0-9a-f]{32}\.png$")
+
+        # The URL is single-use: replaying it, whole or from the start, is refused.
+        response = self.client.put(upload_url, data, content_type="application/octet-stream")
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.put(upload_url.replace("/upload/", "/upload/x"), data,
+                                   content_type="application/octet-stream")
+        self.assertEqual(response.status_code, 403)
+
+    def test_upload_rejects_out_of_order_and_concurrent_chunks(self):
+        self.client.force_login(self.user)
+        upload_url = self.client.post("/bookshelf/media/upload-url/").json()["upload_url"]
+        response = self.client.put(upload_url, b"x" * 10, content_type="application/octet-stream",
+                                   HTTP_CONTENT_RANGE="bytes 10-19/40")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["received"], 0)
+
+        response = self.client.put(upload_url, b"x" * 10, content_type="application/octet-stream",
+                                   HTTP_CONTENT_RANGE="bytes 0-9/40")
+        self.assertEqual(response.status_code, 202)
+        token = upload_url.rstrip("/").rsplit("/", 1)[-1]
+        upload_id = signing.loads(token, salt=media.UPLOAD_SALT)["id"]
+        part_path = os.path.join(UPLOAD_TEMP_DIR, f"{upload_id}.part")
+        self.assertFalse(os.path.exists(os.path.join(MEDIA_ROOT, "partial_uploads")))
+        with open(part_path, "ab") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)  # another request is writing a chunk
+            response = self.client.put(upload_url, b"x" * 10, content_type="application/octet-stream",
+                                       HTTP_CONTENT_RANGE="bytes 10-19/40")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(os.path.getsize(part_path), 10)
+
+    def test_new_upload_prunes_expired_part_files(self):
+        stale = Path(UPLOAD_TEMP_DIR) / "abandoned.part"
+        stale.write_bytes(b"x" * 10)
+        os.utime(stale, (0, 0))
+        self.client.force_login(self.user)
+        upload_url = self.client.post("/bookshelf/media/upload-url/").json()["upload_url"]
+        response = self.client.put(upload_url, b"x" * 10, content_type="application/octet-stream",
+                                   HTTP_CONTENT_RANGE="bytes 0-9/40")
+        self.assertEqual(response.status_code, 202)
+        self.assertFalse(stale.exists())
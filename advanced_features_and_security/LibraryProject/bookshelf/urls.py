@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import media, views
 
 app_name = 'bookshelf'
 
@@ -23,4 +23,8 @@ urlpatterns = [
     
     # User permissions view
     path('permissions/', views.user_permissions_view, name='user_permissions'),
+    
+    # Signed, chunked profile photo uploads
+    path('media/upload-url/', media.profile_photo_upload_url_view, name='profile_photo_upload_url'),
+    path('media/upload/<str:token>/', media.profile_photo_upload_view, name='profile_photo_upload'),
 ]
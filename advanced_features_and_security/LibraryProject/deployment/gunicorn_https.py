@@ -51,6 +51,7 @@ preload_app = True
 raw_env = [
     'DJANGO_SETTINGS_MODULE=LibraryProject.settings',
     'PYTHONPATH=/path/to/your/project',  # Update with your project path
+    'METRICS_MULTIPROC_DIR=/dev/shm/django_metrics',  # Per-worker metric files merged by /metrics
 ]
 
 # Worker timeout
@@ -60,6 +61,19 @@ worker_tmp_dir = "/dev/shm"  # Use shared memory for better performance
 graceful_timeout = 30
 
 # Security headers (handled by reverse proxy, but can be set here too)
+def on_starting(server):
+    """Called just before the master process is initialized."""
+    # Start every deployment with an empty metrics directory.
+    metrics_dir = "/dev/shm/django_metrics"
+    os.makedirs(metrics_dir, exist_ok=True)
+    for name in os.listdir(metrics_dir):
+        os.remove(os.path.join(metrics_dir, name))
+
+def child_exit(server, worker):
+    """Called just after a worker has been exited, in the master process."""
+    from LibraryProject.metrics import mark_process_dead
+    mark_process_dead(worker.pid)
+
 def when_ready(server):
     """Called just after the server is started."""
     server.log.info("Django Library Management System is ready to serve requests")
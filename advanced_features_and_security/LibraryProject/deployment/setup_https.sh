@@ -95,7 +95,10 @@ DATABASES = {
 
 # Static files configuration
 STATIC_ROOT = BASE_DIR / 'staticfiles'
-STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'LibraryProject.storage.FingerprintedStaticFilesStorage'},
+}
 
 # Media files configuration
 MEDIA_ROOT = BASE_DIR / 'media'
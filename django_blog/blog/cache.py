@@ -0,0 +1,151 @@
+"""
+Generation counters for the blog's rendered-page caches.
+
+Post has no ``updated`` timestamp, so cached HTML is keyed by counters that
+``blog.signals`` bumps instead:
+
+- ``post`` (one per post): the post's title, content or tags changed;
+- ``comments`` (one per post): a comment on the post was added, edited or removed;
+- ``lists``: anything shown on the list pages changed (posts, tags, authors).
+
+Templates pass these to ``{% cache %}`` (see ``post_detail.html`` and
+``home.html``), and ``cache_page_for_anonymous`` keys whole pages by the
+``lists`` counter. A bump makes the old entries unreachable and they expire on
+their own, so nothing has to track which keys exist. A counter that is missing
+(evicted, or a fresh cache) starts from the current time rather than 1, so it
+never lands on a value that old entries were stored under.
+
+``cache_for_crawlers`` adds conditional GET on top of the page cache for
+feeds and sitemaps: the ``lists`` counter is the ``ETag`` and the time of the
+last ``lists`` bump is ``Last-Modified``, so a revalidating reader or crawler
+gets a ``304`` after one cache read and no database query.
+
+Use a shared cache backend (Redis, Memcached) in production so every worker
+sees the same counters.
+"""
+
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.views.decorators.http import condition
+
+
+LISTS_KEY = "blog:generation:lists"
+POST_KEY = "blog:generation:post:{}"
+COMMENTS_KEY = "blog:generation:comments:{}"
+LISTS_CHANGED_KEY = "blog:changed:lists"
+
+
+def _initial():
+    return time.time_ns() // 1000
+
+
+def generations(*keys):
+    """Current value of each counter in ``keys``, creating missing ones."""
+    values = cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        for key in missing:
+            cache.add(key, _initial(), timeout=None)
+        values.update(cache.get_many(missing))
+    return [values.get(key, 0) for key in keys]
+
+
+def _increment(keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial(), timeout=None)
+
+
+def bump(*keys):
+    _increment(keys)
+    # And again on commit: a request that read the new value before the commit
+    # may have cached a render of the old rows under it.
+    transaction.on_commit(lambda: _increment(keys))
+
+
+def lists_generation():
+    return generations(LISTS_KEY)[0]
+
+
+def post_generations(pk):
+    """``(post, comments)`` counters for post ``pk``, in one cache round trip."""
+    return tuple(generations(POST_KEY.format(pk), COMMENTS_KEY.format(pk)))
+
+
+def _touch_lists():
+    cache.set(LISTS_CHANGED_KEY, time.time(), timeout=None)
+
+
+def bump_lists():
+    bump(LISTS_KEY)
+    _touch_lists()
+    transaction.on_commit(_touch_lists)
+
+
+def lists_changed_at():
+    """When the ``lists`` counter last moved; now if that is not known."""
+    value = cache.get(LISTS_CHANGED_KEY)
+    if value is None:
+        cache.add(LISTS_CHANGED_KEY, time.time(), timeout=None)
+        value = cache.get(LISTS_CHANGED_KEY, time.time())
+    return datetime.fromtimestamp(value, tz=timezone.utc)
+
+
+def bump_posts(pks):
+    bump(*(POST_KEY.format(pk) for pk in pks))
+
+
+def bump_comments(post_id):
+    bump(COMMENTS_KEY.format(post_id))
+
+
+def cache_page_for_anonymous(view):
+    """
+    Serve GET requests from anonymous users from a page cache keyed by the
+    full path and the ``lists`` counter; logged-in users always get a fresh
+    render (their pages carry links only they may see).
+
+    Only for pages that use no CSRF token or messages for anonymous users.
+    Timeout: ``BLOG_PAGE_CACHE_TIMEOUT`` seconds (default 300).
+    """
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != "GET" or request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+        digest = hashlib.sha1(request.get_full_path().encode()).hexdigest()
+        key = f"blog:page:{lists_generation()}:{digest}"
+        response = cache.get(key)
+        if response is not None:
+            return response
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200:
+            timeout = getattr(settings, "BLOG_PAGE_CACHE_TIMEOUT", 300)
+            if getattr(response, "is_rendered", True):
+                cache.set(key, response, timeout)
+            else:
+                # TemplateResponse: store it once it has been rendered.
+                response.add_post_render_callback(lambda r: cache.set(key, r, timeout))
+        return response
+
+    return wrapper
+
+
+def cache_for_crawlers(view):
+    """
+    ``cache_page_for_anonymous`` with ``ETag``/``Last-Modified`` taken from the
+    ``lists`` counter and answered with ``304 Not Modified`` when they match.
+    For pages that only show what the ``lists`` counter covers (feeds, sitemaps).
+    """
+    return condition(
+        etag_func=lambda request, *args, **kwargs: str(lists_generation()),
+        last_modified_func=lambda request, *args, **kwargs: lists_changed_at(),
+    )(cache_page_for_anonymous(view))
@@ -0,0 +1,109 @@
+"""
+RSS and Atom feeds of the newest posts: all posts, one tag's, one author's.
+
+Each feed holds the ``FEED_ITEMS`` most recent posts with their stored
+excerpts, so a feed costs the same few queries however many posts there are.
+The views in ``blog/urls.py`` are wrapped in ``cache_for_crawlers``: rendered
+feeds are cached by the ``lists`` counter and revalidations get a ``304``.
+"""
+
+from django.contrib.auth.models import User
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from taggit.models import Tag
+
+from .cache import cache_for_crawlers
+from .views import post_list_queryset
+
+
+FEED_ITEMS = 20
+
+
+class LatestPostsFeed(Feed):
+    title = "Django Blog"
+    description = "The newest posts."
+
+    def link(self):
+        return reverse("post-list")
+
+    def posts(self, obj):
+        return post_list_queryset()
+
+    def items(self, obj=None):
+        return self.posts(obj)[:FEED_ITEMS]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.excerpt
+
+    def item_pubdate(self, item):
+        return item.published_date
+
+    def item_author_name(self, item):
+        return item.author.username
+
+    def item_categories(self, item):
+        # Prefetched by post_list_queryset.
+        return [tag.name for tag in item.tags.all()]
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class TagPostsFeed(LatestPostsFeed):
+    def get_object(self, request, tag_slug):
+        return get_object_or_404(Tag, slug=tag_slug)
+
+    def title(self, obj):
+        return f"Django Blog: posts tagged {obj.name}"
+
+    def description(self, obj):
+        return f"The newest posts tagged {obj.name}."
+
+    def link(self, obj):
+        return reverse("posts-by-tag", args=[obj.slug])
+
+    def posts(self, obj):
+        return post_list_queryset().filter(tags=obj)
+
+
+class TagPostsAtomFeed(TagPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, obj):
+        return f"Django Blog: posts by {obj.username}"
+
+    def description(self, obj):
+        return f"The newest posts by {obj.username}."
+
+    def posts(self, obj):
+        return post_list_queryset().filter(author=obj)
+
+
+class AuthorPostsAtomFeed(AuthorPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+latest_posts_rss = cache_for_crawlers(LatestPostsFeed())
+latest_posts_atom = cache_for_crawlers(LatestPostsAtomFeed())
+tag_posts_rss = cache_for_crawlers(TagPostsFeed())
+tag_posts_atom = cache_for_crawlers(TagPostsAtomFeed())
+author_posts_rss = cache_for_crawlers(AuthorPostsFeed())
+author_posts_atom = cache_for_crawlers(AuthorPostsAtomFeed())
@@ -0,0 +1,33 @@
+"""
+Create the missing Profile rows for users that predate profiles.
+
+Profiles are also created on first access (``Profile.for_user``); running
+this once after deploying avoids those writes on later requests.
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from blog.models import Profile
+
+
+class Command(BaseCommand):
+    help = "Create profiles for users that have none"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Profiles per INSERT")
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        users = get_user_model().objects.filter(profile__isnull=True).order_by("pk").values_list("pk", flat=True)
+        created = 0
+        last_pk = 0
+        while True:
+            pks = list(users.filter(pk__gt=last_pk)[:batch_size])
+            if not pks:
+                break
+            # ignore_conflicts: a profile may appear through for_user meanwhile.
+            Profile.objects.bulk_create([Profile(user_id=pk) for pk in pks], ignore_conflicts=True)
+            created += len(pks)
+            last_pk = pks[-1]
+        self.stdout.write(self.style.SUCCESS(f"Created {created} profiles"))
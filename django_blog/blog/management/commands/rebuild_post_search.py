@@ -0,0 +1,22 @@
+"""
+Rebuild the full-text search index from the posts and tags tables.
+"""
+
+from django.core.management.base import BaseCommand
+
+from blog.search import get_backend, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the blog post full-text search index"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default", help="Database alias to rebuild")
+
+    def handle(self, *args, **options):
+        backend = get_backend(options["database"])
+        if backend is None:
+            self.stdout.write("Full-text search is disabled for this database; nothing to do.")
+            return
+        rebuild_index(options["database"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the {backend.vendor} post search index"))
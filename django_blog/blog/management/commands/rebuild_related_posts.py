@@ -0,0 +1,36 @@
+"""
+Recompute the related posts shown on the post detail page.
+
+By default only posts whose title, content or tags changed since the last run
+(``Post.related_dirty``) are recomputed, and merged into the lists of the posts
+they are similar to; ``--all`` recomputes every list. Run it from cron, with an
+occasional ``--all`` to refill lists that lost entries.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored related posts of changed posts, or of all posts"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Recompute every post, not only changed ones")
+        parser.add_argument("--database", default="default", help="Database alias to rebuild")
+
+    def handle(self, *args, **options):
+        try:
+            from blog.related import rebuild_related
+        except ImportError as exc:
+            raise CommandError(f"Related posts need NumPy: {exc}")
+
+        using = options["database"]
+        pks = None
+        if not options["all"]:
+            pks = list(Post.objects.using(using).filter(related_dirty=True).values_list("pk", flat=True))
+            if not pks:
+                self.stdout.write("No changed posts")
+                return
+        count = rebuild_related(pks, using)
+        self.stdout.write(self.style.SUCCESS(f"Updated the related posts of {count} posts"))
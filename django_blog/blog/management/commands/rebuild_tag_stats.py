@@ -0,0 +1,20 @@
+"""
+Recompute the materialized tag counts and co-occurrence pairs.
+"""
+
+from django.core.management.base import BaseCommand
+
+from blog.cache import bump_lists
+from blog.tags import rebuild_tag_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the tag post counts and related-tag pairs from the tagged items"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default", help="Database alias to rebuild")
+
+    def handle(self, *args, **options):
+        rebuild_tag_stats(options["database"])
+        bump_lists()
+        self.stdout.write(self.style.SUCCESS("Rebuilt the tag statistics"))
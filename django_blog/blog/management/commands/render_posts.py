@@ -0,0 +1,85 @@
+"""
+Re-render the stored ``content_html``, ``excerpt`` and ``word_count`` of posts.
+
+Run it after changing ``blog/rendering.py``. Posts are read in primary-key
+batches and rendered by a pool of worker processes, a window of batches at a
+time, so memory stays flat however many posts there are; the parent writes
+each rendered batch back with ``bulk_update`` and bumps the cache generations
+of its posts, so cached detail pages show the new HTML at once.
+"""
+
+import multiprocessing
+import os
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from blog.cache import bump_lists, bump_posts
+from blog.models import Post
+from blog.rendering import RENDERED_FIELDS, render_content
+
+
+def _render_batch(rows):
+    return [(pk, render_content(content)) for pk, content in rows]
+
+
+def _batches(queryset, batch_size):
+    """``(pk, content)`` batches by primary key, so no cursor stays open across writes."""
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1][0]
+
+
+class Command(BaseCommand):
+    help = "Render post content to HTML, excerpt and word count in bulk"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Rendering processes")
+        parser.add_argument("--batch-size", type=int, default=500, help="Posts per batch")
+        parser.add_argument("--missing-only", action="store_true", help="Only posts never rendered")
+
+    def handle(self, *args, **options):
+        workers = max(1, options["workers"])
+        batch_size = max(1, options["batch_size"])
+        queryset = Post.objects.order_by("pk").values_list("pk", "content")
+        if options["missing_only"]:
+            queryset = queryset.filter(content_html="").exclude(content="")
+
+        pool = None
+        if workers > 1:
+            # Forked children must not share the parent's database connection.
+            connections.close_all()
+            pool = multiprocessing.get_context("fork").Pool(workers)
+        total = 0
+        try:
+            window = []
+            for batch in _batches(queryset, batch_size):
+                window.append(batch)
+                # Keep every worker busy without queueing the whole table.
+                if len(window) >= workers * 2:
+                    total += self._render(window, pool)
+                    window = []
+            total += self._render(window, pool)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        bump_lists()
+        self.stdout.write(self.style.SUCCESS(f"Rendered {total} posts"))
+
+    def _render(self, window, pool):
+        results = pool.map(_render_batch, window) if pool is not None else map(_render_batch, window)
+        count = 0
+        for rendered in results:
+            posts = [Post(pk=pk, **fields) for pk, fields in rendered]
+            Post.objects.bulk_update(posts, RENDERED_FIELDS)
+            bump_posts([post.pk for post in posts])
+            count += len(posts)
+        if count:
+            self.stdout.write(f"Rendered {count} posts")
+        return count
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:05
+
+import alx_shared.images
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0004_profile"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="profile",
+            name="image",
+            field=alx_shared.images.HashedImageField(
+                blank=True,
+                default="profile_pics/default.jpg",
+                upload_to="profile_pics/",
+            ),
+        ),
+    ]
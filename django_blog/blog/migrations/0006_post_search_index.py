@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from blog.search import get_backend
+
+    backend = get_backend(schema_editor.connection.alias, schema_editor.connection.vendor)
+    if backend is None:
+        return
+    for sql in backend.create_sql:
+        schema_editor.execute(sql, params=None)
+    schema_editor.execute(backend.populate_sql, params=None)
+
+
+def drop_search_index(apps, schema_editor):
+    from blog.search import get_backend
+
+    backend = get_backend(schema_editor.connection.alias, schema_editor.connection.vendor)
+    if backend is None:
+        return
+    for sql in backend.drop_sql:
+        schema_editor.execute(sql, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0005_profile_image_hashed"),
+        ("contenttypes", "0002_remove_content_type_name"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
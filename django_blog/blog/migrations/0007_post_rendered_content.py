@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:33
+
+from django.db import migrations, models
+
+
+def render_existing_posts(apps, schema_editor):
+    from blog.rendering import RENDERED_FIELDS, render_content
+
+    Post = apps.get_model("blog", "Post")
+    batch = []
+    for post in Post.objects.only("id", "content").order_by("pk").iterator(chunk_size=1000):
+        for field, value in render_content(post.content).items():
+            setattr(post, field, value)
+        batch.append(post)
+        if len(batch) >= 1000:
+            Post.objects.bulk_update(batch, RENDERED_FIELDS)
+            batch = []
+    Post.objects.bulk_update(batch, RENDERED_FIELDS)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0006_post_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="content_html",
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="excerpt",
+            field=models.CharField(blank=True, editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="word_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(render_existing_posts, migrations.RunPython.noop),
+    ]
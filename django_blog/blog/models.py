@@ -1,9 +1,26 @@
 from django.db import models
 from django.contrib.auth.models import User
 from taggit.managers import TaggableManager
+from taggit.models import Tag
 from django.conf import settings
 from django.db.models.signals import post_save
 
+from alx_shared.images import HashedImageField
+
+from .rendering import RENDERED_FIELDS, render_content
+
+
+def _without_counters(instance, kwargs, counters):
+    """
+    ``update_fields`` for a full save of an existing row that leaves the
+    ``counters`` alone; they are only ever changed with ``F()`` updates, so the
+    in-memory values may be stale.
+    """
+    if instance._state.adding or kwargs.get("update_fields") is not None or kwargs.get("force_insert"):
+        return kwargs
+    fields = [f.name for f in instance._meta.concrete_fields if not f.primary_key and f.name not in counters]
+    return {**kwargs, "update_fields": fields}
+
 
 class Post(models.Model):
     title = models.CharField(max_length=200)
@@ -11,39 +28,151 @@ class Post(models.Model):
     published_date = models.DateTimeField(auto_now_add=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name="posts")
     tags = TaggableManager()
+    # Rendered from content on save (see blog/rendering.py).
+    content_html = models.TextField(blank=True, editable=False)
+    excerpt = models.CharField(max_length=200, blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    # All comments including replies, kept up to date by blog.signals.
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    # Title, content or tags changed since the related posts were computed (see blog/related.py).
+    related_dirty = models.BooleanField(default=True, db_index=True, editable=False)
 
     def __str__(self) -> str:
         return self.title
 
+    def save(self, *args, **kwargs):
+        for field, value in render_content(self.content).items():
+            setattr(self, field, value)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or {"title", "content"} & set(update_fields):
+            self.related_dirty = True
+        if update_fields is not None and {"title", "content"} & set(update_fields):
+            update_fields = {*update_fields, "related_dirty"}
+            if "content" in update_fields:
+                update_fields |= set(RENDERED_FIELDS)
+            kwargs["update_fields"] = update_fields
+        super().save(*args, **_without_counters(self, kwargs, {"comment_count"}))
+
     def get_absolute_url(self):
         from django.urls import reverse
         return reverse("post-detail", kwargs={"pk": self.pk})
 
 
+class TagStat(models.Model):
+    """Number of posts per tag, kept up to date by blog.signals (see blog/tags.py)."""
+    tag = models.OneToOneField(Tag, on_delete=models.CASCADE, primary_key=True, related_name="blog_stat")
+    post_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=["-post_count"], name="blog_tagstat_count_idx")]
+
+    def __str__(self) -> str:
+        return f"{self.tag_id}: {self.post_count}"
+
+
+class TagPair(models.Model):
+    """Number of posts carrying both tags; every pair is stored in both directions."""
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="+")
+    related = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="+")
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["tag", "related"], name="blog_tagpair_unique")]
+        indexes = [models.Index(fields=["tag", "-count"], name="blog_tagpair_tag_count_idx")]
+
+    def __str__(self) -> str:
+        return f"{self.tag_id} & {self.related_id}: {self.count}"
+
+
+class RelatedPost(models.Model):
+    """One of a post's most similar posts, best first by ``rank`` (see blog/related.py)."""
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="related_posts")
+    related = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="+")
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["post", "related"], name="blog_relatedpost_unique")]
+        indexes = [models.Index(fields=["post", "rank"], name="blog_relatedpost_rank_idx")]
+
+    def __str__(self) -> str:
+        return f"{self.post_id} ~ {self.related_id}: {self.score:.3f}"
+
+
 class Comment(models.Model):
+    """
+    A comment or a reply. Threads are stored as a materialized path: ``path``
+    is the zero-padded ids of the comment's ancestors and of the comment
+    itself, each followed by "/", so ordering by path gives thread order and a
+    subtree is one range scan on the (post, path) index.
+    """
+    PATH_DIGITS = 10
+    # Replies to comments this deep become siblings rather than nesting further.
+    MAX_DEPTH = 5
+
     post = models.ForeignKey('Post', on_delete=models.CASCADE, related_name="comments")
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name="comments")
+    parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name="replies")
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    path = models.CharField(max_length=255, blank=True, editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    # Direct replies, kept up to date by blog.signals.
+    reply_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["post", "path"], name="blog_comment_thread_idx"),
+            models.Index(fields=["post", "depth", "path"], name="blog_comment_top_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"Comment by {self.author.username} on {self.post.title}"
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        if adding and self.parent_id is not None and self.parent.depth >= self.MAX_DEPTH:
+            self.parent = self.parent.parent
+        super().save(*args, **_without_counters(self, kwargs, {"reply_count"}))
+        if adding and not self.path:
+            # The path ends with our own id, so it can only be set once we have one.
+            self.path = f"{self.parent.path if self.parent_id else ''}{self.pk:0{self.PATH_DIGITS}d}/"
+            self.depth = self.path.count("/") - 1
+            Comment.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+
+    def subtree_bounds(self):
+        """``(low, high)`` such that descendants have ``low < path < high``."""
+        return self.path, self.path[:-1] + "0"  # "0" sorts right after "/"
+
+    def descendants(self):
+        low, high = self.subtree_bounds()
+        return Comment.objects.filter(post_id=self.post_id, path__gt=low, path__lt=high).order_by("path")
+
 
 class Profile(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-    image = models.ImageField(upload_to='profile_pics/', default='profile_pics/default.jpg', blank=True)
+    image = HashedImageField(upload_to='profile_pics/', default='profile_pics/default.jpg', blank=True)
     bio = models.TextField(blank=True)
 
     def __str__(self):
         return f"{self.user.username} Profile"
 
-# Signal to create or update Profile after User is saved
-def create_or_update_user_profile(sender, instance, created, **kwargs):
-    if created:
-        Profile.objects.create(user=instance)
-    else:
-        instance.profile.save()
+    @classmethod
+    def for_user(cls, user):
+        """``user``'s profile, created on first access for users that predate profiles."""
+        try:
+            return user.profile
+        except cls.DoesNotExist:
+            profile, _ = cls.objects.get_or_create(user=user)
+            user.profile = profile
+            return profile
+
+
+# Signal to give new users a Profile. Nothing on Profile is derived from User
+# fields, so other saves (e.g. the last_login update on every login) skip it.
+def create_user_profile(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Profile.objects.get_or_create(user=instance)
 
-post_save.connect(create_or_update_user_profile, sender=settings.AUTH_USER_MODEL)
+post_save.connect(create_user_profile, sender=settings.AUTH_USER_MODEL)
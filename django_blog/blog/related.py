@@ -0,0 +1,227 @@
+"""
+Precomputed "related posts" for the post detail page.
+
+Every post is described by two sparse, L2-normalised vectors:
+
+- tags, weighted by inverse document frequency (sharing a rare tag says more
+  than sharing a popular one);
+- TF-IDF of the words in its title (counted twice) and content, keeping the
+  ``MAX_TERMS`` strongest terms per post and, on larger blogs, dropping words
+  found in more than ``MAX_DF`` of the posts.
+
+The similarity of two posts is ``TAG_WEIGHT`` x tag cosine + ``TEXT_WEIGHT`` x
+text cosine. Both matrices are held as NumPy arrays in row (per post) and
+column (per feature) order, so the similarities of one post to every other
+post are a gather of the postings of its features plus one ``bincount``; no
+dense post x post matrix is ever built. The best ``BLOG_RELATED_POSTS``
+(default 5) are stored in ``RelatedPost``.
+
+``rebuild_related`` always builds both matrices from the text and tags of
+every post, so each run reads the whole blog into memory; the IDF weights and
+the vocabulary depend on all of it. Given only the changed posts, it then
+scores just those and merges them into, or drops them from, the lists of the
+posts they are now similar to, so only the writes are incremental. Lists can then fall short of
+``BLOG_RELATED_POSTS`` until the next full rebuild. Rewritten lists bump the
+posts' cache generations. Only the ``rebuild_related_posts`` command imports
+this module, so only it needs NumPy.
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from taggit.models import TaggedItem
+
+from .cache import bump_posts
+from .models import Post, RelatedPost
+
+
+TOKEN = re.compile(r"[^\W\d_]{3,}", re.UNICODE)
+TAG_WEIGHT = 0.6
+TEXT_WEIGHT = 0.4
+MAX_TERMS = 64
+MAX_DF = 0.5
+# Below this many posts every word is kept: document frequencies mean little.
+MIN_POSTS_FOR_MAX_DF = 100
+WRITE_BATCH_SIZE = 1000
+
+
+def related_count():
+    return getattr(settings, "BLOG_RELATED_POSTS", 5)
+
+
+def _words(title, content):
+    return [word.lower() for word in TOKEN.findall(f"{title} {title} {content}")]
+
+
+class _SparseMatrix:
+    """A posts x features matrix in row (CSR) and column (CSC) order."""
+
+    def __init__(self, rows, cols, values, shape):
+        n_rows, n_cols = shape
+        order = np.lexsort((cols, rows))
+        self.row_ptr = np.searchsorted(rows[order], np.arange(n_rows + 1))
+        self.row_cols = cols[order]
+        self.row_values = values[order]
+        order = np.argsort(cols, kind="stable")
+        self.col_ptr = np.searchsorted(cols[order], np.arange(n_cols + 1))
+        self.col_rows = rows[order]
+        self.col_values = values[order]
+
+    def products(self, row):
+        """``(rows, partial products)`` of ``row`` with every row sharing a feature; sum per row for dot products."""
+        start, end = self.row_ptr[row], self.row_ptr[row + 1]
+        features, weights = self.row_cols[start:end], self.row_values[start:end]
+        starts, lengths = self.col_ptr[features], self.col_ptr[features + 1] - self.col_ptr[features]
+        # Indices of every posting of every feature of the row, without a Python loop.
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        postings = np.arange(lengths.sum()) + offsets
+        return self.col_rows[postings], self.col_values[postings] * np.repeat(weights, lengths)
+
+
+def _normalised_matrix(doc_features, weights, n_docs, n_features, max_features=None):
+    """Matrix of ``weights[feature] * count`` per doc, each row L2-normalised."""
+    rows, cols, values = [], [], []
+    for doc, features in enumerate(doc_features):
+        weighted = [(feature, count * weights[feature]) for feature, count in features.items() if weights[feature] > 0]
+        if max_features is not None and len(weighted) > max_features:
+            weighted.sort(key=lambda item: -item[1])
+            weighted = weighted[:max_features]
+        norm = math.sqrt(sum(value * value for _, value in weighted)) or 1.0
+        for feature, value in weighted:
+            rows.append(doc)
+            cols.append(feature)
+            values.append(value / norm)
+    return _SparseMatrix(
+        np.asarray(rows, dtype=np.int64),
+        np.asarray(cols, dtype=np.int64),
+        np.asarray(values, dtype=np.float64),
+        (n_docs, n_features),
+    )
+
+
+class RelatedIndex:
+    """Tag and text vectors of every post, for scoring posts against each other."""
+
+    def __init__(self, using="default"):
+        posts = Post.objects.using(using).order_by("pk").values_list("pk", "title", "content")
+        self.pks = []
+        vocabulary = {}
+        doc_terms = []
+        for pk, title, content in posts.iterator(chunk_size=2000):
+            self.pks.append(pk)
+            doc_terms.append(Counter(vocabulary.setdefault(word, len(vocabulary)) for word in _words(title, content)))
+        self.row_of = {pk: row for row, pk in enumerate(self.pks)}
+
+        tag_ids = {}
+        doc_tags = [Counter() for _ in self.pks]
+        tagged = TaggedItem.objects.using(using).filter(
+            content_type__app_label="blog", content_type__model="post"
+        ).values_list("object_id", "tag_id")
+        for object_id, tag_id in tagged.iterator(chunk_size=5000):
+            row = self.row_of.get(object_id)
+            if row is not None:
+                doc_tags[row][tag_ids.setdefault(tag_id, len(tag_ids))] = 1
+
+        n = len(self.pks)
+        self.terms = _normalised_matrix(
+            doc_terms, self._idf(doc_terms, len(vocabulary), max_df=n >= MIN_POSTS_FOR_MAX_DF),
+            n, len(vocabulary), MAX_TERMS,
+        )
+        self.tags = _normalised_matrix(doc_tags, self._idf(doc_tags, len(tag_ids)), n, len(tag_ids))
+
+    def _idf(self, docs, n_features, max_df=False):
+        df = np.zeros(n_features)
+        for features in docs:
+            for feature in features:
+                df[feature] += 1
+        idf = np.log((1 + len(docs)) / (1 + df)) + 1
+        if max_df:
+            idf[df > MAX_DF * len(docs)] = 0
+        return idf
+
+    def scores(self, pk):
+        """``(rows, similarities)`` of every post with something in common with ``pk``."""
+        row = self.row_of[pk]
+        tag_rows, tag_products = self.tags.products(row)
+        term_rows, term_products = self.terms.products(row)
+        rows = np.concatenate([tag_rows, term_rows])
+        products = np.concatenate([tag_products * TAG_WEIGHT, term_products * TEXT_WEIGHT])
+        others, inverse = np.unique(rows, return_inverse=True)
+        totals = np.bincount(inverse, weights=products)
+        keep = (others != row) & (totals > 1e-9)
+        return others[keep], totals[keep]
+
+    def top(self, pk, k):
+        """The ``k`` most similar posts to ``pk`` as ``[(other_pk, score)]``, best first."""
+        others, totals = self.scores(pk)
+        if len(totals) > k:
+            best = np.argpartition(-totals, k - 1)[:k]
+            others, totals = others[best], totals[best]
+        order = np.lexsort((others, -totals))
+        return [(self.pks[others[i]], float(totals[i])) for i in order]
+
+
+def rebuild_related(pks=None, using="default", k=None):
+    """
+    Recompute the related posts of every post, or of ``pks`` and of the posts
+    whose lists gain or lose one of them. Returns the number of lists written.
+    """
+    k = k or related_count()
+    index = RelatedIndex(using)
+    targets = index.pks if pks is None else [pk for pk in pks if pk in index.row_of]
+    lists = {pk: index.top(pk, k) for pk in targets}
+
+    if pks is not None:
+        changed = set(targets) | set(pks)
+        candidates = defaultdict(list)
+        for pk in targets:
+            others, totals = index.scores(pk)
+            for other, score in zip(others.tolist(), totals.tolist()):
+                other_pk = index.pks[other]
+                if other_pk not in changed:
+                    candidates[other_pk].append((pk, score))
+        affected = set(candidates)
+        affected.update(
+            RelatedPost.objects.using(using).filter(related_id__in=changed).values_list("post_id", flat=True)
+        )
+        current = defaultdict(list)
+        rows = (
+            RelatedPost.objects.using(using)
+            .filter(post_id__in=affected)
+            .order_by("post_id", "rank")
+            .values_list("post_id", "related_id", "score")
+        )
+        for post_id, related_id, score in rows.iterator(chunk_size=5000):
+            current[post_id].append((related_id, score))
+        for pk in affected - changed:
+            kept = [item for item in current[pk] if item[0] not in changed]
+            merged = sorted(kept + candidates.get(pk, []), key=lambda item: (-item[1], item[0]))[:k]
+            # Most candidates score below a full list; leave those lists alone.
+            if merged != current[pk]:
+                lists[pk] = merged
+
+    _write(lists, using)
+    Post.objects.using(using).filter(pk__in=targets).update(related_dirty=False)
+    return len(lists)
+
+
+def _write(lists, using):
+    pks = list(lists)
+    for start in range(0, len(pks), WRITE_BATCH_SIZE):
+        batch = pks[start:start + WRITE_BATCH_SIZE]
+        with transaction.atomic(using=using):
+            RelatedPost.objects.using(using).filter(post_id__in=batch).delete()
+            RelatedPost.objects.using(using).bulk_create(
+                [
+                    RelatedPost(post_id=pk, related_id=related_id, score=score, rank=rank)
+                    for pk in batch
+                    for rank, (related_id, score) in enumerate(lists[pk])
+                ],
+                batch_size=WRITE_BATCH_SIZE,
+            )
+        # The list is part of the cached post body.
+        bump_posts(batch)
@@ -0,0 +1,40 @@
+"""
+Content pipeline: turn a post's plain-text ``content`` into what templates show.
+
+``render_content`` is run by ``Post.save()`` (and in bulk by the
+``render_posts`` command), so pages read stored results instead of running
+text filters per request:
+
+- ``content_html``: escaped text with paragraphs and line breaks, the same
+  markup the ``linebreaks`` filter produced; safe to output with ``|safe``
+  because the text is escaped before any tag is added;
+- ``excerpt``: the first ``EXCERPT_LENGTH`` characters with whitespace
+  collapsed, for list pages;
+- ``word_count``.
+
+The functions only depend on the text, so they can run in worker processes.
+"""
+
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+
+
+EXCERPT_LENGTH = 160
+RENDERED_FIELDS = ("content_html", "excerpt", "word_count")
+
+
+def render_html(text):
+    return linebreaks(text or "", autoescape=True)
+
+
+def make_excerpt(text):
+    return Truncator(" ".join((text or "").split())).chars(EXCERPT_LENGTH)
+
+
+def render_content(text):
+    """``{"content_html": ..., "excerpt": ..., "word_count": ...}`` for ``text``."""
+    return {
+        "content_html": render_html(text),
+        "excerpt": make_excerpt(text),
+        "word_count": len((text or "").split()),
+    }
@@ -0,0 +1,278 @@
+"""
+Full-text search over post titles, contents and tag names.
+
+Two backends, chosen by the database vendor:
+
+- SQLite: an FTS5 virtual table ``blog_post_fts`` keyed by post id, ranked
+  with BM25 (title matches weigh most, then tags, then content) and with
+  ``highlight``/``snippet`` for the result list.
+- PostgreSQL: a table ``blog_post_search`` holding a weighted ``tsvector`` per
+  post under a GIN index, ranked with length-normalised ``ts_rank_cd`` and
+  highlighted with ``ts_headline``.
+
+Every search term becomes a prefix query (``djan`` matches "Django") and all
+terms must match, in any field. Results are ranked and paged inside the index
+(``ORDER BY rank LIMIT n OFFSET m``), so only one page of posts is loaded and
+highlighted per request; the number of hits is capped at
+``BLOG_SEARCH_MAX_RESULTS`` (default 1000) so that counting a very common term
+stays cheap.
+
+The index is kept up to date by ``blog.signals``. Set ``BLOG_SEARCH_BACKEND``
+to ``None`` to disable it; the search view then falls back to ``icontains``.
+"""
+
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post
+
+
+TOKEN = re.compile(r"\w+", re.UNICODE)
+MAX_TOKENS = 8
+INDEX_BATCH_SIZE = 500
+# Highlight markers; escape() leaves these control characters alone.
+START, STOP = "\x02", "\x03"
+
+_POST_TAG_NAMES = (
+    "SELECT {aggregate} FROM taggit_taggeditem ti "
+    "JOIN taggit_tag t ON t.id = ti.tag_id "
+    "JOIN django_content_type ct ON ct.id = ti.content_type_id "
+    "WHERE ct.app_label = 'blog' AND ct.model = 'post' AND ti.object_id = p.id"
+)
+
+
+class SQLiteFTSBackend:
+    vendor = "sqlite"
+    create_sql = [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS blog_post_fts USING fts5("
+        "title, content, tags, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    ]
+    drop_sql = ["DROP TABLE IF EXISTS blog_post_fts"]
+    clear_sql = "DELETE FROM blog_post_fts"
+    populate_sql = (
+        "INSERT INTO blog_post_fts (rowid, title, content, tags) "
+        "SELECT p.id, p.title, p.content, "
+        "COALESCE((" + _POST_TAG_NAMES.format(aggregate="group_concat(t.name, ' ')") + "), '') "
+        "FROM blog_post p"
+    )
+    delete_sql = "DELETE FROM blog_post_fts WHERE rowid = %s"
+    insert_sql = "INSERT INTO blog_post_fts (rowid, title, content, tags) VALUES (%s, %s, %s, %s)"
+    count_sql = "SELECT count(*) FROM (SELECT 1 FROM blog_post_fts WHERE blog_post_fts MATCH %s LIMIT %s)"
+    # bm25 is negative, lower is better; rowid breaks ties so pages are stable.
+    page_sql = (
+        "SELECT rowid, "
+        "highlight(blog_post_fts, 0, char(2), char(3)), "
+        "snippet(blog_post_fts, 1, char(2), char(3), '…', 32) "
+        "FROM blog_post_fts WHERE blog_post_fts MATCH %s "
+        "ORDER BY bm25(blog_post_fts, 10.0, 1.0, 4.0), rowid DESC LIMIT %s OFFSET %s"
+    )
+
+    def query(self, tokens):
+        return " AND ".join(f'"{token}"*' for token in tokens)
+
+    def upsert(self, cursor, rows):
+        cursor.executemany(self.delete_sql, [(row[0],) for row in rows])
+        cursor.executemany(self.insert_sql, rows)
+
+
+class PostgresSearchBackend:
+    vendor = "postgresql"
+    create_sql = [
+        "CREATE TABLE IF NOT EXISTS blog_post_search ("
+        "post_id bigint PRIMARY KEY REFERENCES blog_post (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+        "document tsvector NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS blog_post_search_document ON blog_post_search USING GIN (document)",
+    ]
+    drop_sql = ["DROP TABLE IF EXISTS blog_post_search"]
+    clear_sql = "DELETE FROM blog_post_search"
+    document_sql = (
+        "setweight(to_tsvector('simple', {title}), 'A') || "
+        "setweight(to_tsvector('simple', {tags}), 'B') || "
+        "setweight(to_tsvector('simple', {content}), 'D')"
+    )
+    populate_sql = (
+        "INSERT INTO blog_post_search (post_id, document) "
+        "SELECT p.id, " + document_sql.format(
+            title="p.title",
+            content="p.content",
+            tags="COALESCE((" + _POST_TAG_NAMES.format(aggregate="string_agg(t.name, ' ')") + "), '')",
+        ) + " FROM blog_post p"
+    )
+    delete_sql = "DELETE FROM blog_post_search WHERE post_id = %s"
+    insert_sql = (
+        "INSERT INTO blog_post_search (post_id, document) "
+        "VALUES (%s, " + document_sql.format(title="%s", content="%s", tags="%s") + ") "
+        "ON CONFLICT (post_id) DO UPDATE SET document = EXCLUDED.document"
+    )
+    count_sql = (
+        "SELECT count(*) FROM (SELECT 1 FROM blog_post_search "
+        "WHERE document @@ to_tsquery('simple', %s) LIMIT %s) hits"
+    )
+    # ts_headline is expensive, so it only runs on the page of hits.
+    page_sql = (
+        "SELECT hits.post_id, "
+        "ts_headline('simple', p.title, hits.query, 'HighlightAll=true, StartSel=\x02, StopSel=\x03'), "
+        "ts_headline('simple', p.content, hits.query, "
+        "'MaxFragments=2, MaxWords=32, MinWords=12, FragmentDelimiter=\" … \", StartSel=\x02, StopSel=\x03') "
+        "FROM (SELECT s.post_id, q.query, ts_rank_cd(s.document, q.query, 1) AS rank "
+        "FROM blog_post_search s, to_tsquery('simple', %s) AS q(query) WHERE s.document @@ q.query "
+        "ORDER BY rank DESC, s.post_id DESC LIMIT %s OFFSET %s) hits "
+        "JOIN blog_post p ON p.id = hits.post_id ORDER BY hits.rank DESC, hits.post_id DESC"
+    )
+
+    def query(self, tokens):
+        return " & ".join(f"{token}:*" for token in tokens)
+
+    def upsert(self, cursor, rows):
+        # Rows are (id, title, content, tags); the document puts tags before content.
+        cursor.executemany(self.insert_sql, [(pk, title, tags, content) for pk, title, content, tags in rows])
+
+
+BACKENDS = {
+    "sqlite": SQLiteFTSBackend(),
+    "postgresql": PostgresSearchBackend(),
+}
+
+
+def get_backend(using="default", vendor=None):
+    """
+    The search backend for database ``using``, or None when search is disabled
+    or the database has no backend.
+    """
+    setting = getattr(settings, "BLOG_SEARCH_BACKEND", "auto")
+    if setting is None:
+        return None
+    if setting == "auto":
+        setting = vendor or connections[using].vendor
+    return BACKENDS.get(setting)
+
+
+def tokenize(text):
+    """Lowercased word tokens of a search box query; punctuation is dropped."""
+    return [token.lower() for token in TOKEN.findall(text)][:MAX_TOKENS]
+
+
+def highlight(text):
+    """Escape ``text`` and turn the index's match markers into ``<mark>`` tags."""
+    return mark_safe(escape(text).replace(START, "<mark>").replace(STOP, "</mark>"))
+
+
+class SearchResults:
+    """
+    Ranked hits for one query, sliced by ``Paginator``.
+
+    ``count()`` and each slice run one query against the index; a slice then
+    loads its posts from ``queryset`` and sets ``search_title`` and
+    ``search_snippet`` (highlighted HTML) on each.
+    """
+
+    def __init__(self, backend, query, queryset):
+        self.backend = backend
+        self.query = query
+        self.queryset = queryset
+        self.max_results = getattr(settings, "BLOG_SEARCH_MAX_RESULTS", 1000)
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            if self.query is None:
+                self._count = 0
+            else:
+                with connections[self.queryset.db].cursor() as cursor:
+                    cursor.execute(self.backend.count_sql, [self.query, self.max_results])
+                    self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, page):
+        if not isinstance(page, slice) or page.step is not None:
+            raise TypeError("SearchResults only supports slicing")
+        start = page.start or 0
+        stop = min(page.stop if page.stop is not None else self.max_results, self.max_results)
+        if self.query is None or stop <= start:
+            return []
+        with connections[self.queryset.db].cursor() as cursor:
+            cursor.execute(self.backend.page_sql, [self.query, stop - start, start])
+            hits = cursor.fetchall()
+        posts = self.queryset.in_bulk([pk for pk, _, _ in hits])
+        results = []
+        for pk, title, snippet in hits:
+            post = posts.get(pk)
+            if post is None:
+                # Deleted since the index was read.
+                continue
+            post.search_title = highlight(title or post.title)
+            post.search_snippet = highlight(snippet or "")
+            results.append(post)
+        return results
+
+
+def search(text, queryset=None):
+    """
+    ``SearchResults`` for the posts matching every word of ``text``.
+
+    Returns None when there is no index for the queryset's database.
+    """
+    if queryset is None:
+        queryset = Post.objects.all()
+    backend = get_backend(queryset.db)
+    if backend is None:
+        return None
+    tokens = tokenize(text)
+    return SearchResults(backend, backend.query(tokens) if tokens else None, queryset)
+
+
+def _rows(posts):
+    return [
+        (post.pk, post.title, post.content, " ".join(tag.name for tag in post.tags.all()))
+        for post in posts
+    ]
+
+
+def index_posts(posts, using="default"):
+    """Add or refresh ``posts`` in the index; prefetch their tags to save queries."""
+    backend = get_backend(using)
+    posts = list(posts)
+    if backend is None or not posts:
+        return
+    rows = _rows(posts)
+    with connections[using].cursor() as cursor:
+        for start in range(0, len(rows), INDEX_BATCH_SIZE):
+            backend.upsert(cursor, rows[start:start + INDEX_BATCH_SIZE])
+
+
+def index_post_ids(pks, using="default"):
+    """Refresh the posts with primary keys ``pks``, in batches."""
+    pks = list(pks)
+    for start in range(0, len(pks), INDEX_BATCH_SIZE):
+        index_posts(
+            Post.objects.using(using).filter(pk__in=pks[start:start + INDEX_BATCH_SIZE]).prefetch_related("tags"),
+            using,
+        )
+
+
+def unindex_posts(pks, using="default"):
+    backend = get_backend(using)
+    pks = list(pks)
+    if backend is None or not pks:
+        return
+    with connections[using].cursor() as cursor:
+        cursor.executemany(backend.delete_sql, [(pk,) for pk in pks])
+
+
+def rebuild_index(using="default"):
+    """Recreate the index from the posts and tags tables."""
+    backend = get_backend(using)
+    if backend is None:
+        return
+    with connections[using].cursor() as cursor:
+        for sql in backend.create_sql:
+            cursor.execute(sql)
+        cursor.execute(backend.clear_sql)
+        cursor.execute(backend.populate_sql)
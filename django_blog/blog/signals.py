@@ -0,0 +1,118 @@
+"""
+Keep the post search index, the tag statistics (``blog.tags``) and the
+page-cache generations (``blog.cache``) in step with posts, comments and tags,
+and flag posts whose related posts (``blog.related``) need recomputing.
+
+Tags are usually saved after the post (``PostForm`` saves them with
+``save_m2m``), so tag changes on a post reindex it through ``m2m_changed``,
+and renaming or deleting a tag reindexes every post carrying it.
+"""
+
+from django.conf import settings
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from taggit.models import Tag, TaggedItem
+
+from .cache import bump_comments, bump_lists, bump_posts
+from .models import Comment, Post
+from .search import index_post_ids, index_posts, unindex_posts
+from .tags import tags_added, tags_removed
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, raw=False, using="default", **kwargs):
+    if not raw:
+        index_posts([instance], using)
+    bump_posts([instance.pk])
+    bump_lists()
+
+
+def _post_tag_ids(post, using):
+    return set(post.tags.using(using).values_list("pk", flat=True))
+
+
+@receiver(pre_delete, sender=Post)
+def remember_post_tags(sender, instance, using="default", **kwargs):
+    # The tagged items go with the post, without m2m_changed.
+    instance._deleted_tag_ids = _post_tag_ids(instance, using)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, using="default", **kwargs):
+    unindex_posts([instance.pk], using)
+    tags_removed(getattr(instance, "_deleted_tag_ids", ()), (), using)
+    bump_posts([instance.pk])
+    bump_lists()
+
+
+@receiver(m2m_changed, sender=TaggedItem)
+def post_tags_changed(sender, instance, action, pk_set=None, using="default", **kwargs):
+    if not isinstance(instance, Post):
+        return
+    if action == "pre_clear":
+        instance._cleared_tag_ids = _post_tag_ids(instance, using)
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if action == "post_add":
+        tags_added(pk_set or (), _post_tag_ids(instance, using), using)
+    elif action == "post_remove":
+        tags_removed(pk_set or (), _post_tag_ids(instance, using), using)
+    else:
+        tags_removed(getattr(instance, "_cleared_tag_ids", ()), (), using)
+    Post.objects.using(using).filter(pk=instance.pk).update(related_dirty=True)
+    index_post_ids([instance.pk], using)
+    bump_posts([instance.pk])
+    bump_lists()
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Post.objects.filter(pk=instance.post_id).update(comment_count=F("comment_count") + 1)
+        if instance.parent_id is not None:
+            Comment.objects.filter(pk=instance.parent_id).update(reply_count=F("reply_count") + 1)
+    bump_comments(instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    # Replies are deleted along with their parent, each sending this signal.
+    Post.objects.filter(pk=instance.post_id, comment_count__gt=0).update(comment_count=F("comment_count") - 1)
+    if instance.parent_id is not None:
+        Comment.objects.filter(pk=instance.parent_id, reply_count__gt=0).update(reply_count=F("reply_count") - 1)
+    bump_comments(instance.post_id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def author_saved(sender, instance, created, update_fields=None, **kwargs):
+    # List pages show author usernames; logins only touch last_login.
+    if not created and (update_fields is None or "username" in update_fields):
+        bump_lists()
+
+
+def _tagged_post_ids(tag, using):
+    return list(Post.objects.using(using).filter(tags=tag).values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Tag)
+def tag_saved(sender, instance, created, raw=False, using="default", **kwargs):
+    if not created and not raw:
+        pks = _tagged_post_ids(instance, using)
+        index_post_ids(pks, using)
+        bump_posts(pks)
+        bump_lists()
+
+
+@receiver(pre_delete, sender=Tag)
+def remember_tagged_posts(sender, instance, using="default", **kwargs):
+    instance._tagged_post_ids = _tagged_post_ids(instance, using)
+
+
+@receiver(post_delete, sender=Tag)
+def tag_deleted(sender, instance, using="default", **kwargs):
+    pks = getattr(instance, "_tagged_post_ids", [])
+    index_post_ids(pks, using)
+    bump_posts(pks)
+    bump_lists()
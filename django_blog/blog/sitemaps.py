@@ -0,0 +1,35 @@
+"""
+Sitemap of every post and every tag page, split into pages of ``limit`` URLs
+under a sitemap index (``/sitemap.xml``). Cached and served with conditional
+GET like the feeds (see ``cache_for_crawlers``).
+"""
+
+from django.contrib.sitemaps import Sitemap
+from django.urls import reverse
+from taggit.models import Tag
+
+from .models import Post
+
+
+class PostSitemap(Sitemap):
+    limit = 5000
+
+    def items(self):
+        # Ordered by pk so a page holds the same posts from one request to the next.
+        return Post.objects.order_by("pk").only("pk", "published_date")
+
+    def lastmod(self, item):
+        return item.published_date
+
+
+class TagSitemap(Sitemap):
+    limit = 5000
+
+    def items(self):
+        return Tag.objects.filter(blog_stat__post_count__gt=0).order_by("pk").only("pk", "slug")
+
+    def location(self, item):
+        return reverse("posts-by-tag", args=[item.slug])
+
+
+SITEMAPS = {"posts": PostSitemap, "tags": TagSitemap}
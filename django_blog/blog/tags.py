@@ -0,0 +1,133 @@
+"""
+Materialized tag statistics: posts per tag (``TagStat``) and posts per pair
+of tags (``TagPair``, stored in both directions).
+
+``blog.signals`` applies each change to a post's tags as it happens:
+``tags_added``/``tags_removed`` get the tags that changed and the tags the post
+keeps, and adjust the affected rows with one ``UPDATE`` per table, so the tag
+cloud, tag pages and related tags never run ``GROUP BY`` over
+``taggit_taggeditem``. ``rebuild_tag_stats`` (and the ``rebuild_tag_stats``
+command) recomputes both tables from scratch.
+"""
+
+import math
+
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import F, Q
+
+from .cache import lists_generation
+from .models import TagPair, TagStat
+
+
+CLOUD_SIZES = 5
+RELATED_LIMIT = 10
+
+_POST_TAGGED_ITEMS = (
+    "SELECT ti.object_id, ti.tag_id FROM taggit_taggeditem ti "
+    "JOIN django_content_type ct ON ct.id = ti.content_type_id "
+    "WHERE ct.app_label = 'blog' AND ct.model = 'post'"
+)
+REBUILD_SQL = [
+    "DELETE FROM blog_tagpair",
+    "DELETE FROM blog_tagstat",
+    "INSERT INTO blog_tagstat (tag_id, post_count) "
+    f"SELECT items.tag_id, COUNT(*) FROM ({_POST_TAGGED_ITEMS}) items GROUP BY items.tag_id",
+    "INSERT INTO blog_tagpair (tag_id, related_id, count) "
+    f"SELECT a.tag_id, b.tag_id, COUNT(*) FROM ({_POST_TAGGED_ITEMS}) a "
+    f"JOIN ({_POST_TAGGED_ITEMS}) b ON b.object_id = a.object_id AND b.tag_id <> a.tag_id "
+    "GROUP BY a.tag_id, b.tag_id",
+]
+
+
+def _apply(changed, kept, delta, using):
+    changed, kept = set(changed), set(kept) - set(changed)
+    if not changed:
+        return
+    every = changed | kept
+    # Pairs between a changed tag and any other tag of the post, both directions.
+    pairs = [(a, b) for a in every for b in every if a != b and (a in changed or b in changed)]
+    with transaction.atomic(using=using):
+        stats = TagStat.objects.using(using)
+        tag_pairs = TagPair.objects.using(using)
+        if delta > 0:
+            stats.bulk_create([TagStat(tag_id=pk) for pk in changed], ignore_conflicts=True)
+            tag_pairs.bulk_create([TagPair(tag_id=a, related_id=b) for a, b in pairs], ignore_conflicts=True)
+        stats = stats.filter(tag_id__in=changed)
+        if delta < 0:
+            stats = stats.filter(post_count__gt=0)
+        stats.update(post_count=F("post_count") + delta)
+        if pairs:
+            affected = tag_pairs.filter(tag_id__in=every, related_id__in=every).filter(
+                Q(tag_id__in=changed) | Q(related_id__in=changed)
+            )
+            if delta > 0:
+                affected.update(count=F("count") + delta)
+            else:
+                affected.filter(count__gt=0).update(count=F("count") + delta)
+                affected.filter(count__lte=0).delete()
+
+
+def tags_added(added, kept, using="default"):
+    """A post gained the tags ``added`` while carrying ``kept``."""
+    _apply(added, kept, 1, using)
+
+
+def tags_removed(removed, kept, using="default"):
+    """A post lost the tags ``removed`` and still carries ``kept``."""
+    _apply(removed, kept, -1, using)
+
+
+def rebuild_tag_stats(using="default"):
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        for sql in REBUILD_SQL:
+            cursor.execute(sql)
+
+
+def _cached(name, compute, timeout=600):
+    key = f"blog:tags:{name}:{lists_generation()}"
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout)
+    return value
+
+
+def _cloud():
+    rows = list(
+        TagStat.objects.filter(post_count__gt=0)
+        .order_by("tag__name")
+        .values_list("tag__name", "tag__slug", "post_count")
+    )
+    if not rows:
+        return []
+    low = math.log(min(count for _, _, count in rows))
+    spread = math.log(max(count for _, _, count in rows)) - low or 1.0
+    return [
+        {
+            "name": name,
+            "slug": slug,
+            "count": count,
+            # 1..CLOUD_SIZES on a log scale, so a few huge tags don't flatten the rest.
+            "size": 1 + round((math.log(count) - low) / spread * (CLOUD_SIZES - 1)),
+        }
+        for name, slug, count in rows
+    ]
+
+
+def tag_cloud():
+    """Every tag in use, alphabetically, with its post count and a 1..5 size class."""
+    return _cached("cloud", _cloud)
+
+
+def related_tags(tag, limit=RELATED_LIMIT):
+    """The tags most often used together with ``tag``: ``[{"name", "slug", "count"}]``."""
+    return _cached(
+        f"related:{tag.pk}:{limit}",
+        lambda: [
+            {"name": name, "slug": slug, "count": count}
+            for name, slug, count in TagPair.objects.filter(tag=tag, count__gt=0)
+            .order_by("-count", "related__name")
+            .values_list("related__name", "related__slug", "count")[:limit]
+        ],
+    )
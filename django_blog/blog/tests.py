@@ -1,3 +1,574 @@
-from django.test import TestCase
+import re
+import tempfile
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from alx_shared.profiling import QueryBudgetMixin
+
+from . import views
+from .feeds import FEED_ITEMS
+from .models import Comment, Post, Profile, RelatedPost, TagPair, TagStat
+from .search import rebuild_index, search
+from .tags import rebuild_tag_stats
+
+
+class PostListQueryTests(QueryBudgetMixin, TestCase):
+    """List pages run a fixed number of queries, however many posts and tags there are."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("writer", password="pass12345")
+        for i in range(25):
+            post = Post.objects.create(title=f"Post {i}", content="Django content", author=cls.author)
+            post.tags.add("django", f"topic-{i}")
+
+    def setUp(self):
+        cache.clear()
+
+    def assertPostPage(self, response, count):
+        self.assertEqual(response.status_code, 200)
+        posts = response.context["posts"]
+        self.assertEqual(len(posts), count)
+        self.assertContains(response, reverse("posts-by-tag", args=["django"]), count=count)
+
+    def test_post_list(self):
+        # count, page of posts, tags for the page
+        with self.assertQueryBudget(3, max_duplicates=0):
+            response = self.client.get(reverse("post-list"))
+        self.assertPostPage(response, views.POSTS_PER_PAGE)
+        self.assertTrue(response.context["is_paginated"])
+        self.assertEqual(response.context["posts"][0].title, "Post 24")
+
+    def test_post_list_last_page(self):
+        with self.assertQueryBudget(3, max_duplicates=0):
+            response = self.client.get(reverse("post-list"), {"page": 3})
+        self.assertPostPage(response, 5)
+        self.assertEqual(list(response.context["posts"])[-1].title, "Post 0")
+
+    def test_posts_by_tag_view(self):
+        # tag with its count, page of posts, tags for the page, related tags
+        with self.assertQueryBudget(4, max_duplicates=0):
+            response = self.client.get(reverse("posts-by-tag", args=["django"]))
+        self.assertPostPage(response, views.POSTS_PER_PAGE)
+        self.assertEqual(response.context["paginator"].count, 25)
+
+    def test_posts_by_unknown_tag(self):
+        response = self.client.get(reverse("posts-by-tag", args=["nope"]))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "No posts yet.")
+
+    def test_posts_by_tag_function(self):
+        request = RequestFactory().get("/", {"page": 2})
+        with self.assertQueryBudget(3, max_duplicates=0):
+            response = views.posts_by_tag(request, "DJANGO")
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Page 2 of 3")
+
+    def test_search(self):
+        Post.objects.filter(title="Post 3").update(content="something else")
+        # count and page from the index, page of posts, tags for the page
+        with self.assertQueryBudget(4, max_duplicates=0):
+            response = self.client.get(reverse("search"), {"q": "django"})
+        self.assertPostPage(response, views.POSTS_PER_PAGE)
+        # Matches on both content and tag name are listed once.
+        self.assertEqual(response.context["paginator"].count, 25)
+        self.assertContains(response, "?q=django&amp;page=2")
+
+
+class PostSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("writer", password="pass12345")
+        cls.title_hit = Post.objects.create(title="Async views in Django", content="How it works.", author=cls.author)
+        cls.content_hit = Post.objects.create(
+            title="Weekly notes", content="Mostly about async <b>Django</b> views this week.", author=cls.author
+        )
+        cls.tag_hit = Post.objects.create(title="Release day", content="Shipping today.", author=cls.author)
+        cls.tag_hit.tags.add("django-async")
+        cls.other = Post.objects.create(title="Gardening", content="Tomatoes and peppers.", author=cls.author)
+
+    def titles(self, text):
+        return [post.title for post in search(text)[0:10]]
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.titles("async django"), ["Async views in Django", "Release day", "Weekly notes"])
+
+    def test_prefix_and_case(self):
+        self.assertEqual(self.titles("TOMAT"), ["Gardening"])
+        self.assertEqual(self.titles("  "), [])
+        self.assertEqual(search("xyz").count(), 0)
+
+    def test_highlighting_escapes_content(self):
+        post = search("async")[0:10][2]
+        self.assertEqual(post.pk, self.content_hit.pk)
+        self.assertIn("<mark>async</mark>", post.search_snippet)
+        self.assertIn("&lt;b&gt;Django&lt;/b&gt;", post.search_snippet)
+        self.assertEqual(search("async")[0:1][0].search_title, "<mark>Async</mark> views in Django")
+
+    def test_index_follows_edits_and_tags(self):
+        self.other.title = "Django in the garden"
+        self.other.save()
+        self.assertIn("Django in the garden", self.titles("garden django"))
+        self.other.tags.add("compost")
+        self.assertEqual(self.titles("compost"), ["Django in the garden"])
+        self.other.tags.clear()
+        self.assertEqual(self.titles("compost"), [])
+
+        tag = self.tag_hit.tags.get()
+        tag.name = "celebration"
+        tag.save()
+        self.assertEqual(self.titles("celebration"), ["Release day"])
+        tag.delete()
+        self.assertEqual(self.titles("celebration"), [])
+
+        self.title_hit.delete()
+        self.assertNotIn("Async views in Django", self.titles("async"))
+
+    def test_rebuild(self):
+        rebuild_index()
+        self.assertEqual(self.titles("django"), ["Async views in Django", "Release day", "Weekly notes"])
+
+    def test_view_paginates_highlighted_hits(self):
+        response = self.client.get(reverse("search"), {"q": "async"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["paginator"].count, 3)
+        self.assertContains(response, "<mark>Async</mark> views in Django", html=False)
+
+    @override_settings(BLOG_SEARCH_BACKEND=None)
+    def test_view_without_index(self):
+        response = self.client.get(reverse("search"), {"q": "tomatoes"})
+        self.assertEqual([post.title for post in response.context["posts"]], ["Gardening"])
+
+
+class PageCacheTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("writer", password="pass12345")
+        cls.post = Post.objects.create(title="Cached post", content="First version", author=cls.author)
+        cls.post.tags.add("django")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous_pages_are_cached_until_posts_change(self):
+        for url in (reverse("blog-home"), reverse("post-list"), reverse("posts-by-tag", args=["django"])):
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), self.post.title)
+                with self.assertQueryBudget(0):
+                    self.assertContains(self.client.get(url), self.post.title)
+
+                self.post.title = f"Renamed for {url}"
+                self.post.save()
+                self.assertContains(self.client.get(url), f"Renamed for {url}")
+
+    def test_logged_in_users_get_fresh_pages(self):
+        self.client.force_login(self.author)
+        url = reverse("post-list")
+        self.client.get(url)
+        with self.assertQueryBudget(10) as recorder:
+            self.assertContains(self.client.get(url), "New Post")
+        self.assertGreater(recorder.count, 0)
+
+    def test_home_fragment_survives_logged_in_renders(self):
+        self.client.force_login(self.author)
+        self.client.get(reverse("blog-home"))
+        # session, user and the page count; the post list comes from the fragment cache
+        with self.assertQueryBudget(3):
+            self.assertContains(self.client.get(reverse("blog-home")), "First version")
+
+    def test_home_is_paginated(self):
+        Post.objects.bulk_create(
+            Post(title=f"Bulk {i}", content="Body", content_html="<p>Body</p>", author=self.author)
+            for i in range(views.POSTS_PER_PAGE)
+        )
+        first = self.client.get(reverse("blog-home"))
+        self.assertEqual(len(first.context["posts"]), views.POSTS_PER_PAGE)
+        self.assertContains(first, "Page 1 of 2")
+        second = self.client.get(reverse("blog-home"), {"page": 2})
+        self.assertEqual(len(second.context["posts"]), 1)
+
+    def test_render_posts_refreshes_cached_bodies(self):
+        url = reverse("post-detail", args=[self.post.pk])
+        self.assertContains(self.client.get(url), "First version")
+        # Bypasses the signals, like a change to the renderer would.
+        Post.objects.filter(pk=self.post.pk).update(content="Second version")
+        call_command("render_posts", "--workers", "1", stdout=StringIO())
+        self.assertContains(self.client.get(url), "Second version")
+
+    def test_detail_fragments(self):
+        url = reverse("post-detail", args=[self.post.pk])
+        self.assertContains(self.client.get(url), "No comments yet.")
+        # Only the post itself; body, tags and comments come from the cache.
+        with self.assertQueryBudget(1):
+            self.assertContains(self.client.get(url), "First version")
+
+        Comment.objects.create(post=self.post, author=self.author, content="Nice one")
+        self.assertContains(self.client.get(url), "Nice one")
+
+        tag = self.post.tags.get()
+        tag.name = "Renamed tag"
+        tag.save()
+        self.assertContains(self.client.get(url), "Renamed tag")
+
+    def test_comment_links_are_per_user(self):
+        comment = Comment.objects.create(post=self.post, author=self.author, content="Mine")
+        url = reverse("post-detail", args=[self.post.pk])
+        edit = reverse("comment-update", args=[comment.pk])
+        self.assertNotContains(self.client.get(url), edit)
+        self.client.force_login(self.author)
+        self.assertContains(self.client.get(url), edit)
+
+
+class RenderedContentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("writer", password="pass12345")
+
+    def test_rendered_on_save(self):
+        post = Post.objects.create(
+            title="Rendered", content="First <para>\nline two\n\nSecond " + "word " * 60, author=self.author
+        )
+        self.assertEqual(post.word_count, 65)
+        self.assertTrue(post.content_html.startswith("<p>First &lt;para&gt;<br>line two</p>\n\n<p>Second"))
+        self.assertEqual(len(post.excerpt), 160)
+        self.assertTrue(post.excerpt.startswith("First <para> line two Second"))
+
+        post.content = "Changed"
+        post.save(update_fields=["content"])
+        post.refresh_from_db()
+        self.assertEqual((post.content_html, post.excerpt, post.word_count), ("<p>Changed</p>", "Changed", 1))
+
+    def test_render_posts_command(self):
+        posts = [Post.objects.create(title=f"Post {i}", content=f"Body {i}\nmore", author=self.author) for i in range(7)]
+        Post.objects.update(content_html="", excerpt="", word_count=0)
+        for workers in ("1", "2"):
+            with self.subTest(workers=workers):
+                call_command("render_posts", "--workers", workers, "--batch-size", "3", stdout=StringIO())
+                self.assertEqual(
+                    list(Post.objects.order_by("pk").values_list("content_html", "excerpt", "word_count")),
+                    [(f"<p>Body {i}<br>more</p>", f"Body {i} more", 3) for i in range(len(posts))],
+                )
+                Post.objects.filter(pk=posts[0].pk).update(content_html="")
+
+        out = StringIO()
+        call_command("render_posts", "--workers", "1", "--missing-only", stdout=out)
+        self.assertIn("Rendered 1 posts", out.getvalue())
+
+
+class TagStatsTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("writer", password="pass12345")
+
+    def setUp(self):
+        cache.clear()
+
+    def new_post(self, *tags):
+        post = Post.objects.create(title="Tagged", content="Text", author=self.author)
+        post.tags.add(*tags)
+        return post
+
+    def counts(self):
+        return dict(TagStat.objects.filter(post_count__gt=0).values_list("tag__name", "post_count"))
+
+    def pairs(self):
+        return {
+            (tag, related): count
+            for tag, related, count in TagPair.objects.values_list("tag__name", "related__name", "count")
+        }
+
+    def assertMatchesRebuild(self):
+        counts, pairs = self.counts(), self.pairs()
+        rebuild_tag_stats()
+        self.assertEqual((counts, pairs), (self.counts(), self.pairs()))
+
+    def test_incremental_updates(self):
+        first = self.new_post("python", "django")
+        second = self.new_post("python", "web")
+        self.assertEqual(self.counts(), {"python": 2, "django": 1, "web": 1})
+        self.assertEqual(self.pairs()[("python", "django")], 1)
+        self.assertEqual(self.pairs()[("django", "python")], 1)
+        self.assertMatchesRebuild()
+
+        first.tags.add("web")
+        second.tags.remove("python")
+        self.assertEqual(self.counts(), {"python": 1, "django": 1, "web": 2})
+        self.assertEqual(self.pairs()[("python", "web")], 1)
+        self.assertMatchesRebuild()
+
+        second.tags.set(["django", "api"])
+        first.tags.clear()
+        self.assertEqual(self.counts(), {"django": 1, "api": 1})
+        self.assertEqual(self.pairs(), {("django", "api"): 1, ("api", "django"): 1})
+        self.assertMatchesRebuild()
+
+        second.delete()
+        self.assertEqual((self.counts(), self.pairs()), ({}, {}))
+
+    def test_tag_cloud(self):
+        for _ in range(4):
+            self.new_post("python")
+        self.new_post("django", "python")
+        url = reverse("tag-cloud")
+        response = self.client.get(url)
+        self.assertEqual(
+            [(tag["name"], tag["count"], tag["size"]) for tag in response.context["tags"]],
+            [("django", 1, 1), ("python", 5, 5)],
+        )
+        self.assertContains(response, 'class="tag-size-5"')
+
+        self.client.force_login(self.author)
+        # session and user; the cloud itself comes from the cache
+        with self.assertQueryBudget(2):
+            self.client.get(url)
+
+    def test_tag_page_uses_materialized_counts(self):
+        for _ in range(3):
+            self.new_post("python", "django")
+        self.new_post("python", "web")
+        with self.assertQueryBudget(4) as recorder:
+            response = self.client.get(reverse("posts-by-tag", args=["python"]))
+        self.assertFalse([sql for sql in recorder.fingerprints if "COUNT(" in sql.upper()])
+        self.assertEqual(response.context["paginator"].count, 4)
+        self.assertEqual(
+            [(tag["name"], tag["count"]) for tag in response.context["related_tags"]], [("django", 3), ("web", 1)]
+        )
+
+
+class ProfileTests(QueryBudgetMixin, TestCase):
+    def test_created_with_user_and_untouched_on_login(self):
+        user = User.objects.create_user("reader", password="pass12345")
+        self.assertTrue(Profile.objects.filter(user=user).exists())
+        with self.assertQueryBudget(20) as recorder:
+            self.assertTrue(self.client.login(username="reader", password="pass12345"))
+        self.assertFalse([sql for sql in recorder.fingerprints if "blog_profile" in sql])
+
+    def test_created_on_first_access(self):
+        user = User.objects.create_user("old-timer", password="pass12345")
+        Profile.objects.filter(user=user).delete()
+        user = User.objects.get(pk=user.pk)
+        self.client.force_login(user)
+        response = self.client.get(reverse("profile"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["profile"].user, user)
+        self.assertEqual(Profile.objects.filter(user=user).count(), 1)
+
+    def test_backfill_command(self):
+        users = [User.objects.create_user(f"user{i}") for i in range(5)]
+        Profile.objects.filter(user__in=users[1:]).delete()
+        out = StringIO()
+        call_command("backfill_profiles", "--batch-size", "2", stdout=out)
+        self.assertIn("Created 4 profiles", out.getvalue())
+        self.assertEqual(Profile.objects.filter(user__in=users).count(), 5)
+
+
+class ThreadedCommentTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("writer", password="pass12345")
+        cls.post = Post.objects.create(title="Busy post", content="Text", author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def comment(self, content, parent=None):
+        return Comment.objects.create(post=self.post, author=self.author, content=content, parent=parent)
+
+    def test_paths_and_counters(self):
+        root = self.comment("root")
+        reply = self.comment("reply", root)
+        nested = self.comment("nested", reply)
+        sibling = self.comment("second root")
+        self.assertEqual(root.path, f"{root.pk:010d}/")
+        self.assertEqual((nested.path, nested.depth), (f"{root.pk:010d}/{reply.pk:010d}/{nested.pk:010d}/", 2))
+        self.assertEqual(list(root.descendants()), [reply, nested])
+        self.assertEqual(list(sibling.descendants()), [])
+
+        root.refresh_from_db()
+        self.post.refresh_from_db()
+        self.assertEqual((root.reply_count, self.post.comment_count), (1, 4))
+
+        # Full saves of stale instances leave the counters alone.
+        self.post.title = "Still busy"
+        self.post.save()
+        root.content = "edited"
+        root.save()
+        self.assertEqual(Post.objects.get(pk=self.post.pk).comment_count, 4)
+        self.assertEqual(Comment.objects.get(pk=root.pk).reply_count, 1)
+
+        reply.delete()
+        self.assertEqual(Post.objects.get(pk=self.post.pk).comment_count, 2)
+        self.assertEqual(Comment.objects.get(pk=root.pk).reply_count, 0)
+
+    def test_depth_is_capped(self):
+        parent = self.comment("0")
+        for depth in range(1, Comment.MAX_DEPTH + 3):
+            parent = self.comment(str(depth), parent)
+        self.assertEqual(parent.depth, Comment.MAX_DEPTH)
+
+    def test_detail_page_is_bounded(self):
+        roots = [self.comment(f"root {i}") for i in range(25)]
+        for root in roots[:3]:
+            for i in range(30):
+                self.comment(f"reply {i}", root)
+        url = reverse("post-detail", args=[self.post.pk])
+        # post, its tags, related posts, top-level count, page of top-level comments; no replies
+        with self.assertQueryBudget(5, max_duplicates=0):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context["comment_page"]), 20)
+        self.assertNotContains(response, "reply 0")
+        self.assertContains(response, "30 replies", count=3)
+        self.assertContains(response, "Comments (115)")
+        self.assertContains(self.client.get(url, {"page": 2}), "root 24")
+
+    def test_replies_page(self):
+        root = self.comment("root")
+        reply = self.comment("reply", root)
+        self.comment("nested", reply)
+        response = self.client.get(reverse("comment-replies", args=[root.pk]))
+        self.assertEqual([(r.content, r.indent) for r in response.context["replies"]], [("reply", 0), ("nested", 1)])
+        self.assertContains(response, 'class="comment-depth-1"')
+
+    def test_reply_form(self):
+        root = self.comment("root")
+        reply = self.comment("reply", root)
+        self.client.force_login(self.author)
+        url = reverse("comment-create", args=[self.post.pk])
+        self.assertContains(self.client.get(url, {"parent": reply.pk}), "Reply to writer")
+        response = self.client.post(url, {"content": "deeper", "parent": reply.pk})
+        self.assertRedirects(response, reverse("comment-replies", args=[root.pk]))
+        self.assertEqual(Comment.objects.get(content="deeper").parent, reply)
+
+        other = Post.objects.create(title="Other", content="Text", author=self.author)
+        response = self.client.post(reverse("comment-create", args=[other.pk]), {"content": "x", "parent": root.pk})
+        self.assertEqual(response.status_code, 404)
+
+
+class RelatedPostTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("writer", password="pass12345")
+        cls.queries = cls.new_post("Django queries", "Filtering querysets with the ORM.", "django", "orm")
+        cls.performance = cls.new_post("Django performance", "Fewer queries with select_related.", "django", "orm")
+        cls.templates = cls.new_post("Django templates", "Template inheritance through blocks.", "django")
+        cls.bread = cls.new_post("Sourdough bread", "Flour, water, salt.", "baking")
+
+    @classmethod
+    def new_post(cls, title, content, *tags):
+        post = Post.objects.create(title=title, content=content, author=cls.author)
+        post.tags.add(*tags)
+        return post
+
+    def setUp(self):
+        cache.clear()
+
+    def lists(self):
+        lists = {}
+        for post, related in RelatedPost.objects.order_by("post", "rank").values_list("post__title", "related__title"):
+            lists.setdefault(post, []).append(related)
+        return lists
+
+    def rebuild(self, *args):
+        call_command("rebuild_related_posts", *args, stdout=StringIO())
+
+    def test_rebuild_all(self):
+        self.rebuild("--all")
+        lists = self.lists()
+        self.assertEqual(lists["Django queries"], ["Django performance", "Django templates"])
+        self.assertEqual(lists["Django templates"][0], "Django queries")
+        self.assertNotIn("Sourdough bread", lists)
+        self.assertFalse(Post.objects.filter(related_dirty=True).exists())
+
+    def test_changes_are_merged_incrementally(self):
+        self.rebuild("--all")
+        starter = self.new_post("Sourdough starter", "Feeding flour to a starter.", "baking")
+        self.queries.tags.remove("orm")
+        self.assertEqual(set(Post.objects.filter(related_dirty=True)), {starter, self.queries})
+        self.rebuild()
+        incremental = self.lists()
+        self.assertEqual(incremental["Sourdough bread"], ["Sourdough starter"])
+        self.rebuild("--all")
+        self.assertEqual(incremental, self.lists())
+
+    def test_detail_page(self):
+        self.rebuild("--all")
+        url = reverse("post-detail", args=[self.queries.pk])
+        response = self.client.get(url)
+        self.assertEqual(
+            [item.related.title for item in response.context["related_posts"]],
+            ["Django performance", "Django templates"],
+        )
+        self.assertContains(response, "Related posts")
+
+
+class FeedTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("writer", password="pass12345")
+        cls.other = User.objects.create_user("other", password="pass12345")
+        for i in range(FEED_ITEMS + 5):
+            post = Post.objects.create(title=f"Post {i}", content=f"Body {i}", author=cls.author)
+            post.tags.add("even" if i % 2 == 0 else "odd")
+        Post.objects.create(title="Guest post", content="Hello", author=cls.other)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds(self):
+        with self.assertQueryBudget(2):
+            response = self.client.get(reverse("feed-atom"))
+        self.assertEqual(response["Content-Type"], "application/atom+xml; charset=utf-8")
+        self.assertEqual(response.content.count(b"<entry>"), FEED_ITEMS)
+        self.assertContains(response, "Guest post")
+        self.assertNotContains(response, "<title>Post 0</title>")
+
+        rss = self.client.get(reverse("tag-feed-rss", args=["odd"]))
+        self.assertContains(rss, "<title>Post 1</title>")
+        self.assertNotContains(rss, "<title>Post 2</title>")
+        author = self.client.get(reverse("author-feed-atom", args=["other"]))
+        self.assertEqual(author.content.count(b"<entry>"), 1)
+        self.assertEqual(self.client.get(reverse("tag-feed-rss", args=["missing"])).status_code, 404)
+
+    def test_conditional_get(self):
+        url = reverse("feed-rss")
+        response = self.client.get(url)
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+        with self.assertQueryBudget(0):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        Post.objects.create(title="Fresh post", content="New", author=self.author)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Fresh post")
+
+    def test_sitemap(self):
+        index = self.client.get(reverse("sitemap"))
+        self.assertContains(index, "sitemap-posts.xml")
+        self.assertIn("ETag", index)
+        response = self.client.get(reverse("sitemap-section", args=["posts"]))
+        self.assertEqual(response.content.count(b"<url>"), FEED_ITEMS + 6)
+        self.assertContains(response, reverse("post-detail", args=[Post.objects.latest("pk").pk]))
+        self.assertContains(self.client.get(reverse("sitemap-section", args=["tags"])), "/tags/odd/")
+
+
+class StaticFilesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_collected_files_are_fingerprinted_and_precompressed(self):
+        with tempfile.TemporaryDirectory() as root, override_settings(STATIC_ROOT=root):
+            call_command("collectstatic", interactive=False, verbosity=0)
+            page = self.client.get(reverse("post-list")).content.decode()
+            url = re.search(r'href="(/static/blog/css/styles\.[0-9a-f]{12}\.css)"', page).group(1)
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Content-Encoding"], "gzip")
+            self.assertIn("immutable", response["Cache-Control"])
+            response.close()
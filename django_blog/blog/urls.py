@@ -1,6 +1,9 @@
 from django.urls import path
 from django.contrib.auth import views as auth_views
-from . import views
+from django.contrib.sitemaps import views as sitemap_views
+from . import feeds, views
+from .cache import cache_for_crawlers
+from .sitemaps import SITEMAPS
 
 
 urlpatterns = [
@@ -10,6 +13,7 @@ urlpatterns = [
     path("register/", views.register, name="register"),
     path("profile/", views.profile, name="profile"),
     # Tag and search
+    path("tags/", views.tag_cloud_view, name="tag-cloud"),
     path("tags/<slug:tag_slug>/", views.PostByTagListView.as_view(), name="posts-by-tag"),
     path("search/", views.search, name="search"),
     # CRUD for posts
@@ -24,8 +28,28 @@ urlpatterns = [
     path("post/<int:pk>/delete/", views.PostDeleteView.as_view(), name="post-delete-alt"),
     # Comment routes
     path("posts/<int:post_id>/comments/new/", views.CommentCreateView.as_view(), name="comment-create"),
+    path("comments/<int:pk>/replies/", views.CommentRepliesView.as_view(), name="comment-replies"),
     path("comments/<int:pk>/edit/", views.CommentUpdateView.as_view(), name="comment-update"),
     path("comments/<int:pk>/delete/", views.CommentDeleteView.as_view(), name="comment-delete"),
+    # Feeds and sitemap
+    path("feeds/rss/", feeds.latest_posts_rss, name="feed-rss"),
+    path("feeds/atom/", feeds.latest_posts_atom, name="feed-atom"),
+    path("feeds/tag/<slug:tag_slug>/rss/", feeds.tag_posts_rss, name="tag-feed-rss"),
+    path("feeds/tag/<slug:tag_slug>/atom/", feeds.tag_posts_atom, name="tag-feed-atom"),
+    path("feeds/author/<str:username>/rss/", feeds.author_posts_rss, name="author-feed-rss"),
+    path("feeds/author/<str:username>/atom/", feeds.author_posts_atom, name="author-feed-atom"),
+    path(
+        "sitemap.xml",
+        cache_for_crawlers(sitemap_views.index),
+        {"sitemaps": SITEMAPS, "sitemap_url_name": "sitemap-section"},
+        name="sitemap",
+    ),
+    path(
+        "sitemap-<section>.xml",
+        cache_for_crawlers(sitemap_views.sitemap),
+        {"sitemaps": SITEMAPS},
+        name="sitemap-section",
+    ),
 ]
 
 
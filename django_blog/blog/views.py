@@ -1,50 +1,117 @@
-from django.views.generic import ListView
-from .models import Post
+from django.shortcuts import get_object_or_404, render, redirect
+from django.contrib.auth.decorators import login_required
+from django.contrib import messages
+from django.core.paginator import Paginator
+from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
+from django.utils.functional import SimpleLazyObject
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
+from django.db.models import Q
 from taggit.models import Tag
+from .models import Post, Comment, Profile, RelatedPost
+from .cache import cache_page_for_anonymous, lists_generation, post_generations
+from .forms import RegistrationForm, ProfileForm, PostForm, CommentForm
+from .search import search as search_posts
+from .tags import related_tags, tag_cloud
+
+
+POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 20
+REPLIES_PER_PAGE = 50
+
+
+def post_list_queryset():
+    """
+    Posts as the list templates render them: author joined, tags prefetched
+    in one query per page, newest first (pk breaks ties so pages are stable).
+    Lists show the stored excerpt, so the full text is not loaded.
+    """
+    return (
+        Post.objects.select_related("author")
+        .prefetch_related("tags")
+        .defer("content", "content_html")
+        .order_by("-published_date", "-pk")
+    )
+
+
+def paginate(request, queryset):
+    """The context ``ListView`` gives a paginated template, for function views."""
+    paginator = Paginator(queryset, POSTS_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get("page"))
+    return {
+        "paginator": paginator,
+        "page_obj": page_obj,
+        "is_paginated": page_obj.has_other_pages(),
+        "posts": page_obj.object_list,
+    }
+
+
+class CountedPaginator(Paginator):
+    """Paginator given its total up front (e.g. from ``TagStat``), saving the COUNT query."""
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            self.count = count
+
+
+@method_decorator(cache_page_for_anonymous, name="dispatch")
 class PostByTagListView(ListView):
     model = Post
     context_object_name = "posts"
     template_name = "blog/post_list.html"
+    paginate_by = POSTS_PER_PAGE
 
     def get_queryset(self):
         tag_slug = self.kwargs.get("tag_slug")
-        self.tag = Tag.objects.filter(slug=tag_slug).first()
+        self.tag = Tag.objects.filter(slug=tag_slug).select_related("blog_stat").first()
         if self.tag:
-            return Post.objects.filter(tags__slug=tag_slug).order_by("-published_date")
+            return post_list_queryset().filter(tags=self.tag)
         return Post.objects.none()
 
+    def get_paginator(self, queryset, per_page, **kwargs):
+        stat = getattr(self.tag, "blog_stat", None) if self.tag else None
+        return CountedPaginator(queryset, per_page, count=stat.post_count if stat else None, **kwargs)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["tag"] = getattr(self, "tag", None)
+        context["related_tags"] = related_tags(self.tag) if self.tag else []
         return context
-from django.shortcuts import render, redirect
-from django.contrib.auth.decorators import login_required
-from django.contrib import messages
-from django.urls import reverse_lazy
-from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
-from django.db.models import Q
-from .models import Post, Comment
-from .forms import RegistrationForm, ProfileForm, PostForm, CommentForm
+
+
+@cache_page_for_anonymous
+def tag_cloud_view(request):
+    return render(request, "blog/tag_cloud.html", {"tags": tag_cloud()})
+
+
 def posts_by_tag(request, tag_name):
-    posts = Post.objects.filter(tags__name__iexact=tag_name).order_by("-published_date")
-    return render(request, "blog/post_list.html", {"posts": posts, "tag_name": tag_name})
+    posts = post_list_queryset().filter(tags__name__iexact=tag_name)
+    return render(request, "blog/post_list.html", {**paginate(request, posts), "tag_name": tag_name})
 
 def search(request):
-    query = request.GET.get("q", "")
-    posts = Post.objects.all()
+    query = request.GET.get("q", "").strip()
+    posts = post_list_queryset()
     if query:
-        posts = posts.filter(
-            Q(title__icontains=query) |
-            Q(content__icontains=query) |
-            Q(tags__name__icontains=query)
-        ).distinct().order_by("-published_date")
-    return render(request, "blog/post_list.html", {"posts": posts, "query": query})
-
-
+        # Ranked, highlighted hits from the full-text index when there is one.
+        results = search_posts(query, posts)
+        if results is not None:
+            posts = results
+        else:
+            posts = posts.filter(
+                Q(title__icontains=query) |
+                Q(content__icontains=query) |
+                Q(tags__name__icontains=query)
+            ).distinct()
+    return render(request, "blog/post_list.html", {**paginate(request, posts), "query": query})
+
+
+@cache_page_for_anonymous
 def home(request):
-    posts = Post.objects.select_related("author").order_by("-published_date")
-    return render(request, "blog/home.html", {"posts": posts})
+    # The page is lazy: its posts are only loaded when the cached fragment has expired.
+    posts = Post.objects.select_related("author").defer("content").order_by("-published_date", "-pk")
+    return render(request, "blog/home.html", {**paginate(request, posts), "lists_version": lists_generation()})
 
 
 def register(request):
@@ -69,24 +136,46 @@ def profile(request):
             return redirect("profile")
     else:
         form = ProfileForm(instance=request.user)
-    return render(request, "registration/profile.html", {"form": form})
+    return render(request, "registration/profile.html", {"form": form, "profile": Profile.for_user(request.user)})
 
 
+@method_decorator(cache_page_for_anonymous, name="dispatch")
 class PostListView(ListView):
     model = Post
     context_object_name = "posts"
-    ordering = ["-published_date"]
     template_name = "blog/post_list.html"
+    paginate_by = POSTS_PER_PAGE
+
+    def get_queryset(self):
+        return post_list_queryset()
 
 
 class PostDetailView(DetailView):
     model = Post
     template_name = "blog/post_detail.html"
 
+    def get_queryset(self):
+        return Post.objects.select_related("author")
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["comments"] = self.object.comments.select_related("author").order_by("created_at")
+        # Versions of the cached body/tags and comment thread fragments.
+        context["post_version"], context["comments_version"] = post_generations(self.object.pk)
+        # Top-level comments only, a page at a time; replies load on their own
+        # page. Lazy, so a cached comments fragment costs no queries.
+        top_level = self.object.comments.filter(depth=0).select_related("author").order_by("path")
+        context["comment_page"] = SimpleLazyObject(
+            lambda: Paginator(top_level, COMMENTS_PER_PAGE).get_page(self.request.GET.get("page"))
+        )
         context["comment_form"] = CommentForm()
+        # Precomputed by the rebuild_related_posts command; one query, and none
+        # when the cached body fragment is used.
+        context["related_posts"] = (
+            RelatedPost.objects.filter(post=self.object)
+            .select_related("related")
+            .only("related__id", "related__title", "related__published_date")
+            .order_by("rank")
+        )
         return context
 
 
@@ -121,19 +210,58 @@ class PostDeleteView(LoginRequiredMixin, PostAuthorRequiredMixin, DeleteView):
 
 
 class CommentCreateView(LoginRequiredMixin, CreateView):
+    """New comment on a post, or a reply when ``parent`` is given (query string or form)."""
     model = Comment
     form_class = CommentForm
 
+    def get_parent(self):
+        if not hasattr(self, "parent"):
+            parent_id = self.request.POST.get("parent") or self.request.GET.get("parent")
+            self.parent = None
+            if parent_id:
+                self.parent = get_object_or_404(
+                    Comment.objects.select_related("author"), pk=parent_id, post_id=self.kwargs["post_id"]
+                )
+        return self.parent
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["parent"] = self.get_parent()
+        return context
+
     def form_valid(self, form):
-        post = Post.objects.get(pk=self.kwargs["post_id"])
+        post = get_object_or_404(Post, pk=self.kwargs["post_id"])
         form.instance.post = post
         form.instance.author = self.request.user
+        form.instance.parent = self.get_parent()
         return super().form_valid(form)
 
     def get_success_url(self):
+        if self.object.parent_id is not None:
+            # Back to the thread the reply belongs to.
+            return reverse_lazy("comment-replies", kwargs={"pk": int(self.object.path[:Comment.PATH_DIGITS])})
         return self.object.post.get_absolute_url() if hasattr(self.object.post, "get_absolute_url") else reverse_lazy("post-detail", kwargs={"pk": self.object.post.pk})
 
 
+class CommentRepliesView(ListView):
+    """Every reply under a comment, in thread order, a page at a time."""
+    context_object_name = "replies"
+    template_name = "blog/comment_replies.html"
+    paginate_by = REPLIES_PER_PAGE
+
+    def get_queryset(self):
+        self.comment = get_object_or_404(Comment.objects.select_related("author", "post"), pk=self.kwargs["pk"])
+        return self.comment.descendants().select_related("author")
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        replies = list(context["replies"])
+        for reply in replies:
+            reply.indent = reply.depth - self.comment.depth - 1
+        context.update(replies=replies, comment=self.comment, post=self.comment.post)
+        return context
+
+
 class CommentAuthorRequiredMixin(UserPassesTestMixin):
     def test_func(self):
         comment = self.get_object()
@@ -37,12 +37,17 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.sitemaps",
     "blog",
     "taggit",
+    "alx_shared",  # {% load image_variants %}
 ]
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    # Serves STATIC_ROOT before the rest of the stack runs (see alx_shared/storage.py).
+    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "alx_shared.profiling.QueryProfilingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -126,6 +131,11 @@ STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
 STATIC_ROOT = BASE_DIR / "staticfiles"
+# Hashed file names, gzip/brotli copies made by collectstatic, immutable caching.
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "alx_shared.storage.FingerprintedStaticFilesStorage"},
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -135,3 +145,18 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Auth redirects
 LOGIN_REDIRECT_URL = "profile"
 LOGOUT_REDIRECT_URL = "login"
+
+# Full-text post search (see blog/search.py): "auto" picks the index for the
+# database vendor, None falls back to icontains matching.
+BLOG_SEARCH_BACKEND = "auto"
+BLOG_SEARCH_MAX_RESULTS = 1000
+
+# Rendered fragments and anonymous pages are cached here (see blog/cache.py).
+# Use a shared backend such as Redis or Memcached when running several workers.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "django-blog",
+    }
+}
+BLOG_PAGE_CACHE_TIMEOUT = 300
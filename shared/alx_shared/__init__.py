@@ -0,0 +1,15 @@
+"""
+Django helpers shared by the projects in this repository.
+
+Each project lists this package in its ``requirements.txt`` (as a path
+relative to the project directory) and imports it as ``alx_shared``:
+
+- ``alx_shared.profiling``: per-request query and latency instrumentation.
+- ``alx_shared.images``: content-hashed image uploads with resized variants,
+  and the ``image_variants`` template tags (list ``"alx_shared"`` in
+  ``INSTALLED_APPS`` to use them).
+- ``alx_shared.db_routing``: primary/replica routing with read-your-writes
+  stickiness, and ``DATABASES`` entries from URLs.
+- ``alx_shared.storage``: WhiteNoise static files storage with content-hashed,
+  pre-compressed files.
+"""
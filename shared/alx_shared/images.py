@@ -0,0 +1,197 @@
+"""
+Resized, recompressed variants for user-uploaded images.
+
+Uploads go through ``HashedImageField``, which stores them under a name derived
+from their content. Variant names are derived from that name, so they can be
+computed without a lookup and never change for a given image::
+
+    profiles/3fa9c1....jpg  ->  profiles/variants/3fa9c1...-128w.webp
+
+Variants are generated once the upload has committed, on a small thread pool
+(Pillow releases the GIL while resizing and encoding), and lazily on first use
+for images uploaded before this existed. Until a variant exists the original
+URL is returned.
+
+Settings:
+- ``IMAGE_VARIANT_WIDTHS`` (default ``(64, 128, 256)``)
+- ``IMAGE_VARIANT_WORKERS`` (default 2; 0 generates inline, e.g. in tests)
+- ``IMAGE_VARIANT_MEMO_SIZE`` (default 10000): originals remembered as done or
+  skipped per process; the least recently used are forgotten and re-checked.
+
+Templates render variants with the ``picture`` tag from ``image_variants``
+(add ``"alx_shared"`` to ``INSTALLED_APPS`` to load it).
+"""
+
+import hashlib
+import logging
+import os
+import posixpath
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models.fields.files import ImageField, ImageFieldFile
+
+
+logger = logging.getLogger(__name__)
+
+# extension -> (Pillow format, quality)
+VARIANT_FORMATS = {"webp": ("WEBP", 80), "jpg": ("JPEG", 82)}
+
+
+class _LRUSet:
+    """Thread-safe set of at most ``size`` names, forgetting the least recently used."""
+
+    def __init__(self, size):
+        self.size = size
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+
+    def __contains__(self, name):
+        with self._lock:
+            if name not in self._items:
+                return False
+            self._items.move_to_end(name)
+            return True
+
+    def add(self, name):
+        with self._lock:
+            self._items[name] = None
+            self._items.move_to_end(name)
+            if len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+_lock = threading.Lock()
+_memo_size = getattr(settings, "IMAGE_VARIANT_MEMO_SIZE", 10000)
+_ready = _LRUSet(_memo_size)  # originals whose variants are known to exist
+_skipped = _LRUSet(_memo_size)  # originals that could not be processed; not retried while remembered
+_pending = set()
+_executor = None
+
+
+def variant_widths():
+    return tuple(sorted(getattr(settings, "IMAGE_VARIANT_WIDTHS", (64, 128, 256))))
+
+
+def variant_name(name, width, ext):
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, "variants", f"{stem}-{width}w.{ext}")
+
+
+def closest_width(width):
+    """Smallest configured width that is at least ``width``."""
+    widths = variant_widths()
+    return next((w for w in widths if w >= width), widths[-1])
+
+
+def generate_variants(name, storage):
+    """Write every missing variant of ``name``; existing ones are left alone."""
+    from PIL import Image, ImageOps
+
+    with storage.open(name, "rb") as f:
+        image = Image.open(f)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    for width in variant_widths():
+        if image.width > width:
+            resized = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        else:
+            resized = image
+        for ext, (fmt, quality) in VARIANT_FORMATS.items():
+            target = variant_name(name, width, ext)
+            if storage.exists(target):
+                continue
+            output = resized
+            if fmt == "JPEG" and output.mode != "RGB":
+                output = output.convert("RGB")
+            elif output.mode not in ("RGB", "RGBA"):
+                output = output.convert("RGBA")
+            buffer = BytesIO()
+            output.save(buffer, fmt, quality=quality, optimize=True)
+            storage.save(target, ContentFile(buffer.getvalue()))
+
+
+def _run(name, storage):
+    try:
+        generate_variants(name, storage)
+    except FileNotFoundError:
+        # e.g. a default image that was never deployed; nothing to resize.
+        logger.warning("Image %s not found; serving it without variants", name)
+        _skipped.add(name)
+    except Exception:
+        logger.exception("Could not generate variants for %s", name)
+        _skipped.add(name)
+    else:
+        _ready.add(name)
+    finally:
+        with _lock:
+            _pending.discard(name)
+
+
+def schedule_variants(name, storage):
+    """Generate variants for ``name`` off the request path."""
+    global _executor
+    with _lock:
+        if not name or name in _ready or name in _skipped or name in _pending:
+            return
+        _pending.add(name)
+        workers = getattr(settings, "IMAGE_VARIANT_WORKERS", 2)
+        if workers and _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-variants")
+    if workers:
+        _executor.submit(_run, name, storage)
+    else:
+        _run(name, storage)
+
+
+def variant_url(fieldfile, width, ext="webp"):
+    """URL of the variant closest to ``width``, or of the original until it exists."""
+    if not fieldfile:
+        return ""
+    name, storage = fieldfile.name, fieldfile.storage
+    target = variant_name(name, closest_width(width), ext)
+    if name in _ready:
+        return storage.url(target)
+    if name not in _skipped and storage.exists(target):
+        _ready.add(name)
+        return storage.url(target)
+    schedule_variants(name, storage)
+    return fieldfile.url
+
+
+def variant_urls(fieldfile):
+    """``{width: {ext: url}}`` for every configured variant."""
+    if not fieldfile:
+        return {}
+    return {
+        width: {ext: variant_url(fieldfile, width, ext) for ext in VARIANT_FORMATS}
+        for width in variant_widths()
+    }
+
+
+class HashedImageFieldFile(ImageFieldFile):
+    def save(self, name, content, save=True):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        ext = os.path.splitext(name)[1].lower() or ".jpg"
+        super().save(f"{digest.hexdigest()[:32]}{ext}", content, save)
+        stored_name, storage = self.name, self.storage
+        transaction.on_commit(lambda: schedule_variants(stored_name, storage))
+
+
+class HashedImageField(ImageField):
+    """``ImageField`` that stores uploads under a content-hash name and builds variants."""
+
+    attr_class = HashedImageFieldFile
@@ -0,0 +1,204 @@
+"""
+Per-request query and latency instrumentation.
+
+``QueryProfilingMiddleware`` hooks every database connection with
+``connection.execute_wrapper`` for the duration of a request and records:
+
+- number of queries and total DB time,
+- duplicate query fingerprints (the usual signature of an N+1),
+- time spent outside the database (view, serialization, templates).
+
+The numbers are folded into a rolling per-route window that ``route_stats()``
+summarises (served to staff as JSON by ``route_stats_view``) and, in
+development, sent back in a ``Server-Timing`` header. Tests can use
+``QueryBudgetMixin.assertQueryBudget`` to pin a view's query budget.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connections
+from django.http import JsonResponse
+
+
+logger = logging.getLogger(__name__)
+
+HISTOGRAM_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)")
+
+
+def fingerprint(sql):
+    """Normalise a SQL statement so queries differing only by parameters compare equal."""
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    return _IN_LIST.sub("(...)", sql)
+
+
+class QueryRecorder:
+    """``execute_wrapper`` callable that counts, times and fingerprints queries."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self, threshold=2):
+        """Fingerprints executed at least ``threshold`` times, most frequent first."""
+        return [(sql, n) for sql, n in self.fingerprints.most_common() if n >= threshold]
+
+
+@contextmanager
+def record_queries():
+    """Install a ``QueryRecorder`` on every configured database connection."""
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(recorder))
+        yield recorder
+
+
+class RouteStats:
+    """Thread-safe rolling window of recent samples per route."""
+
+    def __init__(self, size):
+        self.size = size
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=self.size))
+
+    def add(self, route, total_ms, db_ms, queries):
+        with self._lock:
+            self._samples[route].append((total_ms, db_ms, queries))
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def snapshot(self):
+        with self._lock:
+            samples = {route: list(window) for route, window in self._samples.items()}
+        return {route: _summarise(window) for route, window in samples.items()}
+
+
+def _percentile(sorted_values, pct):
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def _summarise(window):
+    totals = sorted(sample[0] for sample in window)
+    histogram = Counter()
+    for value in totals:
+        bucket = next((f"le_{b}" for b in HISTOGRAM_BUCKETS_MS if value <= b), "le_inf")
+        histogram[bucket] += 1
+    return {
+        "count": len(window),
+        "p50_ms": round(_percentile(totals, 50), 2),
+        "p95_ms": round(_percentile(totals, 95), 2),
+        "p99_ms": round(_percentile(totals, 99), 2),
+        "mean_db_ms": round(sum(s[1] for s in window) / len(window), 2),
+        "mean_queries": round(sum(s[2] for s in window) / len(window), 2),
+        "max_queries": max(s[2] for s in window),
+        "histogram": dict(histogram),
+    }
+
+
+ROUTE_STATS = RouteStats(getattr(settings, "PROFILING_WINDOW_SIZE", 1000))
+
+
+def route_stats():
+    """Latency/query summary for every route seen by this process."""
+    return ROUTE_STATS.snapshot()
+
+
+@staff_member_required
+def route_stats_view(request):
+    """``route_stats()`` as JSON. Each worker process keeps its own window."""
+    return JsonResponse(route_stats())
+
+
+class QueryProfilingMiddleware:
+    """
+    Record query count, DB time and duplicate queries for each request.
+
+    Settings:
+    - ``PROFILING_SERVER_TIMING`` (default ``DEBUG``): add the ``Server-Timing``
+      header. It tells every client how long the database took, so leave it
+      off in production.
+    - ``PROFILING_DUPLICATE_THRESHOLD`` (default 5): log a warning when one
+      fingerprint runs at least this many times in a request.
+    - ``PROFILING_WINDOW_SIZE`` (default 1000): samples kept per route.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, "PROFILING_SERVER_TIMING", settings.DEBUG)
+        self.duplicate_threshold = getattr(settings, "PROFILING_DUPLICATE_THRESHOLD", 5)
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with record_queries() as recorder:
+            # Exposed so outer middleware (e.g. metrics) can reuse the numbers.
+            request.query_recorder = recorder
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - started) * 1000
+        db_ms = recorder.duration * 1000
+
+        match = getattr(request, "resolver_match", None)
+        route = (match.view_name or match.route) if match else "<unresolved>"
+        ROUTE_STATS.add(route, total_ms, db_ms, recorder.count)
+
+        duplicates = recorder.duplicates(self.duplicate_threshold)
+        if duplicates:
+            sql, n = duplicates[0]
+            logger.warning(
+                "Possible N+1 on %s %s: query repeated %d times: %s",
+                request.method, request.path, n, sql[:300],
+            )
+
+        if self.server_timing:
+            repeated = sum(n - 1 for _, n in recorder.duplicates())
+            response["Server-Timing"] = ", ".join([
+                f'db;dur={db_ms:.2f};desc="{recorder.count} queries, {repeated} duplicate"',
+                f"app;dur={total_ms - db_ms:.2f}",
+                f"total;dur={total_ms:.2f}",
+            ])
+        return response
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin for asserting per-view query budgets.
+
+        with self.assertQueryBudget(5, max_duplicates=0):
+            self.client.get(url)
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, max_queries, max_duplicates=None):
+        with record_queries() as recorder:
+            yield recorder
+        details = "\n".join(f"  {n}x {sql}" for sql, n in recorder.fingerprints.most_common())
+        if recorder.count > max_queries:
+            self.fail(f"{recorder.count} queries executed, budget is {max_queries}:\n{details}")
+        if max_duplicates is not None:
+            repeated = sum(n - 1 for _, n in recorder.duplicates())
+            if repeated > max_duplicates:
+                self.fail(f"{repeated} duplicate queries executed, budget is {max_duplicates}:\n{details}")
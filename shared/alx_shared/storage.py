@@ -0,0 +1,31 @@
+"""
+Static files storage: content-hashed names, pre-compressed copies.
+
+``collectstatic`` writes every file under a name carrying a hash of its
+contents (``styles.3f2a9c1e4b7d.css``) plus a manifest mapping the original
+names to the hashed ones, rewrites the ``url()`` references inside CSS to
+match, and writes a ``.gz`` (and, with the ``Brotli`` package installed, a
+``.br``) copy of every compressible file. A hashed name never changes its
+contents, so WhiteNoise serves these with a one-year ``immutable``
+``Cache-Control`` and picks the compressed copy the browser accepts.
+
+Files that ``collectstatic`` has not seen (``runserver``, the test suite)
+keep their plain URL instead of raising; ``collectstatic`` itself stays strict
+about broken references.
+
+Use it as ``STORAGES["staticfiles"]["BACKEND"]`` together with
+``whitenoise.middleware.WhiteNoiseMiddleware``; it needs the ``static`` extra.
+"""
+
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class FingerprintedStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Not in the manifest: nothing has been collected yet.
+            return name
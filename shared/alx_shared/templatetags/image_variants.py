@@ -0,0 +1,25 @@
+from django import template
+from django.utils.html import format_html
+
+from alx_shared.images import variant_url
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def picture(fieldfile, width, alt=""):
+    """
+    Render a ``<picture>`` pointing at the variant sized for ``width`` pixels.
+
+    Usage: ``{% load image_variants %}{% picture user.profile.image 128 alt=user.username %}``
+    """
+    if not fieldfile:
+        return ""
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}"><img src="{}" width="{}" alt="{}" loading="lazy"></picture>',
+        variant_url(fieldfile, width, "webp"),
+        variant_url(fieldfile, width, "jpg"),
+        width,
+        alt,
+    )
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:05
+
+import alx_shared.images
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_remove_user_followers_user_following"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="user",
+            name="profile_picture",
+            field=alx_shared.images.HashedImageField(
+                blank=True, null=True, upload_to="profiles/"
+            ),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from alx_shared.images import HashedImageField
+
 
 class User(AbstractUser):
 	"""
@@ -8,12 +10,12 @@ class User(AbstractUser):
 
 	Fields added:
 	- bio: optional text field
-	- profile_picture: optional image upload
+	- profile_picture: optional image upload, stored under a content-hash name with resized variants
 	- followers: ManyToMany to self (symmetrical=False) representing users who follow this user
 	"""
 
 	bio = models.TextField(blank=True, null=True)
-	profile_picture = models.ImageField(upload_to="profiles/", blank=True, null=True)
+	profile_picture = HashedImageField(upload_to="profiles/", blank=True, null=True)
 	# Users this user is following
 	following = models.ManyToManyField(
 		"self", symmetrical=False, related_name="followers", blank=True
@@ -2,16 +2,31 @@ from django.contrib.auth import authenticate, get_user_model
 from rest_framework import serializers
 from rest_framework.authtoken.models import Token
 
+from alx_shared.images import variant_urls
+
 
 User = get_user_model()
 
 
 class UserSerializer(serializers.ModelSerializer):
+    # Resized WebP/JPEG versions of profile_picture, keyed by width
+    profile_picture_variants = serializers.SerializerMethodField()
+
     class Meta:
         model = User
-        fields = ["id", "username", "email", "first_name", "last_name", "bio", "profile_picture", "followers"]
+        fields = [
+            "id", "username", "email", "first_name", "last_name", "bio",
+            "profile_picture", "profile_picture_variants", "followers",
+        ]
         read_only_fields = ["id", "followers"]
 
+    def get_profile_picture_variants(self, obj):
+        request = self.context.get("request")
+        urls = variant_urls(obj.profile_picture)
+        if request is not None:
+            urls = {w: {ext: request.build_absolute_uri(u) for ext, u in by_ext.items()} for w, by_ext in urls.items()}
+        return urls
+
 
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=8)
@@ -1,3 +1,66 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from io import BytesIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient
+
+from alx_shared import images
+from alx_shared.images import variant_name
+
+
+User = get_user_model()
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_upload(name="avatar.png", size=(600, 400)):
+    buffer = BytesIO()
+    Image.new("RGB", size, "red").save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_VARIANT_WORKERS=0, IMAGE_VARIANT_WIDTHS=(64, 128))
+class ProfilePictureVariantTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice", password="password123")
+        self.client = APIClient(HTTP_HOST="localhost")
+        self.client.force_authenticate(self.user)
+
+    def test_upload_is_stored_by_content_hash_with_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(reverse("profile"), {"profile_picture": make_upload()}, format="multipart")
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        name = self.user.profile_picture.name
+        self.assertRegex(name, r"^profiles/[0-9a-f]{32}\.png$")
+
+        storage = self.user.profile_picture.storage
+        with storage.open(variant_name(name, 64, "webp")) as f:
+            self.assertEqual(Image.open(f).size, (64, 43))
+        self.assertTrue(storage.exists(variant_name(name, 128, "jpg")))
+
+        variants = self.client.get(reverse("profile")).data["profile_picture_variants"]
+        self.assertTrue(variants[128]["webp"].endswith(variant_name(name, 128, "webp")))
+
+    def test_missing_original_is_skipped_quietly(self):
+        storage = self.user.profile_picture.storage
+        with self.assertLogs("alx_shared.images", "WARNING") as logs:
+            images.schedule_variants("profiles/missing.jpg", storage)
+        self.assertEqual(len(logs.records), 1)
+        self.assertIsNone(logs.records[0].exc_info)
+        self.assertIn("profiles/missing.jpg", images._skipped)
+
+    def test_memo_is_bounded(self):
+        memo = images._LRUSet(2)
+        for name in ("a", "b", "a", "c"):
+            memo.add(name)
+        self.assertEqual(["a" in memo, "b" in memo, "c" in memo], [True, False, True])
@@ -0,0 +1,180 @@
+"""
+Pure-Python load driver for the feed, post, like and notification endpoints.
+
+Two modes:
+
+- HTTP (default): concurrent requests against a running server via ``urllib``.
+- ``--in-process``: requests go through DRF's ``APIClient`` inside this process,
+  which lets us count the exact number of SQL queries each request runs.
+
+Reports p50/p95/p99 latency per endpoint.
+"""
+
+import json
+import random
+import statistics
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from posts.models import Post
+
+
+User = get_user_model()
+
+# (name, method, path template); {post_id} is filled from a sample of real posts.
+ENDPOINTS = [
+    ("feed", "GET", "/api/feed/"),
+    ("post-list", "GET", "/api/posts/"),
+    ("post-detail", "GET", "/api/posts/{post_id}/"),
+    ("post-like", "POST", "/api/posts/{post_id}/like/"),
+    ("post-unlike", "POST", "/api/posts/{post_id}/unlike/"),
+    ("notifications", "GET", "/api/notifications/"),
+    ("user-list", "GET", "/api/accounts/users/"),
+]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def parse_server_timing_queries(header):
+    """Extract the query count from a ``Server-Timing`` header, if the server sends one."""
+    for metric in (header or "").split(","):
+        parts = [part.strip() for part in metric.split(";")]
+        if parts[0] != "db":
+            continue
+        for param in parts[1:]:
+            if param.startswith("desc="):
+                desc = param[5:].strip('"').split()
+                if desc and desc[0].isdigit():
+                    return int(desc[0])
+    return None
+
+
+class Command(BaseCommand):
+    help = "Drive load against the API and report latency percentiles and queries per request"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="Server to load (HTTP mode)")
+        parser.add_argument("--in-process", action="store_true", help="Use APIClient and count queries exactly")
+        parser.add_argument("--username", help="User to authenticate as (defaults to the user following the most)")
+        parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint")
+        parser.add_argument("--concurrency", type=int, default=8, help="Concurrent HTTP requests")
+        parser.add_argument("--endpoints", nargs="*", help="Subset of endpoint names to run")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed for post selection")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    def handle(self, *args, **options):
+        user = self._get_user(options["username"])
+        token, _ = Token.objects.get_or_create(user=user)
+        post_ids = list(Post.objects.order_by("?").values_list("pk", flat=True)[:1000])
+        if not post_ids:
+            raise CommandError("No posts found; run seed_synthetic_data first.")
+
+        endpoints = [e for e in ENDPOINTS if not options["endpoints"] or e[0] in options["endpoints"]]
+        rng = random.Random(options["seed"])
+        report = {}
+        for name, method, template in endpoints:
+            paths = [template.format(post_id=rng.choice(post_ids)) for _ in range(options["requests"])]
+            if options["in_process"]:
+                samples = self._run_in_process(user, method, paths)
+            else:
+                samples = self._run_http(options, token.key, method, paths)
+            report[name] = self._summarise(samples)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self._print_report(report)
+
+    def _get_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"User '{username}' does not exist.")
+        user = User.objects.annotate(n=Count("following")).order_by("-n").first()
+        if user is None:
+            raise CommandError("No users found; run seed_synthetic_data first.")
+        return user
+
+    def _run_in_process(self, user, method, paths):
+        client = APIClient(HTTP_HOST="localhost")
+        client.force_authenticate(user=user)
+        samples = []
+        for path in paths:
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                response = client.generic(method, path)
+                elapsed = time.perf_counter() - started
+            samples.append((elapsed, response.status_code, len(ctx.captured_queries)))
+        return samples
+
+    def _run_http(self, options, token, method, paths):
+        base_url = options["base_url"].rstrip("/")
+
+        def fetch(path):
+            request = urllib.request.Request(
+                base_url + path, method=method, headers={"Authorization": f"Token {token}"}
+            )
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    response.read()
+                    status, headers = response.status, response.headers
+            except urllib.error.HTTPError as exc:
+                exc.read()
+                status, headers = exc.code, exc.headers
+            except urllib.error.URLError:
+                # Connection-level failure; recorded as status 0.
+                status, headers = 0, {}
+            elapsed = time.perf_counter() - started
+            return elapsed, status, parse_server_timing_queries(headers.get("Server-Timing"))
+
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            return list(pool.map(fetch, paths))
+
+    def _summarise(self, samples):
+        latencies = sorted(elapsed * 1000 for elapsed, _, _ in samples)
+        statuses = defaultdict(int)
+        for _, status, _ in samples:
+            statuses[status] += 1
+        queries = [count for _, _, count in samples if count is not None]
+        return {
+            "requests": len(samples),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "mean_ms": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+            "queries_per_request": round(statistics.fmean(queries), 1) if queries else None,
+            "max_queries": max(queries) if queries else None,
+            "status_codes": dict(statuses),
+        }
+
+    def _print_report(self, report):
+        header = f"{'endpoint':<16}{'reqs':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'q/req':>8}{'max q':>7}  status"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for name, row in report.items():
+            qpr = "-" if row["queries_per_request"] is None else row["queries_per_request"]
+            maxq = "-" if row["max_queries"] is None else row["max_queries"]
+            statuses = " ".join(f"{code}x{count}" for code, count in sorted(row["status_codes"].items()))
+            self.stdout.write(
+                f"{name:<16}{row['requests']:>6}{row['p50_ms']:>10}{row['p95_ms']:>10}"
+                f"{row['p99_ms']:>10}{qpr:>8}{maxq:>7}  {statuses}"
+            )
@@ -0,0 +1,225 @@
+"""
+Generate a reproducible synthetic data set for capacity planning.
+
+Users get a Zipf-like popularity weight, which drives both the follow graph
+(popular users collect most followers) and likes (popular authors collect most
+likes). Everything is written with ``bulk_create`` in fixed-size batches so
+memory stays flat regardless of the requested size.
+"""
+
+import bisect
+import itertools
+import multiprocessing
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+
+from posts.models import Comment, Like, Post
+
+
+User = get_user_model()
+
+WORDS = (
+    "api django python feed like follow post comment cache query index latency "
+    "graph batch worker token request response server client data model view "
+    "coffee travel music weekend photo story idea launch update release team"
+).split()
+
+
+def _zipf_cum_weights(n, alpha):
+    """Cumulative Zipf weights for ranks 1..n, suitable for ``random.choices``."""
+    return list(itertools.accumulate(1.0 / (rank ** alpha) for rank in range(1, n + 1)))
+
+
+def _sample_distinct(rng, population, cum_weights, k):
+    """Draw up to ``k`` distinct items following the power-law weights."""
+    k = min(k, len(population))
+    total = cum_weights[-1]
+    picked = set()
+    # Bounded retries: with a heavy head, duplicates are common for large k.
+    for _ in range(k * 4):
+        if len(picked) >= k:
+            break
+        picked.add(population[bisect.bisect_left(cum_weights, rng.random() * total)])
+    return picked
+
+
+def _sentence(rng, low, high):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high))).capitalize()
+
+
+def _flush(model, rows, batch_size, **kwargs):
+    if rows:
+        model.objects.bulk_create(rows, batch_size=batch_size, **kwargs)
+        rows.clear()
+
+
+def _generate_content(job):
+    """
+    Create posts, comments and likes for one slice of authors.
+
+    Runs either inline or in a worker process; each job gets its own seed so the
+    result does not depend on how the work was split.
+    """
+    author_ids, user_ids, options, seed = job
+    rng = random.Random(seed)
+    batch_size = options["batch_size"]
+    cum_weights = _zipf_cum_weights(len(user_ids), options["alpha"])
+    # Rank is the position in the popularity ordering, so weights line up with user_ids.
+    rank_of = {user_id: rank for rank, user_id in enumerate(user_ids)}
+    created = {"posts": 0, "comments": 0, "likes": 0}
+
+    for start in range(0, len(author_ids), batch_size):
+        posts = []
+        for author_id in author_ids[start:start + batch_size]:
+            for _ in range(rng.randint(0, options["posts_per_user"] * 2)):
+                posts.append(
+                    Post(
+                        author_id=author_id,
+                        title=_sentence(rng, 3, 8),
+                        content=_sentence(rng, 10, 60),
+                    )
+                )
+        if not posts:
+            continue
+        with transaction.atomic():
+            # bulk_create sets primary keys on backends with RETURNING support.
+            Post.objects.bulk_create(posts, batch_size=batch_size)
+            comments, likes = [], []
+            for post in posts:
+                for _ in range(rng.randint(0, options["comments_per_post"] * 2)):
+                    comments.append(
+                        Comment(
+                            post_id=post.pk,
+                            author_id=rng.choice(user_ids),
+                            content=_sentence(rng, 3, 25),
+                        )
+                    )
+                # Popular authors attract more likes.
+                popularity = 1.0 / (rank_of[post.author_id] + 1) ** options["alpha"]
+                like_count = int(rng.paretovariate(1.5) / 3 * options["likes_per_post"] * (1 + popularity))
+                for user_id in _sample_distinct(rng, user_ids, cum_weights, like_count):
+                    likes.append(Like(post_id=post.pk, user_id=user_id))
+                if len(comments) >= batch_size:
+                    created["comments"] += len(comments)
+                    _flush(Comment, comments, batch_size)
+                if len(likes) >= batch_size:
+                    created["likes"] += len(likes)
+                    _flush(Like, likes, batch_size, ignore_conflicts=True)
+            created["comments"] += len(comments)
+            created["likes"] += len(likes)
+            _flush(Comment, comments, batch_size)
+            _flush(Like, likes, batch_size, ignore_conflicts=True)
+        created["posts"] += len(posts)
+    return created
+
+
+class Command(BaseCommand):
+    help = "Generate seeded synthetic users, a power-law follow graph, posts, comments and likes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000, help="Number of users to create")
+        parser.add_argument("--follows-per-user", type=int, default=20, help="Mean follows per user")
+        parser.add_argument("--posts-per-user", type=int, default=5, help="Mean posts per user")
+        parser.add_argument("--comments-per-post", type=int, default=2, help="Mean comments per post")
+        parser.add_argument("--likes-per-post", type=int, default=5, help="Mean likes per post")
+        parser.add_argument("--alpha", type=float, default=1.1, help="Zipf exponent for popularity")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed for reproducible data")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows per bulk_create batch")
+        parser.add_argument("--workers", type=int, default=1, help="Processes used for posts/comments/likes")
+        parser.add_argument("--prefix", default="synthetic", help="Username prefix for generated users")
+        parser.add_argument("--password", default="password123", help="Password set on every generated user")
+
+    def handle(self, *args, **options):
+        if options["users"] < 2:
+            raise CommandError("--users must be at least 2.")
+        if User.objects.filter(username__startswith=f"{options['prefix']}_").exists():
+            raise CommandError(
+                f"Users with prefix '{options['prefix']}_' already exist; choose another --prefix."
+            )
+        if options["workers"] > 1 and connection.vendor == "sqlite":
+            self.stdout.write(self.style.WARNING(
+                "SQLite serialises writers; --workers > 1 mostly helps on PostgreSQL."
+            ))
+
+        rng = random.Random(options["seed"])
+        started = time.perf_counter()
+
+        user_ids = self._create_users(options)
+        # Shuffle once so popularity rank is independent of insertion order.
+        rng.shuffle(user_ids)
+        follows = self._create_follow_graph(rng, user_ids, options)
+        totals = self._create_content(user_ids, options)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(user_ids)} users, {follows} follows, {totals['posts']} posts, "
+            f"{totals['comments']} comments and {totals['likes']} likes in {elapsed:.1f}s"
+        ))
+
+    def _create_users(self, options):
+        prefix, batch_size = options["prefix"], options["batch_size"]
+        # Hashing is deliberately slow, so every generated user shares one hash.
+        password = make_password(options["password"])
+        for start in range(0, options["users"], batch_size):
+            stop = min(start + batch_size, options["users"])
+            User.objects.bulk_create(
+                [
+                    User(username=f"{prefix}_{i}", email=f"{prefix}_{i}@example.com", password=password)
+                    for i in range(start, stop)
+                ],
+                batch_size=batch_size,
+            )
+            self.stdout.write(f"Users: {stop}/{options['users']}")
+        return list(
+            User.objects.filter(username__startswith=f"{prefix}_").order_by("pk").values_list("pk", flat=True)
+        )
+
+    def _create_follow_graph(self, rng, user_ids, options):
+        Follow = User.following.through
+        cum_weights = _zipf_cum_weights(len(user_ids), options["alpha"])
+        batch_size = options["batch_size"]
+        rows, total = [], 0
+        for follower_id in user_ids:
+            # Out-degree is heavy-tailed too: most users follow a few, some follow many.
+            wanted = int(rng.paretovariate(2.0) * options["follows_per_user"] / 2)
+            for followee_id in _sample_distinct(rng, user_ids, cum_weights, wanted):
+                if followee_id != follower_id:
+                    rows.append(Follow(from_user_id=follower_id, to_user_id=followee_id))
+            if len(rows) >= batch_size:
+                total += len(rows)
+                _flush(Follow, rows, batch_size, ignore_conflicts=True)
+        total += len(rows)
+        _flush(Follow, rows, batch_size, ignore_conflicts=True)
+        self.stdout.write(f"Follows: {total}")
+        return total
+
+    def _create_content(self, user_ids, options):
+        workers = max(1, options["workers"])
+        chunk = -(-len(user_ids) // (workers * 4))
+        jobs = [
+            (user_ids[start:start + chunk], user_ids, options, options["seed"] + 1 + n)
+            for n, start in enumerate(range(0, len(user_ids), chunk))
+        ]
+        totals = {"posts": 0, "comments": 0, "likes": 0}
+        if workers == 1:
+            results = map(_generate_content, jobs)
+        else:
+            # Forked children must not share the parent's database connection.
+            connections.close_all()
+            pool = multiprocessing.get_context("fork").Pool(workers)
+            results = pool.imap_unordered(_generate_content, jobs)
+        try:
+            for result in results:
+                for key, value in result.items():
+                    totals[key] += value
+                self.stdout.write(f"Posts: {totals['posts']}, comments: {totals['comments']}, likes: {totals['likes']}")
+        finally:
+            if workers > 1:
+                pool.close()
+                pool.join()
+        return totals
@@ -0,0 +1,135 @@
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from alx_shared import db_routing
+from alx_shared.profiling import QueryBudgetMixin, fingerprint, route_stats
+
+from .models import Comment, Like, Post
+
+
+User = get_user_model()
+
+
+class SeedSyntheticDataTests(TestCase):
+    def test_seed_is_reproducible(self):
+        call_command("seed_synthetic_data", users=50, batch_size=20, prefix="a", stdout=StringIO())
+        first = (Post.objects.count(), Comment.objects.count(), Like.objects.count())
+        Post.objects.all().delete()
+        call_command("seed_synthetic_data", users=50, batch_size=20, prefix="b", stdout=StringIO())
+        second = (Post.objects.count(), Comment.objects.count(), Like.objects.count())
+        self.assertEqual(User.objects.filter(username__startswith="a_").count(), 50)
+        self.assertGreater(first[0], 0)
+        self.assertEqual(first, second)
+
+    def test_loadtest_in_process_reports_queries(self):
+        call_command("seed_synthetic_data", users=30, prefix="lt", stdout=StringIO())
+        out = StringIO()
+        call_command("loadtest", in_process=True, requests=3, endpoints=["post-detail"], stdout=out)
+        self.assertIn("post-detail", out.getvalue())
+
+
+class QueryProfilingTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice", password="password123")
+        self.post = Post.objects.create(author=self.user, title="Hello", content="World")
+        Comment.objects.create(post=self.post, author=self.user, content="First")
+
+    def test_fingerprint_ignores_parameters(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id = 1 AND name = 'a'"),
+            fingerprint("SELECT * FROM t WHERE id = 22 AND name = 'b''c'"),
+        )
+
+    @override_settings(PROFILING_SERVER_TIMING=True)
+    def test_server_timing_header_and_route_stats(self):
+        response = self.client.get(reverse("post-detail", kwargs={"pk": self.post.pk}), HTTP_HOST="localhost")
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response["Server-Timing"], r'db;dur=[\d.]+;desc="\d+ queries')
+        self.assertIn("post-detail", route_stats())
+
+        self.assertEqual(self.client.get("/profiling/routes/", HTTP_HOST="localhost").status_code, 302)
+        staff = User.objects.create_user(username="staff", password="password123", is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get("/profiling/routes/", HTTP_HOST="localhost")
+        self.assertIn("post-detail", response.json())
+
+    def test_no_server_timing_without_debug(self):
+        response = self.client.get(reverse("post-detail", kwargs={"pk": self.post.pk}), HTTP_HOST="localhost")
+        self.assertNotIn("Server-Timing", response)
+
+    def test_post_detail_query_budget(self):
+        with self.assertQueryBudget(3, max_duplicates=0):
+            self.client.get(reverse("post-detail", kwargs={"pk": self.post.pk}), HTTP_HOST="localhost")
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1"], DATABASE_REPLICA_STICKY_SECONDS=5)
+@mock.patch("alx_shared.db_routing.is_healthy", return_value=True)
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = db_routing.PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+
+    def route_during(self, request):
+        seen = []
+        middleware = db_routing.ReplicaRoutingMiddleware(
+            lambda r: seen.append(self.router.db_for_read(Post)) or HttpResponse()
+        )
+        middleware(request)
+        return seen[0]
+
+    def test_reads_go_to_replica_and_writes_to_primary(self, healthy):
+        self.assertEqual(self.router.db_for_read(Post), "replica_1")
+        self.assertEqual(self.router.db_for_write(Post), "default")
+        with db_routing.use_primary():
+            self.assertEqual(self.router.db_for_read(Post), "default")
+
+    def test_unhealthy_replica_falls_back_to_primary(self, healthy):
+        healthy.return_value = False
+        self.assertEqual(self.router.db_for_read(Post), "default")
+
+    def test_reads_stick_to_primary_after_a_write(self, healthy):
+        auth = {"HTTP_AUTHORIZATION": "Token abc"}
+        self.assertEqual(self.route_during(self.factory.get("/api/posts/", **auth)), "replica_1")
+        self.assertEqual(self.route_during(self.factory.post("/api/posts/", **auth)), "default")
+        self.assertEqual(self.route_during(self.factory.get("/api/posts/", **auth)), "default")
+        # Other clients are unaffected.
+        self.assertEqual(self.route_during(self.factory.get("/api/posts/", HTTP_AUTHORIZATION="Token xyz")), "replica_1")
+
+    def test_anonymous_writes_do_not_pin_everyone(self, healthy):
+        # Behind the proxy every client has the proxy's address.
+        self.assertEqual(self.route_during(self.factory.post("/api/accounts/register/", REMOTE_ADDR="10.0.0.2")), "default")
+        self.assertEqual(self.route_during(self.factory.get("/api/posts/", REMOTE_ADDR="10.0.0.2")), "replica_1")
+
+    def test_new_session_sticks_after_login(self, healthy):
+        def login(request):
+            response = HttpResponse()
+            response.set_cookie(settings.SESSION_COOKIE_NAME, "new-session")
+            return response
+
+        db_routing.ReplicaRoutingMiddleware(login)(self.factory.post("/admin/login/"))
+        self.factory.cookies[settings.SESSION_COOKIE_NAME] = "new-session"
+        self.assertEqual(self.route_during(self.factory.get("/api/posts/")), "default")
+
+    def test_replicas_are_never_migrated(self, healthy):
+        self.assertIs(self.router.allow_migrate("replica_1", "posts"), False)
+        self.assertIsNone(self.router.allow_migrate("default", "posts"))
+
+    def test_database_settings_from_urls(self, healthy):
+        replicas = db_routing.replica_databases("sqlite:///replica.sqlite3, postgres://u:p%40ss@db:5433/app", pool=True)
+        self.assertEqual(replicas["replica_1"]["NAME"], "replica.sqlite3")
+        self.assertEqual(replicas["replica_1"]["CONN_MAX_AGE"], 600)
+        pg = replicas["replica_2"]
+        self.assertEqual((pg["HOST"], pg["PORT"], pg["PASSWORD"], pg["NAME"]), ("db", "5433", "p@ss", "app"))
+        self.assertEqual(pg["CONN_MAX_AGE"], 0)
+        self.assertIn("pool", pg["OPTIONS"])
+        self.assertTrue(pg["CONN_HEALTH_CHECKS"])
+        self.assertEqual(pg["TEST"], {"MIRROR": "default"})
@@ -30,6 +30,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "alx_shared.profiling.QueryProfilingMiddleware",
+    "alx_shared.db_routing.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -75,6 +77,18 @@ if os.environ.get("DATABASE_URL"):
         # dj_database_url not installed; keep default
         pass
 
+# Connection pooling (PostgreSQL) or persistent connections, with health checks,
+# and read replicas from DATABASE_REPLICA_URLS (comma-separated).
+# See alx_shared.db_routing.
+from alx_shared.db_routing import configure_connection, replica_databases  # noqa: E402
+
+DATABASE_POOL = os.environ.get("DATABASE_POOL", "False") in ("1", "True", "true")
+DATABASES["default"] = configure_connection(DATABASES["default"], pool=DATABASE_POOL)
+DATABASES.update(replica_databases(os.environ.get("DATABASE_REPLICA_URLS"), pool=DATABASE_POOL))
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["alx_shared.db_routing.PrimaryReplicaRouter"]
+DATABASE_REPLICA_STICKY_SECONDS = int(os.environ.get("DATABASE_REPLICA_STICKY_SECONDS", "5"))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
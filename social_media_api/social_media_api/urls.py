@@ -20,8 +20,11 @@ from django.urls import include, path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from alx_shared.profiling import route_stats_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("profiling/routes/", route_stats_view, name="profiling-routes"),
     path("api/accounts/", include("accounts.urls")),
     path("api/", include("posts.urls")),
     path("api/notifications/", include("notifications.urls")),